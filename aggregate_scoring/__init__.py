@@ -4,5 +4,18 @@ from .aggregate_scoring import (
     CommunityTransportationOptions,
     QualityEducation,
     DesirableUndesirableActivities,
-    StableCommunities
+    StableCommunities,
+    HousingNeedsCharacteristics,
+    score_many
 )
+from .walk_network import WalkNetwork, TiledWalkNetwork, TransitDistanceField, load_walk_network, build_walk_network, validate_csr_engine
+from .spatial_index import AmenityIndex, BufferQueryIndex, PointIndex, PolygonIndex
+from .transit_stops import deduplicate_stops, load_transit_stops
+from .polygon_raster import PolygonRaster, load_polygon_raster
+from .wetlands import WetlandsIndex, load_wetlands_index
+from .school_matching import SchoolNameResolver, load_school_resolver
+from .education_partition import build_education_partition, load_education_partition
+from .stable_surface import StableSurface, build_stable_surface, load_stable_surface
+from .tract_table import TractTable, load_tract_table
+from .site_context import SiteContext
+from .data_bundle import build_bundle, load_bundle
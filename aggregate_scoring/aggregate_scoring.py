@@ -1,15 +1,25 @@
 from geopy.distance import geodesic
 import requests
-import re
-from thefuzz import process, fuzz
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Point
+import json
 import math
+import time
 import osmnx as ox
 import networkx as nx
 import numpy as np
-from shapely.geometry import Point
+from collections import Counter
+
+from .education_partition import DEFAULT_PARTITION_PATH, load_education_partition, partition_hash
+from .polygon_raster import EDUCATION_SCORE_PATH, load_education_score_layer, school_zone_layer
+from .school_matching import GRADE_CLUSTERS, ZONE_NAME_COLUMNS, load_school_resolver, preprocess_school_name
+from .site_context import SiteContext
+from .stable_surface import DEFAULT_STABLE_SURFACE_PATH, SURFACE_CRS, load_stable_surface, surface_hash
+from .spatial_index import AmenityIndex, BufferQueryIndex, PointIndex, PolygonIndex, cached_index
+from .tract_table import IN_QCT_KEY, housing_records, resolve_tract_table
+from .transit_stops import load_transit_stops
+from .walk_network import TransitDistanceField, load_walk_network
+from .wetlands import DEFAULT_WETLANDS_PATH, WetlandsIndex, load_wetlands_index
 
 ######################################################################################################################################
 
@@ -19,15 +29,32 @@ class ScoringCriterion:
         self.latitude = latitude
         self.longitude = longitude
         self.extra = kwargs
+        # tract, zone and projection lookups shared by every criterion built with the same site_context
+        self.context = SiteContext.for_site(latitude, longitude, kwargs.get("site_context"))
 
     def calculate_score(self):
         raise NotImplementedError("Must implement in subclass")
 
+    @classmethod
+    def for_batch(cls, lats, lons, kwargs):
+        """One instance whose kwargs-derived indexes and tables serve a whole batch of sites."""
+        kwargs = {key: value for key, value in kwargs.items() if key != "site_context"}
+        return cls(float(lats[0]), float(lons[0]), **kwargs)
+
+    @classmethod
+    def calculate_score_many(cls, lats, lons, **kwargs):
+        """calculate_score for arrays of sites; subclasses batch their lookups, this is the per-site fallback."""
+        kwargs = {key: value for key, value in kwargs.items() if key != "site_context"}
+        return np.array([cls(lat, lon, **kwargs).calculate_score() for lat, lon in zip(np.asarray(lats).tolist(), np.asarray(lons).tolist())],
+                        dtype=np.float64)
+
 ####################################################################################################################################
 # kwargs should be a dictionary which has the format:
 """ kwargs = {
     # --- CommunityTransportationOptions ---
     "transit_df": pd.read_csv("../../data/raw/scoring_indicators/community_trans_options_sites/georgia_transit_locations_with_hub.csv"),
+    # optional: "walking_mode": "site_graph", "walk_network": "<store .npz or tile dir>", "walk_engine": "csr",
+    #           "transit_field": "<field .npz>", "walking_fallback": "raise", "time_budget_s": 2.0
 
     # --- DesirableUndesirableActivities ---
     "rural_gdf_unary_union": gpd.read_file("../../data/raw/shapefiles/USDA_Rural_Housing_by_Tract_7054655361891465054/USDA_Rural_Housing_by_Tract.shp").to_crs("EPSG:4326").unary_union,
@@ -36,6 +63,8 @@ class ScoringCriterion:
     "usda_csv": pd.read_csv("../../data/raw/scoring_indicators/desirable_undesirable_activities/usda/food_access_research_atlas.csv", dtype={'CensusTract': str}),
     "tract_shapefile": gpd.read_file("../../data/raw/shapefiles/tl_2024_13_tract/tl_2024_13_tract.shp"),
     "undesirable_csv": pd.read_csv("../../data/processed/scoring_indicators/desirable_undesirable_activities/undesirable_hsi_tri_cdr_rcra_frs_google_places.csv"),
+    # optional: "wetlands_gdf": <wetland polygons>, "wetlands_index": <WetlandsIndex or .gpkg path>; without either the
+    #           cleaned layer (python -m aggregate_scoring.wetlands clean) is loaded, and "wetlands_index": False skips the deduction
 
     # --- QualityEducation ---
     "school_df": pd.read_csv("../../data/processed/scoring_indicators/quality_education_areas/Option_C_Scores_Eligibility_with_BTO.csv"),
@@ -46,6 +75,7 @@ class ScoringCriterion:
     gpd.read_file("../../data/raw/shapefiles/quality_education/DKM.json").to_crs("EPSG:4326"),
     gpd.read_file("../../data/raw/shapefiles/quality_education/DKBHS.json").to_crs("EPSG:4326")
     ],   
+    # optional: "education_mode": "auto" | "layer" | "schools", "education_layer": "<education score .geojson>"
     "state_avg_by_year": {
         "elementary": {
             2018: 77.8,
@@ -69,15 +99,58 @@ class ScoringCriterion:
     "census_tract_data": pd.read_csv("../../data/processed/scoring_indicators/housing_needs_characteristics/merged_housing_data.csv"),
     "tracts_gdf": gpd.read_file("../../data/raw/shapefiles/HousingNeeds/tl_2020_13_tract/tl_2020_13_tract.shp").to_crs("EPSG:4326"),
     #"revitalization_score": 4,
-    "in_qct": False  # Required for housing need eligibility
+    "in_qct": False,  # Required for housing need eligibility
+
+    # optional, any criterion: "site_context": SiteContext(lat, lon) shared by the criteria scoring one site
 } """
 
 #####################################################################################################################################
 # --- Community Transportation Options ---
 class CommunityTransportationOptions(ScoringCriterion):
+    SEARCH_RADIUS_MILES = 1.1      # straight-line radius for candidate stops
+    WALK_LIMIT_MILES = 1.0         # furthest walking distance that still scores
+    MILES_PER_METER = 0.000621371
+    GRAPH_BUFFER_DEG = 0.02        # padding around the points when downloading a walk graph
+    POINTS_A = {0.25: 5.0, 0.5: 4.5, 1.0: 4.0}   # transit hub
+    POINTS_B = {0.25: 3.0, 0.5: 2.0, 1.0: 1.0}   # any transit stop
+
+    # Haversine fallbacks by reason, shared by every instance in the process
+    fallback_counts = Counter()
+
     def __init__(self, latitude, longitude, **kwargs):
         super().__init__(latitude, longitude, **kwargs)
-        self.transit_df = kwargs.get("transit_df")  # Pre-loaded transit data
+        self.transit_df = kwargs.get("transit_df")  # Pre-loaded transit data (default: deduplicated stop table)
+        # PointIndex over transit_df; built once per transit_df when not supplied
+        self.transit_index = kwargs.get("transit_index")
+        # "per_stop": one graph + shortest path per stop (original behaviour)
+        # "site_graph": one graph + one capped Dijkstra per site
+        self.walking_mode = kwargs.get("walking_mode", "per_stop")
+        # Local walk-network store (WalkNetwork or path to one); when set it is
+        # used for all snapping and routing and nothing is downloaded.
+        # walk_engine "csr" routes with scipy over the compact CSR adjacency.
+        # A tile directory gives a TiledWalkNetwork with an LRU memory budget.
+        self.walk_engine = kwargs.get("walk_engine", "networkx")
+        walk_network = kwargs.get("walk_network")
+        if isinstance(walk_network, str):
+            walk_network = load_walk_network(walk_network, compact=self.walk_engine == "csr",
+                                             memory_budget_mb=kwargs.get("walk_network_memory_mb", 1024))
+        self.walk_network = walk_network
+        # Precomputed per-node distance to the nearest stop / hub (TransitDistanceField
+        # or path to one); requires walk_network for snapping and skips routing entirely
+        transit_field = kwargs.get("transit_field")
+        if isinstance(transit_field, str):
+            transit_field = TransitDistanceField.load(transit_field)
+        self.transit_field = transit_field
+        if self.transit_df is None and self.transit_field is None:
+            self.transit_df = load_transit_stops()
+        # Per-site routing budget in seconds (None = unbounded); see calculate_walking_distances_within_budget
+        self.time_budget_s = kwargs.get("time_budget_s")
+        self.routing_report = None
+        # "haversine": count the fallback and use straight-line distance
+        # "raise": treat a stop that cannot be routed as an error
+        self.walking_fallback = kwargs.get("walking_fallback", "haversine")
+        self.fallback_count = 0
+        self.last_routing_error = None
 
     def haversine(self, lat1, lon1, lat2, lon2):
         R = 3958.8
@@ -89,38 +162,136 @@ class CommunityTransportationOptions(ScoringCriterion):
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
         return R * c
 
+    def walk_graph_from_bbox(self, north, south, east, west):
+        # osmnx >= 2.0 takes the bbox as a single (left, bottom, right, top) tuple
+        return ox.graph_from_bbox((west, south, east, north), network_type='walk', simplify=True, truncate_by_edge=True)
+
     def get_network_walking_distance(self, orig_lat, orig_lon, dest_lat, dest_lon):
         try:
-            north = max(orig_lat, dest_lat) + 0.02
-            south = min(orig_lat, dest_lat) - 0.02
-            east = max(orig_lon, dest_lon) + 0.02
-            west = min(orig_lon, dest_lon) - 0.02
-            G = ox.graph_from_bbox(north, south, east, west, network_type='walk', simplify=True, truncate_by_edge=True)
+            north = max(orig_lat, dest_lat) + self.GRAPH_BUFFER_DEG
+            south = min(orig_lat, dest_lat) - self.GRAPH_BUFFER_DEG
+            east = max(orig_lon, dest_lon) + self.GRAPH_BUFFER_DEG
+            west = min(orig_lon, dest_lon) - self.GRAPH_BUFFER_DEG
+            G = self.walk_graph_from_bbox(north, south, east, west)
             orig_node = ox.nearest_nodes(G, X=orig_lon, Y=orig_lat)
             dest_node = ox.nearest_nodes(G, X=dest_lon, Y=dest_lat)
             distance_meters = nx.shortest_path_length(G, source=orig_node, target=dest_node, weight='length')
-            return distance_meters * 0.000621371
-        except:
+            return distance_meters * self.MILES_PER_METER
+        except Exception as e:
+            self.last_routing_error = type(e).__name__
             return None
 
-    def filter_candidate_stops(self):
+    def get_site_walking_distances(self, candidates):
+        """
+        Walking distance (miles) from the site to every candidate stop using a
+        single walk graph covering all of them and one single-source Dijkstra
+        capped at WALK_LIMIT_MILES.
+
+        Stops that are reachable but further than the cap come back as inf
+        (they cannot score); stops the graph cannot route to at all come back
+        as None so the caller falls back exactly as in the per-stop mode.
+        """
+        if not candidates:
+            return []
+
+        lats = [self.latitude] + [stop['latitude'] for stop in candidates]
+        lons = [self.longitude] + [stop['longitude'] for stop in candidates]
+        try:
+            G = self.walk_graph_from_bbox(
+                max(lats) + self.GRAPH_BUFFER_DEG, min(lats) - self.GRAPH_BUFFER_DEG,
+                max(lons) + self.GRAPH_BUFFER_DEG, min(lons) - self.GRAPH_BUFFER_DEG)
+            nodes = ox.nearest_nodes(G, X=lons, Y=lats)
+            limit_meters = self.WALK_LIMIT_MILES / self.MILES_PER_METER
+            lengths = nx.single_source_dijkstra_path_length(G, nodes[0], cutoff=limit_meters, weight='length')
+        except Exception as e:
+            self.last_routing_error = type(e).__name__
+            return [None] * len(candidates)
+
+        distances = []
+        reachable = None
+        for node in nodes[1:]:
+            if node in lengths:
+                distances.append(lengths[node] * self.MILES_PER_METER)
+                continue
+            # Not settled within the cap: only fall back if there is no path at all
+            if reachable is None:
+                reachable = nx.descendants(G, nodes[0])
+            distances.append(math.inf if node in reachable else None)
+        if None in distances:
+            self.last_routing_error = "no_path"
+        return distances
+
+    def get_store_walking_distances(self, candidates):
+        """
+        Same contract as get_site_walking_distances, but snapping and routing
+        run against the local walk-network store instead of a downloaded graph.
+        """
+        if not candidates:
+            return []
+
+        limit_meters = self.WALK_LIMIT_MILES / self.MILES_PER_METER
+        meters = self.walk_network.walking_distances(
+            self.latitude, self.longitude,
+            [stop['latitude'] for stop in candidates], [stop['longitude'] for stop in candidates],
+            limit_meters, engine=self.walk_engine)
+        if np.isnan(meters).any():
+            self.last_routing_error = "off_network_or_no_path"
+        return [None if np.isnan(m) else float(m) * self.MILES_PER_METER for m in meters]
+
+    def route_candidates(self, candidates):
+        """Network walking distance (miles) per candidate, None where routing failed."""
+        if self.walk_network is not None:
+            return self.get_store_walking_distances(candidates)
+        if self.walking_mode == "site_graph":
+            return self.get_site_walking_distances(candidates)
+        return [
+            self.get_network_walking_distance(self.latitude, self.longitude, stop['latitude'], stop['longitude'])
+            for stop in candidates
+        ]
+
+    def record_fallback(self, stop, reason=None):
+        """Count one haversine estimate; an explicit reason ("deadline") marks a stop that was never routed."""
+        if reason is None:
+            reason = self.last_routing_error or "unknown"
+            if self.walking_fallback == "raise":
+                raise RuntimeError(
+                    f"No walking route from ({self.latitude}, {self.longitude}) to stop at "
+                    f"({stop['latitude']}, {stop['longitude']}): {reason}")
+        self.fallback_count += 1
+        CommunityTransportationOptions.fallback_counts[reason] += 1
+
+    def get_transit_index(self):
+        if self.transit_index is None:
+            self.transit_index = cached_index(self.transit_df, "transit_stops", PointIndex.from_dataframe)
+        return self.transit_index
+
+    def candidate_stop_arrays(self):
+        """Row positions in transit_df and straight-line miles of every stop within SEARCH_RADIUS_MILES."""
+        return self.get_transit_index().query_radius(self.latitude, self.longitude, self.SEARCH_RADIUS_MILES)
+
+    @classmethod
+    def candidate_stops_many(cls, lats, lons, transit_index):
+        """Candidates for many sites at once: flat (site_idx, transit_df positions, straight-line miles)."""
+        return transit_index.query_radius_many(lats, lons, cls.SEARCH_RADIUS_MILES)
+
+    def candidate_records(self, positions, dists):
         candidates = []
-        for _, stop in self.transit_df.iterrows():
-            dist = self.haversine(self.latitude, self.longitude, stop['latitude'], stop['longitude'])
-            if dist <= 1.1:
-                stop_data = stop.to_dict()
-                stop_data['straight_line_dist'] = dist
-                candidates.append(stop_data)
+        for stop_data, dist in zip(self.transit_df.iloc[positions].to_dict("records"), dists.tolist()):
+            stop_data['straight_line_dist'] = dist
+            candidates.append(stop_data)
         return candidates
 
+    def filter_candidate_stops(self):
+        return self.candidate_records(*self.candidate_stop_arrays())
+
     def calculate_all_walking_distances(self, candidates):
-        results = []
-        for stop in candidates:
-            dist = self.get_network_walking_distance(
-                self.latitude, self.longitude, stop['latitude'], stop['longitude'])
+        network_distances = self.route_candidates(candidates)
 
+        results = []
+        for stop, dist in zip(candidates, network_distances):
             if dist is None:
                 # fallback to straight-line if walking distance fails
+                self.record_fallback(stop)
                 dist = self.haversine(self.latitude, self.longitude, stop['latitude'], stop['longitude'])
                 stop['used_fallback'] = True
             else:
@@ -131,9 +302,58 @@ class CommunityTransportationOptions(ScoringCriterion):
 
         return results
 
+    def calculate_walking_distances_within_budget(self, candidates):
+        """
+        calculate_all_walking_distances bounded by time_budget_s.
+
+        Stops are routed nearest-first by straight-line distance. Once a hub
+        is routed within the tightest hub tier (the maximum 5.0 points) the
+        remaining stops are skipped; once the deadline passes the remaining
+        stops are estimated with haversine and counted as "deadline" fallbacks. The deadline is checked between
+        routing calls, so one slow call can still overrun it.
+
+        Each stop gets a route_status ("routed", "estimated" or "skipped") and
+        self.routing_report lists the stops under each status.
+        """
+        deadline = time.monotonic() + self.time_budget_s
+        max_tier = min(self.POINTS_A)
+        ordered = sorted(candidates, key=lambda stop: stop['straight_line_dist'])
+        self.routing_report = {"routed": [], "estimated": [], "skipped": []}
+
+        # One graph / one Dijkstra covers every stop in these modes, so the only
+        # decision is whether there is time left to make that single call
+        batched = self.walk_network is not None or self.walking_mode == "site_graph"
+        remaining = list(ordered)
+        results = []
+        while remaining:
+            if time.monotonic() >= deadline:
+                for stop in remaining:
+                    self.record_fallback(stop, reason="deadline")
+                    stop['walking_distance_miles'] = stop['straight_line_dist']
+                    stop['used_fallback'] = True
+                    stop['route_status'] = "estimated"
+                    self.routing_report["estimated"].append(stop)
+                    results.append(stop)
+                break
+
+            batch, remaining = (remaining, []) if batched else (remaining[:1], remaining[1:])
+            routed = self.calculate_all_walking_distances(batch)
+            for stop in routed:
+                stop['route_status'] = "routed"
+                self.routing_report["routed"].append(stop)
+            results.extend(routed)
+
+            if any(stop['is_potential_hub'] and stop['walking_distance_miles'] <= max_tier for stop in routed):
+                for stop in remaining:
+                    stop['route_status'] = "skipped"
+                    self.routing_report["skipped"].append(stop)
+                break
+
+        return results
+
     def apply_qap_scoring(self, results):
-        POINTS_A = {0.25: 5.0, 0.5: 4.5, 1.0: 4.0}
-        POINTS_B = {0.25: 3.0, 0.5: 2.0, 1.0: 1.0}
+        POINTS_A = self.POINTS_A
+        POINTS_B = self.POINTS_B
 
         score_a, score_b = 0.0, 0.0
         if not results:
@@ -156,9 +376,64 @@ class CommunityTransportationOptions(ScoringCriterion):
 
         return max(score_a, score_b)
 
+    @classmethod
+    def score_distances(cls, stop_miles, hub_miles):
+        """
+        apply_qap_scoring over arrays of nearest-stop and nearest-hub walking
+        distances (miles); inf means nothing within reach.
+        """
+        stop_miles = np.asarray(stop_miles, dtype=np.float64)
+        hub_miles = np.asarray(hub_miles, dtype=np.float64)
+        score_a = np.zeros(hub_miles.shape)
+        score_b = np.zeros(stop_miles.shape)
+        # widest tier first so the tightest matching threshold wins
+        for thresh, pts in sorted(cls.POINTS_A.items(), reverse=True):
+            score_a[hub_miles <= thresh] = pts
+        for thresh, pts in sorted(cls.POINTS_B.items(), reverse=True):
+            score_b[stop_miles <= thresh] = pts
+        return np.maximum(score_a, score_b)
+
+    @classmethod
+    def score_with_field(cls, lats, lons, walk_network, transit_field):
+        """Score many points by snapping them to the network and reading the precomputed field."""
+        stop_meters, hub_meters = transit_field.lookup(walk_network, lats, lons)
+        return cls.score_distances(stop_meters * cls.MILES_PER_METER, hub_meters * cls.MILES_PER_METER)
+
+    @classmethod
+    def calculate_score_many(cls, lats, lons, **kwargs):
+        """
+        With a transit_field every site is scored in one array lookup. Without
+        one, candidate stops for the whole batch come from one radius query,
+        but walking routes are still computed site by site, so batching saves
+        only the filtering.
+        """
+        if len(lats) == 0:
+            return np.zeros(0)
+        criterion = cls.for_batch(lats, lons, kwargs)
+        if criterion.transit_field is not None:
+            return cls.score_with_field(lats, lons, criterion.walk_network, criterion.transit_field)
+
+        site_idx, positions, dists = cls.candidate_stops_many(lats, lons, criterion.get_transit_index())
+        bounds = np.searchsorted(site_idx, np.arange(len(lats) + 1))
+        site_kwargs = {key: value for key, value in kwargs.items() if key != "site_context"}
+        site_kwargs.update(transit_df=criterion.transit_df, transit_index=criterion.transit_index, walk_network=criterion.walk_network)
+        scores = np.zeros(len(lats))
+        for i, (lat, lon) in enumerate(zip(np.asarray(lats).tolist(), np.asarray(lons).tolist())):
+            site = cls(lat, lon, **site_kwargs)
+            scores[i] = site.score_candidates(site.candidate_records(positions[bounds[i]:bounds[i + 1]], dists[bounds[i]:bounds[i + 1]]))
+        return scores
+
     def calculate_score(self):
-        candidates = self.filter_candidate_stops()
-        results = self.calculate_all_walking_distances(candidates)
+        if self.transit_field is not None:
+            return float(self.score_with_field(
+                [self.latitude], [self.longitude], self.walk_network, self.transit_field)[0])
+        return self.score_candidates(self.filter_candidate_stops())
+
+    def score_candidates(self, candidates):
+        if self.time_budget_s is not None:
+            results = self.calculate_walking_distances_within_budget(candidates)
+        else:
+            results = self.calculate_all_walking_distances(candidates)
         return self.apply_qap_scoring(results)
 
 
@@ -168,20 +443,53 @@ class CommunityTransportationOptions(ScoringCriterion):
 class DesirableUndesirableActivities(ScoringCriterion):
     #MILES_PER_DEG = 69.0   
     #RAD_MI        = 5.0 
+    # QAP amenity: group mapping and scoring
+    AMENITY_GROUPS = {
+        "national_big_box_store": 1, "retail_store": 2,      "grocery_store": 1,
+        "restaurant": 2,            "hospital": 1,           "medical_clinic": 1,
+        "pharmacy": 1,              "technical_college": 2,  "school": 1,
+        "town_square": 1,           "community_center": 1,   "public_park": 1,
+        "library": 1,               "fire_police_station": 2,"bank": 2,
+        "place_of_worship": 2,      "post_office": 2
+    }
+    UNDESIRABLE_RADIUS_MILES = 0.25
+    UNDESIRABLE_POINTS = 2
+
     def __init__(self, latitude, longitude, **kwargs):
         super().__init__(latitude, longitude, **kwargs)
         self.rural_gdf_unary_union = kwargs.get("rural_gdf_unary_union")
+        self._is_rural = kwargs.get("is_rural")
+        self.rural_raster = kwargs.get("rural_raster")
+        self.wetlands_gdf = kwargs.get("wetlands_gdf")
+        self.wetlands_index = kwargs.get("wetlands_index")
         self.desirable_csv = kwargs.get("desirable_csv")
         self.grocery_csv = kwargs.get("grocery_csv")
         self.usda_csv = kwargs.get("usda_csv")
         self.tract_shapefile = kwargs.get("tract_shapefile")
         self.undesirable_csv = kwargs.get("undesirable_csv")
+        self.amenity_index = kwargs.get("amenity_index")
+        self.undesirable_index = kwargs.get("undesirable_index")
+        self.grocery_index = kwargs.get("grocery_index")
+        self.tract_index = kwargs.get("tract_index")  # PolygonIndex or PolygonRaster over tract_shapefile
+        self.food_desert_flags = kwargs.get("food_desert_flags")
+        self.tract_table = resolve_tract_table(kwargs.get("tract_table"))
         #print("Loading Done")
     
+    @staticmethod
+    def classify_locations_many(lats, lons, rural_union_geom, rural_raster=None):
+        """Rural flag for arrays of points; inside any part of the union is the same test as Point.within."""
+        if rural_raster is None:
+            rural_raster = cached_index(rural_union_geom, "rural_parts", PolygonIndex.from_geometry)
+        return rural_raster.locate_many(lats, lons) >= 0
+
     def classify_location(self, latitude, longitude):
-        rural_union_geom = self.rural_gdf_unary_union
-        point = Point(longitude, latitude)
-        return point.within(rural_union_geom)
+        return bool(self.classify_locations_many([latitude], [longitude], self.rural_gdf_unary_union, self.rural_raster)[0])
+
+    @property
+    def is_rural(self):
+        if self._is_rural is None:
+            self._is_rural = self.context.get("is_rural", lambda: self.classify_location(self.latitude, self.longitude))
+        return self._is_rural
 
     def haversine(self, lat1, lon1, lat2, lon2):
         R = 3958.8
@@ -192,7 +500,7 @@ class DesirableUndesirableActivities(ScoringCriterion):
         return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
     def compute_score(self, distance, group):
-        is_rural = self.classify_location(self.latitude, self.longitude)
+        is_rural = self.is_rural
 
         if group == 1:
             if distance <= 0.55: return 2.5
@@ -206,90 +514,118 @@ class DesirableUndesirableActivities(ScoringCriterion):
             elif is_rural and distance <= 2.5: return 1.0
         return 0
 
-    def compute_desirable_score(self):
+    def get_amenity_index(self):
+        if self.amenity_index is None:
+            self.amenity_index = cached_index(self.desirable_csv, "amenities", AmenityIndex.from_dataframe)
+        return self.amenity_index
+
+    @classmethod
+    def score_amenity_distances(cls, distances, is_rural):
         """
-        Optimised version: 5-mile bounding box, vectorised Manhattan
-        distance, single groupby-min, then QAP scoring.
+        compute_score applied to a (n_sites, len(AMENITY_GROUPS)) matrix of
+        nearest-amenity distances; inf (nothing within 5 mi) scores 0.
         """
-        df = self.desirable_csv.copy()
-        df["lat"] = df["lat"].astype(float)
-        df["lon"] = df["lon"].astype(float)
-
-        lat, lon = self.latitude, self.longitude
-
-        # Bounding-box pre-filter
-        lat_tol = 5.0 / 69.0
-        lon_tol = 5.0 / (69.0 * math.cos(math.radians(lat)))
+        distances = np.asarray(distances, dtype=np.float64)
+        group = np.array(list(cls.AMENITY_GROUPS.values()))
+        rural = np.asarray(is_rural, dtype=bool).reshape(-1, 1)
+        in_group1 = group == 1
+
+        points = np.select(
+            [distances <= 0.55, distances <= 1.05, ~rural & (distances <= 1.5), rural & (distances <= 2.5)],
+            [np.where(in_group1, 2.5, 2.0), np.where(in_group1, 2.0, 1.5),
+             np.where(in_group1, 1.5, 1.0), np.where(in_group1, 2.5, 1.0)],
+            default=0.0)
+        return points.sum(axis=1)
+
+    @classmethod
+    def desirable_scores_many(cls, lats, lons, amenity_index, is_rural):
+        """Desirable-activity points for arrays of sites against one AmenityIndex."""
+        distances = amenity_index.nearest_distances(lats, lons, list(cls.AMENITY_GROUPS))
+        return cls.score_amenity_distances(distances, is_rural)
 
-        df = df[
-            (df["lat"].between(lat - lat_tol, lat + lat_tol)) &
-            (df["lon"].between(lon - lon_tol, lon + lon_tol))
-        ].copy()
-
-        if df.empty:
-            return 0.0
-
-        # Vectorised Manhattan distance for remaining rows 
-        lat_arr = df["lat"].values
-        lon_arr = df["lon"].values
-
-        lat_diff = np.abs(lat_arr - lat) * 69.0
-        lon_diff = np.abs(lon_arr - lon) * 69.0 * np.cos(
-            np.radians((lat_arr + lat) / 2)
-        )
-        df["distance"] = lat_diff + lon_diff
-
-        # Keep only amenities truly ≤ 5 mi
-        df = df[df["distance"] <= 5.0]
-        if df.empty:
-            return 0.0
-
-        # One pass: closest distance per amenity_key 
-        closest = (
-            df.groupby(df["amenity_key"].str.lower())["distance"]
-            .min()                    
-            .to_dict()
-        )
-
-        # QAP amenity: group mapping and scoring
-        amenity_groups = {
-            "national_big_box_store": 1, "retail_store": 2,      "grocery_store": 1,
-            "restaurant": 2,            "hospital": 1,           "medical_clinic": 1,
-            "pharmacy": 1,              "technical_college": 2,  "school": 1,
-            "town_square": 1,           "community_center": 1,   "public_park": 1,
-            "library": 1,               "fire_police_station": 2,"bank": 2,
-            "place_of_worship": 2,      "post_office": 2
-        }
+    def compute_desirable_score(self):
+        """
+        Nearest amenity of each type from the shared per-type index (5-mile
+        bounding box, Manhattan distance, 5-mile cap), then QAP scoring.
+        """
+        closest = self.get_amenity_index().nearest_distances(
+            [self.latitude], [self.longitude], list(self.AMENITY_GROUPS))[0]
 
         total_score = 0.0
-        for amenity, group in amenity_groups.items():
-            dist = closest.get(amenity)         
-            if dist is None:
+        for dist, group in zip(closest.tolist(), self.AMENITY_GROUPS.values()):
+            if math.isinf(dist):
                 continue
-            total_score += self.compute_score(dist, group)  
+            total_score += self.compute_score(dist, group)
 
         return total_score
 
+    @staticmethod
+    def build_grocery_index(grocery_csv):
+        df_grocery = grocery_csv[grocery_csv['amenity_key'].str.lower() == 'grocery_store']
+        return PointIndex.from_dataframe(df_grocery, lat_col="lat", lon_col="lon")
+
+    @staticmethod
+    def build_tract_index(tract_shapefile):
+        return PolygonIndex.from_geodataframe(tract_shapefile)
+
+    @staticmethod
+    def build_food_desert_flags(usda_csv):
+        """CensusTract -> LILATracts_1And10, first row winning like the old table scan."""
+        usda_df = usda_csv.assign(CensusTract=usda_csv['CensusTract'].str.strip()).dropna(subset=['CensusTract'])
+        usda_df = usda_df.drop_duplicates(subset='CensusTract', keep='first')
+        return dict(zip(usda_df['CensusTract'], usda_df['LILATracts_1And10']))
+
+    def get_grocery_index(self):
+        if self.grocery_index is None:
+            self.grocery_index = cached_index(self.grocery_csv, "grocery_stores", self.build_grocery_index)
+        return self.grocery_index
+
+    def get_tract_index(self):
+        if self.tract_index is None:
+            self.tract_index = cached_index(self.tract_shapefile, "tracts", self.build_tract_index)
+        return self.tract_index
+
+    def get_food_desert_flags(self):
+        if self.food_desert_flags is None and self.tract_table is not None:
+            self.food_desert_flags = self.tract_table.food_desert_flags
+        if self.food_desert_flags is None:
+            self.food_desert_flags = cached_index(self.usda_csv, "food_desert_flags", self.build_food_desert_flags)
+        return self.food_desert_flags
+
+    @staticmethod
+    def tract_geoid_array(tract_index):
+        def build(tract_index):
+            tracts = tract_index.gdf
+            tract_field = 'GEOID' if 'GEOID' in tracts.columns else 'CensusTract'
+            return tracts[tract_field].astype(str).str.strip().to_numpy()
+        return cached_index(tract_index, "tract_geoids", build)
+
+    @classmethod
+    def tract_geoids_many(cls, lats, lons, tract_index):
+        """Containing tract id for each point (None outside every tract)."""
+        geoids = cls.tract_geoid_array(tract_index)
+        return [geoids[pos] if pos >= 0 else None for pos in tract_index.locate_many(lats, lons).tolist()]
+
+    @classmethod
+    def food_desert_deductions_many(cls, lats, lons, grocery_index, tract_index, food_desert_flags):
+        """compute_food_desert_deduction for arrays of sites."""
+        _, grocery_miles = grocery_index.nearest_many(lats, lons)
+        tract_ids = cls.tract_geoids_many(lats, lons, tract_index)
+        in_food_desert = np.array([food_desert_flags.get(tract_id) in [1, True, '1'] for tract_id in tract_ids], dtype=bool)
+        return np.where(in_food_desert & ~(grocery_miles <= 0.25), 2, 0)
+
     def check_grocery_eligibility(self):
-        df = self.grocery_csv
-        df_grocery = df[df['amenity_key'].str.lower() == 'grocery_store'].copy()
-        if df_grocery.empty: return False, None
-        df_grocery['distance'] = df_grocery.apply(
-            lambda row: self.haversine(self.latitude, self.longitude, row['lat'], row['lon']), axis=1)
-        return df_grocery['distance'].min() <= 0.25, df_grocery['distance'].min()
+        position, dist = self.get_grocery_index().nearest(self.latitude, self.longitude)
+        if position < 0: return False, None
+        return dist <= 0.25, dist
 
     def check_food_desert_status(self):
-        tracts = self.tract_shapefile
-        tract_field = 'GEOID' if 'GEOID' in tracts.columns else 'CensusTract'
-        site_point = Point(self.longitude, self.latitude)
-        site_gdf = gpd.GeoDataFrame({'geometry': [site_point]}, crs='EPSG:4326').to_crs(tracts.crs)
-        join_result = gpd.sjoin(site_gdf, tracts, how='left', predicate='within')
-        if join_result.empty: return False, None, None
-        tract_id = str(join_result.iloc[0][tract_field]).strip()
-        usda_df = self.usda_csv
-        usda_row = usda_df[usda_df['CensusTract'].str.strip() == tract_id]
-        if usda_row.empty: return False, tract_id, None
-        flag = usda_row.iloc[0]['LILATracts_1And10']
+        tract_index = self.get_tract_index()
+        position = self.context.locate(tract_index)
+        if position < 0: return False, None, None
+        tract_id = self.tract_geoid_array(tract_index)[position]
+        flag = self.get_food_desert_flags().get(tract_id)
+        if flag is None: return False, tract_id, None
         return flag in [1, True, '1'], tract_id, flag
 
     def compute_food_desert_deduction(self):
@@ -297,11 +633,61 @@ class DesirableUndesirableActivities(ScoringCriterion):
         in_fd, tract_id, flag = self.check_food_desert_status()
         return 2 if in_fd and not qualifies else 0
 
+    @staticmethod
+    def build_undesirable_index(undesirable_csv):
+        return PointIndex.from_dataframe(undesirable_csv, lat_col="site_latitude", lon_col="site_longitude")
+
+    def get_undesirable_index(self):
+        if self.undesirable_index is None:
+            self.undesirable_index = cached_index(self.undesirable_csv, "undesirable_sites", self.build_undesirable_index)
+        return self.undesirable_index
+
+    @classmethod
+    def undesirable_counts_many(cls, lats, lons, undesirable_index):
+        """Undesirable sites within UNDESIRABLE_RADIUS_MILES of each point."""
+        site_idx, _, _ = undesirable_index.query_radius_many(lats, lons, cls.UNDESIRABLE_RADIUS_MILES)
+        return np.bincount(site_idx, minlength=len(np.atleast_1d(lats)))
+
     def get_undesirable_deduction(self):
-        df = self.undesirable_csv
-        df['distance'] = df.apply(
-            lambda row: self.haversine(self.latitude, self.longitude, row['site_latitude'], row['site_longitude']), axis=1)
-        return len(df[df['distance'] <= 0.25]) * 2
+        positions, _ = self.get_undesirable_index().query_radius(self.latitude, self.longitude, self.UNDESIRABLE_RADIUS_MILES)
+        return len(positions) * self.UNDESIRABLE_POINTS
+
+    def get_wetlands_index(self):
+        # None loads the cleaned default layer (or wetlands_gdf); False turns the deduction off
+        if self.wetlands_index is False:
+            return None
+        if self.wetlands_index is None and self.wetlands_gdf is not None:
+            self.wetlands_index = cached_index(self.wetlands_gdf, "wetlands", WetlandsIndex)
+        elif self.wetlands_index is None or isinstance(self.wetlands_index, str):
+            self.wetlands_index = load_wetlands_index(self.wetlands_index or DEFAULT_WETLANDS_PATH)
+        return self.wetlands_index
+
+    def compute_wetland_deduction(self):
+        wetlands_index = self.get_wetlands_index()
+        if wetlands_index is None:
+            return 0
+        return int(wetlands_index.deductions_many([self.latitude], [self.longitude])[0])
+
+    @classmethod
+    def calculate_score_many(cls, lats, lons, **kwargs):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if len(lats) == 0:
+            return np.zeros(0)
+        criterion = cls.for_batch(lats, lons, kwargs)
+        if criterion._is_rural is not None:
+            is_rural = np.full(len(lats), bool(criterion._is_rural))
+        else:
+            is_rural = cls.classify_locations_many(lats, lons, criterion.rural_gdf_unary_union, criterion.rural_raster)
+
+        desirable = cls.desirable_scores_many(lats, lons, criterion.get_amenity_index(), is_rural)
+        food_deduction = cls.food_desert_deductions_many(lats, lons, criterion.get_grocery_index(),
+                                                         criterion.get_tract_index(), criterion.get_food_desert_flags())
+        undesirable_deduction = cls.undesirable_counts_many(lats, lons, criterion.get_undesirable_index()) * cls.UNDESIRABLE_POINTS
+        wetlands_index = criterion.get_wetlands_index()
+        wetland_deduction = 0 if wetlands_index is None else wetlands_index.deductions_many(lats, lons)
+        final = np.maximum(0, desirable - (food_deduction + undesirable_deduction + wetland_deduction))
+        return np.minimum(final, 20)
 
     def calculate_score(self):
         desirable = self.compute_desirable_score()
@@ -310,79 +696,102 @@ class DesirableUndesirableActivities(ScoringCriterion):
         #print("food done")
         undesirable_deduction = self.get_undesirable_deduction()
         #print("undesirable done")
-        final = max(0, desirable - (food_deduction + undesirable_deduction))
+        wetland_deduction = self.compute_wetland_deduction()
+        final = max(0, desirable - (food_deduction + undesirable_deduction + wetland_deduction))
         return min(final, 20)
 
 #####################################################################################################################################
 
 # --- Quality Education ---
 class QualityEducation(ScoringCriterion):
+    missing_layer_warnings = set()
+
     def __init__(self, latitude, longitude, **kwargs):
         super().__init__(latitude, longitude, **kwargs)
         self.school_df = kwargs.get("school_df")
         self.state_avg_by_year = kwargs.get("state_avg_by_year")
         self.school_boundary_gdfs = kwargs.get("school_boundary_gdfs", [])
-        self.point = Point(self.longitude, self.latitude)
+        self.school_zone_indexes = kwargs.get("school_zone_indexes")  # PolygonIndex / PolygonRaster per layer
+        # "auto": precomputed layer where it covers the site, school matching elsewhere
+        # "layer": precomputed layer only (missing file raises); "schools": school matching only
+        self.education_mode = kwargs.get("education_mode", "auto")
+        self.education_layer = kwargs.get("education_layer")  # GeoDataFrame or path; default EDUCATION_SCORE_PATH
+        self.education_index = kwargs.get("education_index")
+        self.school_name_resolver = kwargs.get("school_name_resolver")
+        self.school_name_table = kwargs.get("school_name_table")  # path to keep up to date; None only reads the default table
+        self.education_partition = kwargs.get("education_partition")  # GeoDataFrame, path, or False to skip
+        self.partition_index = kwargs.get("partition_index")
+        self.point = self.context.point
+
+    @staticmethod
+    def build_school_zone_index(gdf):
+        return PolygonIndex(school_zone_layer(gdf))
+
+    def get_school_zone_indexes(self):
+        if self.school_zone_indexes is None:
+            self.school_zone_indexes = [
+                None if gdf is None else cached_index(gdf, "school_zones", self.build_school_zone_index)
+                for gdf in self.school_boundary_gdfs
+            ]
+        return self.school_zone_indexes
 
     def get_school_names(self):
-        elementary = []
-        middle = []
-        high = []
+        names = {school_type: [] for school_type in GRADE_CLUSTERS}
 
-        for i, gdf in enumerate(self.school_boundary_gdfs):
-            if gdf is None or self.point is None:
+        for i, zone_index in enumerate(self.get_school_zone_indexes()):
+            if zone_index is None or self.point is None or i >= len(ZONE_NAME_COLUMNS):
                 continue
-            if gdf.crs != "EPSG:4326":
-                gdf = gdf.to_crs("EPSG:4326")
-            matched = gdf[gdf.contains(self.point)]
+            matched = zone_index.gdf.iloc[self.context.polygon_rows(zone_index)]
             if matched.empty:
                 continue
 
-            if i == 0:
-                elementary.extend(matched["ELEMENTARY"].dropna().tolist())
-                middle.extend(matched["MIDDLE"].dropna().tolist())
-                high.extend(matched["HIGH"].dropna().tolist())
-            elif i == 1:
-                elementary.extend(matched["Elementary"].dropna().tolist())
-                middle.extend(matched["Middle"].dropna().tolist())
-                high.extend(matched["High"].dropna().tolist())
-            elif i == 2:
-                elementary.extend(matched["DDP_ES_Nam"].dropna().tolist())
-            elif i == 3:
-                middle.extend(matched["DDP_MS_Name"].dropna().tolist())
-            elif i == 4:
-                high.extend(matched["DDP_HS_Nam"].dropna().tolist())
-
-        return elementary, middle, high
+            for school_type, column in ZONE_NAME_COLUMNS[i].items():
+                names[school_type].extend(matched[column].dropna().tolist())
+
+        return names["elementary"], names["middle"], names["high"]
+
+    def school_names_many(self, lats, lons):
+        """get_school_names for arrays of sites: one (elementary, middle, high) tuple per site."""
+        names = [{school_type: [] for school_type in GRADE_CLUSTERS} for _ in range(len(lats))]
+
+        for i, zone_index in enumerate(self.get_school_zone_indexes()):
+            if zone_index is None or i >= len(ZONE_NAME_COLUMNS):
+                continue
+            point_idx, rows = zone_index.query_many(lats, lons)
+            for school_type, column in ZONE_NAME_COLUMNS[i].items():
+                for site, name in zip(point_idx.tolist(), zone_index.gdf[column].to_numpy()[rows].tolist()):
+                    if not pd.isna(name):
+                        names[site][school_type].append(name)
+
+        return [(site["elementary"], site["middle"], site["high"]) for site in names]
 
     def preprocess_school_name(self, name):
-        name = re.sub(r'[^\w\s]', '', str(name).lower())
-        suffixes = ["elementary", "middle", "high", "school", "academy", "jr", "sr", "dr", "es", "ms", "hs"]
-        tokens = [token for token in name.split() if token not in suffixes]
-        cleaned = " ".join(tokens).strip()
-        return cleaned
+        return preprocess_school_name(name)
+
+    def get_school_resolver(self):
+        if self.school_name_resolver is None:
+            self.school_name_resolver = cached_index(
+                (self.school_df, *self.school_boundary_gdfs), "school_names",
+                lambda _: load_school_resolver(self.school_df, self.school_boundary_gdfs, self.school_name_table))
+        return self.school_name_resolver
 
     def find_best_match(self, school_names, school_type):
         if not school_names:
             return None
 
-        grade_cluster = {"elementary": "E", "middle": "M", "high": "H"}.get(school_type.lower())
-        filtered_df = self.school_df[self.school_df["Grade Cluster"] == grade_cluster]
-        if filtered_df.empty:
+        grade_cluster = GRADE_CLUSTERS.get(school_type.lower())
+        resolver = self.get_school_resolver()
+        if not resolver.has_cluster(grade_cluster):
             return None
 
         best_score = 0
         best_match_row = None
 
         for name in school_names:
-            cleaned_input = self.preprocess_school_name(name)
-            cleaned_map = filtered_df["School Name"].apply(self.preprocess_school_name)
-            cleaned_names = cleaned_map.tolist()
-            match, score = process.extractOne(cleaned_input, cleaned_names, scorer=fuzz.token_set_ratio)
+            match_index, score = resolver.resolve(name, grade_cluster)
             if score > best_score and score > 80:
                 best_score = score
-                match_index = cleaned_map[cleaned_map == match].index[0]
-                best_match_row = filtered_df.loc[match_index]
+                best_match_row = self.school_df.loc[match_index]
 
         return best_match_row
 
@@ -417,47 +826,139 @@ class QualityEducation(ScoringCriterion):
             'H': list(range(9, 13)),
         }.get(str(cluster).strip().upper(), [])
 
+    def get_education_index(self):
+        """
+        PolygonIndex over the precomputed education score layer, or None when
+        the layer is unavailable in "auto" mode (a missing file is reported once).
+        """
+        if self.education_index is None:
+            layer = self.education_layer
+            if layer is None or isinstance(layer, str):
+                try:
+                    layer = load_education_score_layer(layer or EDUCATION_SCORE_PATH)
+                except FileNotFoundError as e:
+                    if self.education_mode == "layer":
+                        raise
+                    if str(e) not in QualityEducation.missing_layer_warnings:
+                        QualityEducation.missing_layer_warnings.add(str(e))
+                        print(f"Warning: {e}; scoring education from school matching")
+                    return None
+            self.education_index = cached_index(layer, "education_scores", self.build_school_zone_index)
+        return self.education_index
+
+    def calculate_layer_score(self):
+        """Score from the precomputed layer; None when the site is outside it."""
+        education_index = self.get_education_index()
+        if education_index is None:
+            return None
+        position = self.context.locate(education_index)
+        if position < 0:
+            return None
+        return float(education_index.gdf.iloc[position]["score"])
+
     def calculate_score(self):
-        try:
-            metro_gdf = gpd.read_file("data/maps/quality_education_areas/education_score_metro_atl.geojson")
-            metro_gdf = metro_gdf.to_crs("EPSG:4326")
-            point = Point(self.longitude, self.latitude)
-            matched = metro_gdf[metro_gdf.contains(point)]
-            if not matched.empty:
-                return float(matched.iloc[0]["score"])
-        except Exception as e:
-            elementary, middle, high = self.get_school_names()
-
-            best_elementary = self.find_best_match(elementary, "elementary")
-            best_middle = self.find_best_match(middle, "middle")
-            best_high = self.find_best_match(high, "high")
-
-            total_qualified_grades = set()
-            tenancy_type = "family"
-
-            for school in [best_elementary, best_middle, best_high]:
-                if school is None or not isinstance(school, pd.Series):
-                    continue
-                if (self.qualifies_by_A(school) or
-                    self.qualifies_by_B(school) or
-                    self.qualifies_by_C(school)):
-                    grades = self.grade_cluster_to_grades(school.get("Grade Cluster", ""))
-                    total_qualified_grades.update(grades)
-
-            grade_count = len(total_qualified_grades)
-            if grade_count == 0:
+        if self.education_mode not in ("auto", "layer", "schools"):
+            raise ValueError(f"education_mode must be 'auto', 'layer' or 'schools', got {self.education_mode!r}")
+        if self.education_mode != "schools":
+            layer_score = self.calculate_layer_score()
+            if layer_score is not None:
+                return layer_score
+            if self.education_mode == "layer":
                 return 0
-            elif grade_count == 3:
-                return 1
-            elif grade_count == 7:
-                return 1.5
-            elif grade_count == 13:
-                return 3 if tenancy_type.lower() == "family" else 2
-            elif 3 < grade_count < 7:
-                return 1
-            elif 7 < grade_count < 13:
-                return 1.5
+        return self.calculate_school_score()
+
+    @classmethod
+    def calculate_score_many(cls, lats, lons, **kwargs):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if len(lats) == 0:
+            return np.zeros(0)
+        criterion = cls.for_batch(lats, lons, kwargs)
+        if criterion.education_mode not in ("auto", "layer", "schools"):
+            raise ValueError(f"education_mode must be 'auto', 'layer' or 'schools', got {criterion.education_mode!r}")
+        scores = np.zeros(len(lats))
+        todo = np.arange(len(lats))
+
+        lookups = []
+        if criterion.education_mode != "schools":
+            lookups.append(criterion.get_education_index())
+        if criterion.education_mode != "layer":
+            lookups.append(criterion.get_partition_index())
+        for polygon_index in lookups:
+            if polygon_index is None or len(todo) == 0:
+                continue
+            positions = polygon_index.locate_many(lats[todo], lons[todo])
+            inside = positions >= 0
+            scores[todo[inside]] = polygon_index.gdf["score"].to_numpy(dtype=np.float64)[positions[inside]]
+            todo = todo[~inside]
+
+        if criterion.education_mode == "layer":
+            return scores
+        for i, school_names in zip(todo.tolist(), criterion.school_names_many(lats[todo], lons[todo])):
+            scores[i] = criterion.score_school_names(*school_names)
+        return scores
+
+    def get_partition_index(self):
+        """
+        PolygonIndex over the scored zone partition (education_partition.py),
+        or None when it is disabled, missing or stale.
+        """
+        if self.partition_index is None:
+            partition = self.education_partition
+            if partition is False:
+                return None
+            if partition is None or isinstance(partition, str):
+                # keyed on every input of the hash; the state averages are a plain dict, so by value
+                input_hash = cached_index((self.school_df, *self.school_boundary_gdfs),
+                                          ("education_partition_hash", json.dumps(self.state_avg_by_year, sort_keys=True, default=str)),
+                                          lambda _: partition_hash(self.school_df, self.school_boundary_gdfs, self.state_avg_by_year))
+                partition = load_education_partition(partition or DEFAULT_PARTITION_PATH, input_hash)
+                if partition is None:
+                    self.education_partition = False
+                    return None
+            self.partition_index = cached_index(partition, "education_partition", PolygonIndex)
+        return self.partition_index
+
+    def calculate_school_score(self):
+        partition_index = self.get_partition_index()
+        if partition_index is not None:
+            position = self.context.locate(partition_index)
+            if position >= 0:
+                return float(partition_index.gdf.iloc[position]["score"])
+        # on a zone edge, outside every face, or no partition: ask the layers directly
+        return self.score_school_names(*self.get_school_names())
+
+    def score_school_names(self, elementary, middle, high):
+        best_elementary = self.find_best_match(elementary, "elementary")
+        best_middle = self.find_best_match(middle, "middle")
+        best_high = self.find_best_match(high, "high")
+
+        total_qualified_grades = set()
+        tenancy_type = "family"
+
+        for school in [best_elementary, best_middle, best_high]:
+            if school is None or not isinstance(school, pd.Series):
+                continue
+            if (self.qualifies_by_A(school) or
+                self.qualifies_by_B(school) or
+                self.qualifies_by_C(school)):
+                grades = self.grade_cluster_to_grades(school.get("Grade Cluster", ""))
+                total_qualified_grades.update(grades)
+
+        grade_count = len(total_qualified_grades)
+        if grade_count == 0:
             return 0
+        elif grade_count == 3:
+            return 1
+        elif grade_count == 7:
+            return 1.5
+        elif grade_count == 13:
+            return 3 if tenancy_type.lower() == "family" else 2
+        elif 3 < grade_count < 7:
+            return 1
+        elif 7 < grade_count < 13:
+            return 1.5
+        return 0
 
 ####################################################################################################################################
 
@@ -467,91 +968,123 @@ class StableCommunities(ScoringCriterion):
         super().__init__(latitude, longitude, **kwargs)
         self.indicators_df = kwargs.get("indicators_df")
         self.tracts_shp = kwargs.get("tracts_shp")
-        self.tract_dict = self.find_census_tracts()
+        self.tract_index = kwargs.get("stable_tract_index")
+        self.nearby_index = kwargs.get("stable_nearby_index")
+        self.indicator_masks = kwargs.get("indicator_masks")
+        self.tract_table = resolve_tract_table(kwargs.get("tract_table"))
+        self.stable_surface = kwargs.get("stable_surface")  # StableSurface, path, or False to skip
+        self._tract_dict = kwargs.get("tract_dict")
+
+    @property
+    def tract_dict(self):
+        if self._tract_dict is None:
+            self._tract_dict = self.find_census_tracts()
+        return self._tract_dict
+
+    NEARBY_METERS = 402
+    # These are the columns that reflect whether an indicator is above the pool-specific 50th percentile
+    INDICATORS = [
+        "above_median_Environmental Health Index",
+        "above_median_Transit Access Index",
+        "above_median_Percent of Population Above the Poverty Level",
+        "above_median_Median Income",
+        "above_median_Jobs Proximity Index"
+    ]
+
+    def get_tract_indexes(self):
+        if self.tract_index is None:
+            self.tract_index = cached_index(self.tracts_shp, "tracts", PolygonIndex.from_geodataframe)
+        if self.nearby_index is None:
+            self.nearby_index = cached_index(self.tracts_shp, "tracts_3857", BufferQueryIndex.from_geodataframe)
+        return self.tract_index, self.nearby_index
+
+    @staticmethod
+    def tract_dicts_from_rows(tract_index, actual, point_idx, rows):
+        """Tract dicts from containing-tract positions and (point, nearby row) pairs."""
+        geoids = tract_index.gdf["GEOID"].to_numpy()
+        labels = tract_index.gdf.index.to_numpy()
+        tract_dicts = [{} if pos < 0 else {"actual": geoids[pos]} for pos in actual]
+        for i, row in zip(point_idx, rows):
+            if geoids[row] != tract_dicts[i].get("actual"):
+                tract_dicts[i][f"tract{labels[row]}"] = geoids[row]
+        return tract_dicts
+
+    @classmethod
+    def find_census_tracts_many(cls, lats, lons, tract_index, nearby_index):
+        """find_census_tracts for arrays of points: one tract dict per point."""
+        actual = tract_index.locate_many(lats, lons)
+        point_idx, rows = nearby_index.query_many(lats, lons, cls.NEARBY_METERS)
+        return cls.tract_dicts_from_rows(tract_index, actual.tolist(), point_idx.tolist(), rows.tolist())
 
     def find_census_tracts(self):
-        point = Point(self.longitude, self.latitude)
-        actual_tract = self.tracts_shp[self.tracts_shp.contains(point)]
+        tract_index, nearby_index = self.get_tract_indexes()
+        rows = self.context.nearby_rows(nearby_index, self.NEARBY_METERS).tolist()
+        return self.tract_dicts_from_rows(tract_index, [self.context.locate(tract_index)], [0] * len(rows), rows)[0]
 
-        gdf_meters = self.tracts_shp.to_crs(epsg=3857)
-        point_meters = gpd.GeoSeries([point], crs=4326).to_crs(epsg=3857).iloc[0]
-        point_buffer = point_meters.buffer(402)
-        nearby_tracts = gdf_meters[gdf_meters.intersects(point_buffer)]
-
-        tract_dict = {}
-        if not actual_tract.empty:
-            tract_dict["actual"] = actual_tract.iloc[0]["GEOID"]
-
-        for idx, row in nearby_tracts.iterrows():
-            if row["GEOID"] != tract_dict.get("actual"):
-                tract_dict[f"tract{idx}"] = row["GEOID"]
+    @classmethod
+    def build_indicator_masks(cls, indicators_df):
+        """
+        One 5-bit mask per tract (bit i set when INDICATORS[i] is above the
+        pool median), keyed by GEOID string; the first row wins for repeats.
+        """
+        flags = indicators_df[cls.INDICATORS].to_numpy(dtype=np.float64) > 0
+        masks = (flags.astype(np.uint8) << np.arange(len(cls.INDICATORS), dtype=np.uint8)).sum(axis=1).astype(np.uint8)
+        masks = pd.Series(masks, index=indicators_df["2020 Census Tract"].astype(str).to_numpy())
+        return masks[~masks.index.duplicated(keep="first")]
+
+    def get_indicator_masks(self):
+        if self.indicator_masks is None and self.tract_table is not None:
+            self.indicator_masks = self.tract_table.indicator_masks
+        if self.indicator_masks is None:
+            self.indicator_masks = cached_index(self.indicators_df, "indicator_masks", self.build_indicator_masks)
+        return self.indicator_masks
+
+    @staticmethod
+    def tract_masks_many(tract_dicts, indicator_masks):
+        """(actual, nearby) masks per tract dict; tracts missing from the table count as no flags."""
+        actual_masks = np.zeros(len(tract_dicts), dtype=np.uint8)
+        nearby_masks = np.zeros(len(tract_dicts), dtype=np.uint8)
+        for i, tract_dict in enumerate(tract_dicts):
+            for key, tract in tract_dict.items():
+                mask = indicator_masks.get(tract, 0)
+                if key == "actual":
+                    actual_masks[i] = mask
+                else:
+                    nearby_masks[i] |= mask
+        return actual_masks, nearby_masks
+
+    @staticmethod
+    def score_masks(actual_masks, nearby_masks):
+        """Counts and both sub-scores, vectorised over arrays of masks."""
+        actual_count = np.bitwise_count(actual_masks).astype(np.int64)
+        nearby_count = np.bitwise_count(nearby_masks).astype(np.int64)
+        combined_count = np.bitwise_count(actual_masks | nearby_masks).astype(np.int64)
 
-        return tract_dict
+        # Actual-only scoring (must come 100% from actual tract)
+        actual_only_score = np.select([actual_count >= 4, actual_count == 3, actual_count == 2], [10, 8, 6], default=0)
+        # Nearby scoring (uses combined indicators, only when a nearby tract contributes)
+        nearby_score = np.select([combined_count >= 4, combined_count == 3, combined_count == 2], [9, 7, 5], default=0)
+        nearby_score = np.where(nearby_count > 0, nearby_score, 0)
+        return actual_count, nearby_count, combined_count, actual_only_score, nearby_score
+
+    @classmethod
+    def scores_many(cls, lats, lons, tract_index, nearby_index, indicator_masks):
+        """calculate_score for arrays of points."""
+        tract_dicts = cls.find_census_tracts_many(lats, lons, tract_index, nearby_index)
+        *_, actual_only_score, nearby_score = cls.score_masks(*cls.tract_masks_many(tract_dicts, indicator_masks))
+        return np.maximum(actual_only_score, nearby_score)
 
     def calculate_indicators_score(self):
         """
         Calculate scores based on indicators being above median values.
         Computes both actual tract score and nearby tract score.
         """
-        # These are the columns that reflect whether an indicator is above the pool-specific 50th percentile
-        indicators = [
-            "above_median_Environmental Health Index",
-            "above_median_Transit Access Index",
-            "above_median_Percent of Population Above the Poverty Level",
-            "above_median_Median Income",
-            "above_median_Jobs Proximity Index"
-        ]
-
-        self.indicators_df["2020 Census Tract"] = self.indicators_df["2020 Census Tract"].astype(str)
-        actual_tract = self.tract_dict.get("actual")
-
-        # Actual tract flags
-        actual_flags = pd.Series([0] * len(indicators), index=indicators)
-        if actual_tract and actual_tract in self.indicators_df["2020 Census Tract"].values:
-            actual_row = self.indicators_df[self.indicators_df["2020 Census Tract"] == actual_tract]
-            actual_flags = actual_row[indicators].iloc[0]
-        actual_count = int(actual_flags.sum())
-
-        # Nearby tract flags (only nearby, excluding actual)
-        nearby_flags = pd.Series([0] * len(indicators), index=indicators)
-        for key, tract in self.tract_dict.items():
-            if key == "actual":
-                continue
-            if tract in self.indicators_df["2020 Census Tract"].values:
-                row = self.indicators_df[self.indicators_df["2020 Census Tract"] == tract]
-                flags = row[indicators].iloc[0]
-                nearby_flags = nearby_flags.combine(flags, func=max)
-        nearby_count = int(nearby_flags.sum())
-
-        # Combined flags (actual + all nearby) 
-        combined_flags = actual_flags.combine(nearby_flags, func=max)
-        combined_count = int(combined_flags.sum())
-
-        # Actual-only scoring (must come 100% from actual tract)
-        if actual_count >= 4:
-            actual_only_score = 10
-        elif actual_count == 3:
-            actual_only_score = 8
-        elif actual_count == 2:
-            actual_only_score = 6
-        else:
-            actual_only_score = 0
-
-        # Nearby scoring (uses combined indicators) 
-        if nearby_count > 0:
-            if combined_count >= 4:
-                nearby_score = 9
-            elif combined_count == 3:
-                nearby_score = 7
-            elif combined_count == 2:
-                nearby_score = 5
-            else:
-                nearby_score = 0
-        else:
-            nearby_score = 0 
+        actual_masks, nearby_masks = self.tract_masks_many([self.tract_dict], self.get_indicator_masks())
+        counts = self.score_masks(actual_masks, nearby_masks)
+        actual_count, nearby_count, combined_count, actual_only_score, nearby_score = (int(c[0]) for c in counts)
 
         return {
-            "actual_tract": actual_tract,
+            "actual_tract": self.tract_dict.get("actual"),
             "actual_count": actual_count,
             "nearby_count": nearby_count,
             "combined_count": combined_count,
@@ -559,10 +1092,45 @@ class StableCommunities(ScoringCriterion):
             "nearby_score": nearby_score
         }
 
+    def get_stable_surface(self):
+        if self.stable_surface is False:
+            return None
+        if self.stable_surface is None or isinstance(self.stable_surface, str):
+            input_hash = cached_index((self.indicators_df, self.tracts_shp), "stable_surface_hash",
+                                      lambda _: surface_hash(self.indicators_df, self.tracts_shp))
+            self.stable_surface = load_stable_surface(self.stable_surface or DEFAULT_STABLE_SURFACE_PATH, input_hash) or False
+            return self.stable_surface or None
+        return self.stable_surface
+
+    @classmethod
+    def calculate_score_many(cls, lats, lons, **kwargs):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if len(lats) == 0:
+            return np.zeros(0, dtype=np.int64)
+        criterion = cls.for_batch(lats, lons, kwargs)
+        surface = criterion.get_stable_surface()
+        scores = np.full(len(lats), np.nan) if surface is None else surface.scores_many(lats, lons)
+        # off the surface or too close to a face edge: exact tract lookups
+        todo = np.isnan(scores)
+        if todo.any():
+            scores[todo] = cls.scores_many(lats[todo], lons[todo], *criterion.get_tract_indexes(), criterion.get_indicator_masks())
+        return scores.astype(np.int64)
+
     def calculate_score(self):
+        # Housing Needs reads the same site's score through the shared context
+        return self.context.get("stable_community_score", self.compute_score)
+
+    def compute_score(self):
         """
         Calculate the final score as the maximum of actual tract score and nearby tract score.
         """
+        surface = self.get_stable_surface()
+        if surface is not None:
+            surface_score = surface.scores_projected_many(*self.context.projected(SURFACE_CRS))[0]
+            if not np.isnan(surface_score):
+                return int(surface_score)
+
         score_info = self.calculate_indicators_score()
         
         # Get the maximum of the two scores
@@ -581,13 +1149,10 @@ class HousingNeedsCharacteristics(ScoringCriterion):
 
         self.tracts_gdf = kwargs.get("tracts_gdf")
         self.census_tract_data_df = kwargs.get("census_tract_data", {})
-        self.stable_community_score = kwargs.get("stable_community_score")
-        if self.stable_community_score is None:
-            try:
-                self.stable_community_score = StableCommunities(latitude, longitude, **kwargs).calculate_score()
-            except Exception as e:
-                print("Warning: Failed to calculate StableCommunities score internally:", e)
-                self.stable_community_score = None
+        self.tract_table = resolve_tract_table(kwargs.get("tract_table"))
+        self.tract_index = kwargs.get("housing_tract_index")
+        # only needed for the bonus, and only computed (once) when the base test passes
+        self._stable_community_score = kwargs.get("stable_community_score")
         
         # self.revitalization_score = kwargs.get("revitalization_score")
         """ if self.revitalization_score is None:
@@ -596,36 +1161,85 @@ class HousingNeedsCharacteristics(ScoringCriterion):
             except Exception as e:
                 print("Warning: Failed to calculate RevitalizationRedevelopmentPlans score internally:", e)
                 self.revitalization_score = None """
-        # manually give whether in qct
-        self.in_qct = kwargs.get("in_qct", True)
-
-        point = Point(self.longitude, self.latitude)
-        match = self.tracts_gdf[self.tracts_gdf.contains(point)]
-        if not match.empty:
-            geoid = str(match.iloc[0]["GEOID"])
-            self.census_tract_data = self.census_tract_data_df.get(geoid, {})
+
+        self.geoid = self.find_geoid()
+        self.census_tract_data = self.get_census_tract_data()
+        self.in_qct = self.record_in_qct(self.census_tract_data)
+
+    def find_geoid(self):
+        if self.tract_index is None:
+            self.tract_index = cached_index(self.tracts_gdf, "tracts", PolygonIndex.from_geodataframe)
+        position = self.context.locate(self.tract_index)
+        return None if position < 0 else str(self.tract_index.gdf.iloc[position]["GEOID"])
+
+    def get_census_tract_data(self):
+        return {} if self.geoid is None else self.census_record(self.geoid)
+
+    def census_record(self, geoid):
+        if self.tract_table is not None:
+            return self.tract_table.housing_record(geoid)
+        if isinstance(self.census_tract_data_df, pd.DataFrame):
+            records = cached_index(self.census_tract_data_df, "housing_records", housing_records)
         else:
-            self.census_tract_data = {}
+            records = self.census_tract_data_df
+        return records.get(geoid, {})
+
+    def record_in_qct(self, record):
+        # manually give whether in qct; otherwise the tract's QCT flag (unknown tracts count as in a QCT)
+        return self.extra.get("in_qct", record.get(IN_QCT_KEY, True))
+
+    @property
+    def stable_community_score(self):
+        if self._stable_community_score is None:
+            self._stable_community_score = StableCommunities(self.latitude, self.longitude, **self.extra).calculate_score()
+        return self._stable_community_score
 
     def qualifies_for_housing_need_and_growth(self):
-        severe_housing_problem = (self
-                                .census_tract_data
+        return self.record_qualifies(self.census_tract_data, self.in_qct)
+
+    @staticmethod
+    def record_qualifies(census_tract_data, in_qct):
+        severe_housing_problem = (census_tract_data
                                 .get("% of rental units occupied by 80% AMI and below with Severe Housing Problems", 0) >= 45)
         population_growth = (
-            self.census_tract_data.get("Is 2021 greater than 2011?", False) and
-            self.census_tract_data.get("Average: YoY Growth 2018-2021", 0) > 1
+            census_tract_data.get("Is 2021 greater than 2011?", False) and
+            census_tract_data.get("Average: YoY Growth 2018-2021", 0) > 1
         )
-        employment_growth = self.census_tract_data.get("Average change: 2020-2022", 0) > 1
-        not_in_qct = not self.in_qct
-        return (severe_housing_problem or population_growth or employment_growth) and not_in_qct
+        employment_growth = census_tract_data.get("Average change: 2020-2022", 0) > 1
+        not_in_qct = not in_qct
+        return bool((severe_housing_problem or population_growth or employment_growth) and not_in_qct)
 
     def qualifies_for_stable_or_redevelopment_bonus(self):
-        if self.stable_community_score is None:
-            raise ValueError("'stable_community_score' must be set externally before calling this method.")
         return self.qualifies_for_housing_need_and_growth() and (
             self.stable_community_score >= 5 #or self.revitalization_score >= 5
         )
 
+    @classmethod
+    def calculate_score_many(cls, lats, lons, stable_community_scores=None, **kwargs):
+        """
+        stable_community_scores: per-site StableCommunities scores when the
+        caller already has them; otherwise they are computed for the sites
+        that need the bonus check.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if len(lats) == 0:
+            return np.zeros(0, dtype=np.int64)
+        criterion = cls.for_batch(lats, lons, kwargs)
+        geoids = criterion.tract_index.gdf["GEOID"].astype(str).to_numpy()
+        records = [criterion.census_record(geoids[pos]) if pos >= 0 else {}
+                   for pos in criterion.tract_index.locate_many(lats, lons).tolist()]
+        qualifies = np.array([cls.record_qualifies(record, criterion.record_in_qct(record)) for record in records], dtype=bool)
+
+        stable = np.zeros(len(lats))
+        if stable_community_scores is not None:
+            stable = np.asarray(stable_community_scores, dtype=np.float64)
+        elif criterion._stable_community_score is not None:
+            stable[:] = criterion._stable_community_score
+        elif qualifies.any():
+            stable[qualifies] = StableCommunities.calculate_score_many(lats[qualifies], lons[qualifies], **kwargs)
+        return np.where(qualifies, 5, 0) + np.where(qualifies & (stable >= 5), 5, 0)
+
     def calculate_score(self):
         score = 0
         if self.qualifies_for_housing_need_and_growth():
@@ -639,6 +1253,8 @@ class HousingNeedsCharacteristics(ScoringCriterion):
 # --- Aggregator ---
 class AggregateScoringSystem:
     def __init__(self, latitude, longitude, **kwargs):
+        # one context per site: each tract / zone / rural lookup runs once across the criteria
+        kwargs = dict(kwargs, site_context=SiteContext.for_site(latitude, longitude, kwargs.get("site_context")))
         self.criteria = [
             CommunityTransportationOptions(latitude, longitude, **kwargs),
             DesirableUndesirableActivities(latitude, longitude, **kwargs),
@@ -650,5 +1266,36 @@ class AggregateScoringSystem:
     def calculate_total_score(self):
         return sum(criterion.calculate_score() for criterion in self.criteria)
 
+
+def score_many(lats, lons=None, **kwargs):
+    """
+    Score arrays of sites in one pass, or a GeoDataFrame of site points given
+    as `lats`. kwargs are the same as for the criteria. Returns one row per
+    site with each category score and the total.
+    """
+    index = None
+    if isinstance(lats, (gpd.GeoDataFrame, gpd.GeoSeries)):
+        points = lats.geometry if isinstance(lats, gpd.GeoDataFrame) else lats
+        if points.crs is not None:
+            points = points.to_crs("EPSG:4326")
+        index = lats.index
+        lats, lons = points.y.to_numpy(), points.x.to_numpy()
+    lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+    lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+
+    stable_scores = StableCommunities.calculate_score_many(lats, lons, **kwargs)
+    scores = pd.DataFrame({
+        "lat": lats,
+        "lon": lons,
+        "community_transportation_options_score": CommunityTransportationOptions.calculate_score_many(lats, lons, **kwargs),
+        "desirable_undesirable_activities_score": DesirableUndesirableActivities.calculate_score_many(lats, lons, **kwargs),
+        "stable_communities_score": stable_scores,
+        "quality_education_areas_score": QualityEducation.calculate_score_many(lats, lons, **kwargs),
+        "housing_needs_characteristics_score": HousingNeedsCharacteristics.calculate_score_many(
+            lats, lons, stable_community_scores=stable_scores, **kwargs),
+    }, index=index)
+    scores["total_score"] = scores[[column for column in scores.columns if column.endswith("_score")]].sum(axis=1)
+    return scores
+
 ####################################################################################################################################
 
@@ -0,0 +1,276 @@
+"""
+Prebuilt binary bundle of every scoring input.
+
+The grid runner and the site notebook used to start by reading shapefiles,
+GeoJSONs and CSVs, reprojecting them and dissolving the USDA rural tracts,
+which took tens of seconds before the first point was scored. The bundle
+stores the same inputs once, already normalised: tables as Feather, layers
+as GeoParquet in the CRS the criteria query them in, the dissolved rural
+union, the tract table, and lookup rasters for the rural, tract and
+school-zone layers. A manifest records a hash of every source file.
+
+    python -m aggregate_scoring.data_bundle build
+    python -m aggregate_scoring.data_bundle verify
+
+load_bundle() returns the data kwargs for the scoring classes; read_sources()
+returns the same kwargs straight from the source files. Both hold the tables
+and layers of the documented kwargs (aggregate_scoring.py) unchanged, except
+that transit_df is the deduplicated stop table once it has been built.
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from .polygon_raster import RURAL_SHAPEFILE, SCHOOL_ZONE_FILES, TRACT_SHAPEFILE, PolygonRaster, load_polygon_raster, rural_layer, school_zone_layer
+from .school_matching import DEFAULT_SCHOOL_DF_PATH
+from .spatial_index import prepared_geometry
+from .tract_table import HOUSING_DATA_PATHS, INDICATORS_PATH, USDA_PATH, TractTable
+from .transit_stops import DEFAULT_TRANSIT_STOPS_PATH, RAW_TRANSIT_PATH
+from .wetlands import DEFAULT_WETLANDS_PATH, EQUAL_AREA_CRS
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+
+DEFAULT_BUNDLE_DIR = os.path.join(PROJECT_ROOT, "data/processed/bundle")
+MANIFEST_NAME = "manifest.json"
+# Housing Needs has always located sites in the 2020 tracts its indicators are keyed by
+HOUSING_TRACT_SHAPEFILE = os.path.join(PROJECT_ROOT, "data/raw/shapefiles/HousingNeeds/tl_2020_13_tract/tl_2020_13_tract.shp")
+
+# kwargs name -> candidate CSVs, first existing wins
+TABLE_SOURCES = {
+    # one row per physical stop with hub flags ORed; the raw sweep until `transit_stops dedupe` has run
+    "transit_df": [DEFAULT_TRANSIT_STOPS_PATH, RAW_TRANSIT_PATH],
+    "desirable_csv": [os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/desirable_undesirable_activities/desirable_activities_google_places_v3.csv")],
+    "usda_csv": [USDA_PATH],
+    "undesirable_csv": [os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/desirable_undesirable_activities/undesirable_hsi_tri_cdr_rcra_frs_google_places.csv")],
+    "school_df": [DEFAULT_SCHOOL_DF_PATH],
+    "indicators_df": [INDICATORS_PATH],
+    "census_tract_data": [HOUSING_DATA_PATHS[0]],
+}
+READ_OPTIONS = {"usda_csv": {"dtype": {"CensusTract": str}}}
+SHAPEFILE_PARTS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+
+######################################################################################################################################
+
+def first_existing(paths):
+    """First path that exists; the last one otherwise, so reading it fails loudly."""
+    return next((path for path in paths if os.path.exists(path)), paths[-1])
+
+
+def source_files(path):
+    """A shapefile is its .shp plus sidecars; anything else is one file."""
+    if path.endswith(".shp"):
+        stem = path[:-len(".shp")]
+        return [stem + ext for ext in SHAPEFILE_PARTS if os.path.exists(stem + ext)]
+    return [path]
+
+
+def fingerprint(path, with_hash=True):
+    """size / mtime of every file behind path, plus a sha256 over their bytes."""
+    files = source_files(path)
+    record = {
+        "path": os.path.relpath(path, PROJECT_ROOT),
+        "size": sum(os.path.getsize(f) for f in files),
+        "mtime_ns": max(os.stat(f).st_mtime_ns for f in files),
+    }
+    if with_hash:
+        digest = hashlib.sha256()
+        for f in files:
+            with open(f, "rb") as handle:
+                for block in iter(lambda: handle.read(1 << 20), b""):
+                    digest.update(block)
+        record["sha256"] = digest.hexdigest()
+    return record
+
+######################################################################################################################################
+
+def source_paths():
+    """Bundle entry -> source files it is built from (only those that exist)."""
+    paths = {name: [first_existing(candidates)] for name, candidates in TABLE_SOURCES.items()}
+    paths["tracts"] = [TRACT_SHAPEFILE]
+    paths["housing_tracts"] = [HOUSING_TRACT_SHAPEFILE]
+    paths["rural_union"] = [RURAL_SHAPEFILE]
+    for i, path in enumerate(SCHOOL_ZONE_FILES):
+        paths[f"school_zones_{i}"] = [path]
+    paths["wetlands"] = [DEFAULT_WETLANDS_PATH]
+    paths["tract_table"] = [HOUSING_DATA_PATHS[0], INDICATORS_PATH, USDA_PATH]
+    return {name: [path for path in entry if os.path.exists(path)] for name, entry in paths.items()}
+
+
+def read_sources():
+    """Scoring data kwargs read from the source files (the slow path the bundle replaces)."""
+    inputs = {}
+    for name, candidates in TABLE_SOURCES.items():
+        inputs[name] = pd.read_csv(first_existing(candidates), **READ_OPTIONS.get(name, {}))
+    inputs["grocery_csv"] = inputs["desirable_csv"]
+
+    # one 2024 tract layer for Desirable/Undesirable and Stable Communities
+    tracts = gpd.read_file(TRACT_SHAPEFILE).to_crs("EPSG:4326")
+    inputs.update(tract_shapefile=tracts, tracts_shp=tracts)
+    inputs["tracts_gdf"] = gpd.read_file(HOUSING_TRACT_SHAPEFILE).to_crs("EPSG:4326")
+    inputs["rural_gdf_unary_union"] = prepared_geometry(gpd.read_file(RURAL_SHAPEFILE).to_crs("EPSG:4326").unary_union)
+    inputs["school_boundary_gdfs"] = [school_zone_layer(gpd.read_file(path)) if os.path.exists(path) else None
+                                      for path in SCHOOL_ZONE_FILES]
+    inputs["wetlands_gdf"] = gpd.read_file(DEFAULT_WETLANDS_PATH).to_crs(EQUAL_AREA_CRS) if os.path.exists(DEFAULT_WETLANDS_PATH) else None
+
+    # built from the same housing table as census_tract_data, so both give Housing Needs the same records
+    inputs["tract_table"] = TractTable.build([inputs["census_tract_data"]], inputs["indicators_df"], inputs["usda_csv"])
+    return inputs
+
+
+def build_bundle(out_dir=DEFAULT_BUNDLE_DIR, cells_across=PolygonRaster.CELLS_ACROSS):
+    inputs = read_sources()
+    os.makedirs(os.path.join(out_dir, "rasters"), exist_ok=True)
+    files = {}
+
+    for name in TABLE_SOURCES:
+        files[name] = f"{name}.feather"
+        inputs[name].to_feather(os.path.join(out_dir, files[name]))
+
+    layers = {
+        "tracts": inputs["tracts_shp"],
+        "housing_tracts": inputs["tracts_gdf"],
+        "rural_union": rural_layer(inputs["rural_gdf_unary_union"]),
+        "wetlands": inputs["wetlands_gdf"],
+    }
+    for i, gdf in enumerate(inputs["school_boundary_gdfs"]):
+        layers[f"school_zones_{i}"] = gdf
+    for name, gdf in layers.items():
+        if gdf is None:
+            continue
+        files[name] = f"{name}.parquet"
+        gdf.to_parquet(os.path.join(out_dir, files[name]))
+
+    files["tract_table"] = "tract_table.parquet"
+    inputs["tract_table"].save(os.path.join(out_dir, files["tract_table"]))
+
+    # lookup rasters over exactly the layers stored above
+    rasters = {"rural": layers["rural_union"], "tracts": layers["tracts"], "housing_tracts": layers["housing_tracts"]}
+    rasters.update({name: gdf for name, gdf in layers.items() if name.startswith("school_zones_") and gdf is not None})
+    for name, gdf in rasters.items():
+        PolygonRaster.build(gdf, cells_across=cells_across).save(os.path.join(out_dir, "rasters", name))
+
+    sources = source_paths()
+    manifest = {
+        "files": files,
+        "rasters": sorted(rasters),
+        "sources": {name: [fingerprint(path) for path in sources[name]] for name in files},
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+######################################################################################################################################
+
+def bundle_exists(bundle_dir=DEFAULT_BUNDLE_DIR):
+    return os.path.exists(os.path.join(bundle_dir, MANIFEST_NAME))
+
+
+def read_manifest(bundle_dir=DEFAULT_BUNDLE_DIR):
+    with open(os.path.join(bundle_dir, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def stale_entries(bundle_dir=DEFAULT_BUNDLE_DIR, with_hash=False):
+    """
+    Bundle entries whose sources changed since the build. The default only
+    compares size and mtime; with_hash re-hashes every source.
+    """
+    stale = []
+    sources = source_paths()
+    for name, recorded in read_manifest(bundle_dir)["sources"].items():
+        # a preferred source built after the bundle, e.g. the deduplicated transit stops
+        if {os.path.relpath(path, PROJECT_ROOT) for path in sources.get(name, [])} - {entry["path"] for entry in recorded}:
+            stale.append(name)
+            continue
+        for entry in recorded:
+            path = os.path.join(PROJECT_ROOT, entry["path"])
+            if not os.path.exists(path):
+                continue  # sources need not ship with the bundle
+            current = fingerprint(path, with_hash=with_hash)
+            keys = ("sha256",) if with_hash else ("size", "mtime_ns")
+            if any(current[key] != entry[key] for key in keys):
+                stale.append(name)
+                break
+    return stale
+
+
+# One bundle per directory per process
+_LOADED_BUNDLES = {}
+
+def load_bundle(bundle_dir=DEFAULT_BUNDLE_DIR):
+    """Scoring data kwargs from a built bundle, with the lookup rasters memory-mapped."""
+    bundle_dir = os.path.abspath(bundle_dir)
+    if bundle_dir in _LOADED_BUNDLES:
+        return dict(_LOADED_BUNDLES[bundle_dir])
+    if not bundle_exists(bundle_dir):
+        raise FileNotFoundError(f"No data bundle at {bundle_dir}; build it with `python -m aggregate_scoring.data_bundle build`")
+    manifest = read_manifest(bundle_dir)
+    stale = stale_entries(bundle_dir)
+    if stale:
+        print(f"Warning: data bundle at {bundle_dir} is older than its sources for {', '.join(stale)}; rebuild it")
+
+    files = manifest["files"]
+
+    def path(name):
+        return os.path.join(bundle_dir, files[name])
+
+    def raster_path(name):
+        return os.path.join(bundle_dir, "rasters", name)
+
+    # Feather hands back missing strings as None; read_csv gave NaN
+    inputs = {name: pd.read_feather(path(name)).fillna(np.nan) if name in files else None for name in TABLE_SOURCES}
+    inputs["grocery_csv"] = inputs["desirable_csv"]
+
+    tracts = gpd.read_parquet(path("tracts"))
+    inputs.update(tract_shapefile=tracts, tracts_shp=tracts)
+    inputs["tracts_gdf"] = gpd.read_parquet(path("housing_tracts"))
+    rural = gpd.read_parquet(path("rural_union"))
+    inputs["rural_gdf_unary_union"] = prepared_geometry(rural.geometry.iloc[0])
+    inputs["school_boundary_gdfs"] = [gpd.read_parquet(path(f"school_zones_{i}")) if f"school_zones_{i}" in files else None
+                                      for i in range(len(SCHOOL_ZONE_FILES))]
+    inputs["wetlands_gdf"] = gpd.read_parquet(path("wetlands")) if "wetlands" in files else None
+
+    inputs["tract_table"] = TractTable.load(path("tract_table"))
+
+    rasters = set(manifest.get("rasters", []))
+    if "rural" in rasters:
+        inputs["rural_raster"] = load_polygon_raster(raster_path("rural"), rural)
+    if "tracts" in rasters:
+        # one 2024 tract lookup shared by Desirable/Undesirable and Stable Communities
+        tract_raster = load_polygon_raster(raster_path("tracts"), tracts)
+        inputs.update(tract_index=tract_raster, stable_tract_index=tract_raster)
+    if "housing_tracts" in rasters:
+        inputs["housing_tract_index"] = load_polygon_raster(raster_path("housing_tracts"), inputs["tracts_gdf"])
+    inputs["school_zone_indexes"] = [
+        load_polygon_raster(raster_path(f"school_zones_{i}"), gdf) if f"school_zones_{i}" in rasters else None
+        for i, gdf in enumerate(inputs["school_boundary_gdfs"])
+    ]
+
+    _LOADED_BUNDLES[bundle_dir] = inputs
+    return dict(inputs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or check the prebuilt scoring data bundle.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Convert every scoring input into the bundle")
+    build.add_argument("--out", default=DEFAULT_BUNDLE_DIR, help="Bundle directory")
+    build.add_argument("--cells-across", type=int, default=PolygonRaster.CELLS_ACROSS, help="Cells along the longer side of each lookup raster")
+
+    verify = subparsers.add_parser("verify", help="Re-hash the sources and list bundle entries that are out of date")
+    verify.add_argument("--bundle", default=DEFAULT_BUNDLE_DIR, help="Bundle directory")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        manifest = build_bundle(args.out, args.cells_across)
+        print(f"Saved {len(manifest['files'])} inputs and {len(manifest['rasters'])} rasters to {args.out}")
+    elif args.command == "verify":
+        stale = stale_entries(args.bundle, with_hash=True)
+        print("Bundle is up to date" if not stale else f"Out of date: {', '.join(stale)}")
@@ -0,0 +1,145 @@
+"""
+Planar partition of the attendance-zone layers for Quality Education.
+
+The five school_boundary_gdfs layers (Administrative, APS, DeKalb ES/MS/HS)
+overlap, so a site's schools come from up to five point-in-polygon tests.
+Noding every zone edge from every layer and polygonizing the result gives
+faces that no zone edge crosses: every point inside a face sees the same
+elementary, middle and high schools, and therefore the same school-matching
+score. Each face stores those names and the score, so scoring a site is one
+indexed lookup, and the partition itself is an exact vector map layer:
+
+    python -m aggregate_scoring.education_partition build
+
+Points on a face edge (a zone edge) are not inside any face and are scored
+with the exact per-layer path.
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from .polygon_raster import SCHOOL_ZONE_FILES, school_zone_layer
+from .school_matching import DEFAULT_SCHOOL_DF_PATH, source_hash
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+
+DEFAULT_PARTITION_PATH = os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/quality_education_areas/education_partition.parquet")
+
+######################################################################################################################################
+
+def partition_hash(school_df, school_boundary_gdfs, state_avg_by_year):
+    """Changes with the school table, the zone names or geometry, or the state averages."""
+    digest = hashlib.sha256(source_hash(school_df, school_boundary_gdfs).encode())
+    for gdf in school_boundary_gdfs:
+        if gdf is not None:
+            digest.update(b"".join(shapely.to_wkb(np.asarray(school_zone_layer(gdf).geometry.values))))
+    digest.update(json.dumps(state_avg_by_year, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def zone_faces(school_boundary_gdfs):
+    """Faces of the arrangement formed by every zone edge of every layer (EPSG:4326)."""
+    edges = [shapely.boundary(np.asarray(school_zone_layer(gdf).geometry.values))
+             for gdf in school_boundary_gdfs if gdf is not None]
+    if not edges:
+        return np.array([], dtype=object)
+    noded = shapely.union_all(np.concatenate(edges))
+    return np.asarray(shapely.get_parts(shapely.polygonize(shapely.get_parts(noded))))
+
+
+def build_education_partition(**kwargs):
+    """
+    Score every face of the zone arrangement with QualityEducation's school
+    path (kwargs as for QualityEducation). Faces that no zone covers are
+    dropped; a site there has no schools and scores 0 anyway.
+    """
+    from .aggregate_scoring import QualityEducation
+
+    faces = zone_faces(kwargs.get("school_boundary_gdfs", []))
+    anchors = shapely.point_on_surface(faces)
+
+    rows = []
+    for face, anchor in zip(faces, anchors):
+        criterion = QualityEducation(anchor.y, anchor.x, **dict(kwargs, education_partition=False))
+        elementary, middle, high = criterion.get_school_names()
+        if not (elementary or middle or high):
+            continue
+        rows.append({
+            "elementary": "; ".join(map(str, elementary)),
+            "middle": "; ".join(map(str, middle)),
+            "high": "; ".join(map(str, high)),
+            "score": float(criterion.score_school_names(elementary, middle, high)),
+            "geometry": face,
+        })
+
+    partition = gpd.GeoDataFrame(rows, columns=["elementary", "middle", "high", "score", "geometry"], geometry="geometry", crs="EPSG:4326")
+    partition.attrs["input_hash"] = partition_hash(kwargs.get("school_df"), kwargs.get("school_boundary_gdfs", []), kwargs.get("state_avg_by_year"))
+    return partition
+
+
+def save_education_partition(partition, path=DEFAULT_PARTITION_PATH):
+    """GeoParquet (or any vector format by extension) plus a <path>.json header."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith(".parquet"):
+        partition.to_parquet(path)
+    else:
+        partition.to_file(path)
+    with open(path + ".json", "w") as f:
+        json.dump({"input_hash": partition.attrs.get("input_hash"), "faces": len(partition)}, f)
+
+
+# One partition per file per process
+_LOADED_PARTITIONS = {}
+
+def load_education_partition(path=DEFAULT_PARTITION_PATH, input_hash=None):
+    """
+    Saved partition, or None when it is missing or was built from other
+    inputs than input_hash (the caller then scores through the zone layers).
+    """
+    path = os.path.abspath(path)
+    if path not in _LOADED_PARTITIONS:
+        if not os.path.exists(path):
+            return None
+        partition = gpd.read_parquet(path) if path.endswith(".parquet") else gpd.read_file(path)
+        header_path = path + ".json"
+        if os.path.exists(header_path):
+            with open(header_path) as f:
+                partition.attrs["input_hash"] = json.load(f).get("input_hash")
+        _LOADED_PARTITIONS[path] = partition
+    partition = _LOADED_PARTITIONS[path]
+    if input_hash is not None and partition.attrs.get("input_hash") != input_hash:
+        print(f"Warning: education partition at {path} was built from different inputs; ignoring it")
+        return None
+    return partition
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Overlay the attendance-zone layers into a scored planar partition.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Build and save the scored partition")
+    build.add_argument("--schools", default=DEFAULT_SCHOOL_DF_PATH, help="School performance CSV")
+    build.add_argument("--out", default=DEFAULT_PARTITION_PATH, help="Output path (.parquet, .gpkg or .geojson)")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        partition = build_education_partition(
+            school_df=pd.read_csv(args.schools),
+            school_boundary_gdfs=[gpd.read_file(path) if os.path.exists(path) else None for path in SCHOOL_ZONE_FILES],
+            # same state averages the scoring notebooks pass
+            state_avg_by_year={
+                "elementary": {2018: 77.8, 2019: 79.9},
+                "middle": {2018: 76.2, 2019: 77},
+                "high": {2018: 75.3, 2019: 78.8},
+            },
+        )
+        save_education_partition(partition, args.out)
+        print(f"Saved {len(partition)} faces to {args.out}")
@@ -2,7 +2,6 @@ import numpy as np
 import geopandas as gpd
 from shapely.geometry import Point
 from tqdm import tqdm
-import pandas as pd
 from concurrent.futures import ThreadPoolExecutor
 from itertools import product
 from functools import partial
@@ -10,16 +9,19 @@ from multiprocessing import Pool, cpu_count
 from tqdm import tqdm
 import os
 
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
-
 # Importing score classes 
 from aggregate_scoring import (
      CommunityTransportationOptions,
      DesirableUndesirableActivities,
+     HousingNeedsCharacteristics,
      QualityEducation,
-     StableCommunities
+     StableCommunities,
+     score_many
 )
+from aggregate_scoring.data_bundle import DEFAULT_BUNDLE_DIR, bundle_exists, load_bundle, read_sources
+from aggregate_scoring.site_context import SiteContext
+from aggregate_scoring.walk_network import DEFAULT_TILE_DIR, DEFAULT_TRANSIT_FIELD_PATH, DEFAULT_WALK_NETWORK_PATH, group_points_by_tile, tile_grid
+from aggregate_scoring.wetlands import WetlandsIndex, load_wetlands_index
 
 # Defining Grid Parameters
 lon_min, lon_max = -84.911059, -83.799104
@@ -31,51 +33,49 @@ lons = np.arange(lon_min, lon_max, step)
 lat_lon_pairs = [(lat, lon) for lat in lats for lon in lons]
 
 # Load in Datasets
+# Prebuilt bundle (python -m aggregate_scoring.data_bundle build) when present: Feather / GeoParquet
+# already in the criteria's CRS, the dissolved rural union, the tract table and memory-mapped
+# lookup rasters. Otherwise the same inputs are read from the source files.
+inputs = load_bundle(DEFAULT_BUNDLE_DIR) if bundle_exists(DEFAULT_BUNDLE_DIR) else read_sources()
 
 # --- CommunityTransportationOptions ---
-df_transit = pd.read_csv(os.path.join(PROJECT_ROOT, "data/raw/scoring_indicators/community_trans_options_sites/georgia_transit_locations_with_hub.csv"))
+walk_network_path = DEFAULT_WALK_NETWORK_PATH  # written by `python -m aggregate_scoring.walk_network build`
+walk_tiles_dir = DEFAULT_TILE_DIR
+transit_field_path = DEFAULT_TRANSIT_FIELD_PATH
+walk_tiles = {}  # tile size / origin the tiles were built with (default grid when untiled)
+if os.path.isdir(walk_tiles_dir):
+    walk_network_path = walk_tiles_dir  # statewide: tiles loaded on demand, LRU-evicted per worker
+    transit_field_path = None           # the field is built per single store, not per tile
+    walk_tiles = tile_grid(walk_tiles_dir)
+elif not os.path.exists(walk_network_path):
+    print(f"No local walk network at {walk_network_path}; transit scoring will download graphs per site.")
+    walk_network_path = None
+if walk_network_path is None or not os.path.exists(transit_field_path or ""):
+    transit_field_path = None  # fall back to routing each cell's candidate stops
 
 # --- DesirableUndesirableActivities ---
-rural_gdf = gpd.read_file(os.path.join(PROJECT_ROOT, "data/raw/shapefiles/USDA_Rural_Housing_by_Tract_7054655361891465054/USDA_Rural_Housing_by_Tract.shp")).to_crs("EPSG:4326")
-rural_union = rural_gdf.unary_union
-
-csv_desirable = pd.read_csv(os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/desirable_undesirable_activities/desirable_activities_google_places_v3.csv"))
-csv_usda = pd.read_csv(os.path.join(PROJECT_ROOT, "data/raw/scoring_indicators/desirable_undesirable_activities/usda/food_access_research_atlas.csv"), dtype={'CensusTract': str})
-tract_shape = gpd.read_file(os.path.join(PROJECT_ROOT, "data/raw/shapefiles/tl_2024_13_tract/tl_2024_13_tract.shp"))
-csv_undesirable = pd.read_csv(os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/desirable_undesirable_activities/undesirable_hsi_tri_cdr_rcra_frs_google_places.csv"))
-
-# --- QualityEducation ---
-df_school = pd.read_csv(os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/quality_education_areas/Option_C_Scores_Eligibility_with_BTO.csv"))
-gdf_school_boundaries = [
-    gpd.read_file(os.path.join(PROJECT_ROOT, "data/raw/shapefiles/quality_education/Administrative.geojson")).to_crs("EPSG:4326"),
-    gpd.read_file(os.path.join(PROJECT_ROOT, "data/raw/shapefiles/quality_education/APSBoundaries.json")).to_crs("EPSG:4326"),
-    gpd.read_file(os.path.join(PROJECT_ROOT, "data/raw/shapefiles/quality_education/DKE.json")).to_crs("EPSG:4326"),
-    gpd.read_file(os.path.join(PROJECT_ROOT, "data/raw/shapefiles/quality_education/DKM.json")).to_crs("EPSG:4326"),
-    gpd.read_file(os.path.join(PROJECT_ROOT, "data/raw/shapefiles/quality_education/DKBHS.json")).to_crs("EPSG:4326")
-]
-
-# --- StableCommunities ---
-df_indicators = pd.read_csv(os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/stable_communities/stable_communities_2024_processed_v3.csv"))
-shp_tract = gpd.read_file(os.path.join(PROJECT_ROOT, "data/raw/shapefiles/tl_2024_13_tract/tl_2024_13_tract.shp")).to_crs("EPSG:4326")
+# built once here so forked workers inherit the indexed wetlands
+wetlands_index = WetlandsIndex(inputs["wetlands_gdf"]) if inputs["wetlands_gdf"] is not None else load_wetlands_index()
 
 
 
 # Defining kwargs for scoring classes
 kwargs = {
+    # --- Data: transit stops, amenities, USDA, tracts, rural union, school zones, indicators,
+    #     tract table and (from a bundle) the tract / rural / school-zone lookup rasters ---
+    **inputs,
+
     # --- CommunityTransportationOptions ---
-    "transit_df": df_transit,
+    "walk_network": walk_network_path,  # loaded once per worker process
+    "walk_engine": "csr",               # compact CSR graph instead of a networkx copy per worker
+    "transit_field": transit_field_path, # nearest stop / hub distance per network node
+    "walk_network_memory_mb": 1024,     # LRU budget per worker when walk_network is a tile directory
 
     # --- DesirableUndesirableActivities ---
-    "rural_gdf_unary_union": rural_union,
-    "desirable_csv": csv_desirable, 
-    "grocery_csv": csv_desirable,
-    "usda_csv": csv_usda,
-    "tract_shapefile": tract_shape,
-    "undesirable_csv": csv_undesirable,
+    "wetlands_index": wetlands_index,   # STRtree in EPSG:5070; False skips the wetlands deduction
 
     # --- QualityEducation ---
-    "school_df": df_school,
-    "school_boundary_gdfs": gdf_school_boundaries,       
+    "education_mode": "auto",           # precomputed metro layer where it covers the cell, school matching elsewhere
     "state_avg_by_year": {
         "elementary": {
             2018: 77.8,
@@ -91,15 +91,8 @@ kwargs = {
         }
     },
 
-    # --- StableCommunities ---
-    "indicators_df": df_indicators,
-    "tracts_shp": shp_tract,
-    
-    # # --- HousingNeedsCharacteristics ---
-    # "census_tract_data": pd.read_csv("../../data/processed/scoring_indicators/housing_needs_characteristics/merged_housing_data.csv"),
-    # "tracts_gdf": gpd.read_file("../../data/raw/shapefiles/HousingNeeds/tl_2020_13_tract/tl_2020_13_tract.shp").to_crs("EPSG:4326"),
-    # #"revitalization_score": 4,
-    # "in_qct": False  # Required for housing need eligibility
+    # --- HousingNeedsCharacteristics ---
+    # "revitalization_score": 4,
 } 
 
 global_kwargs = kwargs.copy()
@@ -107,15 +100,18 @@ global_kwargs = kwargs.copy()
 def score_point_parallel(lat_lon):
     lat, lon = lat_lon
     try:
-        ct = CommunityTransportationOptions(lat, lon, **global_kwargs)
-        dua = DesirableUndesirableActivities(lat, lon, **global_kwargs)
-        sc = StableCommunities(lat, lon, **global_kwargs)
-        qe = QualityEducation(lat, lon, **global_kwargs)
+        # tract, nearby-tract, rural and zone lookups run once per cell and are shared by the criteria
+        site_kwargs = dict(global_kwargs, site_context=SiteContext(lat, lon))
+        ct = CommunityTransportationOptions(lat, lon, **site_kwargs)
+        dua = DesirableUndesirableActivities(lat, lon, **site_kwargs)
+        sc = StableCommunities(lat, lon, **site_kwargs)
+        qe = QualityEducation(lat, lon, **site_kwargs)
 
         ct_score = ct.calculate_score()
         dua_score = dua.calculate_score()
         sc_score = sc.calculate_score()
         qe_score = qe.calculate_score()
+        hn_score = HousingNeedsCharacteristics(lat, lon, **site_kwargs).calculate_score()  # reuses sc_score
 
         return [{
             "lat": lat,
@@ -124,17 +120,37 @@ def score_point_parallel(lat_lon):
             "desirable_undesirable_activities_score": dua_score,
             "stable_communities_score": sc_score,
             "quality_education_areas_score": qe_score,
-            "total_score": ct_score + dua_score + sc_score + qe_score,
+            "housing_needs_characteristics_score": hn_score,
+            "total_score": ct_score + dua_score + sc_score + qe_score + hn_score,
+            "transit_walking_fallbacks": ct.fallback_count,
             "geometry": Point(lon, lat)
         }]
     except Exception as e:
         print(f"Error at (lat={lat:.4f}, lon={lon:.4f}): {e}")
         return []
+
+
+def score_chunk(lat_lon_chunk):
+    if transit_field_path is None:
+        # transit walking routes are per cell; keep per-cell records and their fallback counts
+        return [record for lat_lon in lat_lon_chunk for record in score_point_parallel(lat_lon)]
+    lats, lons = (np.array(values) for values in zip(*lat_lon_chunk))
+    try:
+        scores = score_many(lats, lons, **global_kwargs)
+    except Exception as e:
+        # one bad cell must not cost the chunk: rescore cell by cell, logging and dropping the failures
+        print(f"Error scoring chunk at (lat={lats[0]:.4f}, lon={lons[0]:.4f}): {e}; scoring its cells one at a time")
+        return [record for lat_lon in lat_lon_chunk for record in score_point_parallel(lat_lon)]
+    scores["transit_walking_fallbacks"] = 0  # the distance field never routes
+    scores["geometry"] = gpd.points_from_xy(lons, lats)
+    return scores.to_dict("records")
     
 
 if __name__ == "__main__":
+    # Chunks never straddle a walk-network tile, so each worker loads a tile roughly once
+    chunks = group_points_by_tile(lat_lon_pairs, **walk_tiles)
     with Pool(processes=cpu_count()) as pool:
-        results = list(tqdm(pool.imap_unordered(score_point_parallel, lat_lon_pairs), total=len(lat_lon_pairs)))
+        results = list(tqdm(pool.imap_unordered(score_chunk, chunks), total=len(chunks)))
 
     # Flatten the list
     all_records = [record for group in results for record in group if 'geometry' in record]
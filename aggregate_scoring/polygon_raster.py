@@ -0,0 +1,243 @@
+"""
+Rasterized lookup layers for the polygon questions scoring keeps asking:
+is a point in a USDA rural tract, which census tract contains it, and which
+school attendance zones cover it.
+
+Each layer is a fine grid in the layer's own CRS. A cell stores the row of
+the single polygon that covers it completely, OUTSIDE when no polygon
+touches it, or BOUNDARY when an edge crosses it (or polygons overlap there).
+Only BOUNDARY cells go back to an exact shapely test, so most lookups are an
+array read. Grids are saved as .npy next to a small JSON header and opened
+with mmap, so every worker process shares the same pages:
+
+    python -m aggregate_scoring.polygon_raster build
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from pyproj import CRS
+
+from .spatial_index import PolygonIndex, cached_index
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+
+DEFAULT_RASTER_DIR = os.path.join(PROJECT_ROOT, "data/processed/polygon_rasters")
+RURAL_SHAPEFILE = os.path.join(PROJECT_ROOT, "data/raw/shapefiles/USDA_Rural_Housing_by_Tract_7054655361891465054/USDA_Rural_Housing_by_Tract.shp")
+TRACT_SHAPEFILE = os.path.join(PROJECT_ROOT, "data/raw/shapefiles/tl_2024_13_tract/tl_2024_13_tract.shp")
+SCHOOL_ZONE_FILES = [
+    os.path.join(PROJECT_ROOT, "data/raw/shapefiles/quality_education/Administrative.geojson"),
+    os.path.join(PROJECT_ROOT, "data/raw/shapefiles/quality_education/APSBoundaries.json"),
+    os.path.join(PROJECT_ROOT, "data/raw/shapefiles/quality_education/DKE.json"),
+    os.path.join(PROJECT_ROOT, "data/raw/shapefiles/quality_education/DKM.json"),
+    os.path.join(PROJECT_ROOT, "data/raw/shapefiles/quality_education/DKBHS.json"),
+]
+EDUCATION_SCORE_PATH = os.path.join(PROJECT_ROOT, "data/maps/quality_education_areas/education_score_metro_atl.geojson")
+
+######################################################################################################################################
+
+def layer_hash(gdf):
+    """sha256 over the layer's geometries, in its own CRS and row order."""
+    return hashlib.sha256(b"".join(shapely.to_wkb(np.asarray(gdf.geometry.values)))).hexdigest()
+
+
+class PolygonRaster:
+    """
+    Drop-in for PolygonIndex (same gdf / locate_many / query_many) backed by
+    a lookup grid. Answers are identical to the exact index: a labelled cell
+    lies wholly inside one polygon and touches no edge.
+    """
+    OUTSIDE = -1
+    BOUNDARY = -2
+    CELLS_ACROSS = 4096
+
+    def __init__(self, cells, origin, cell_size, index, input_hash=None):
+        self.cells = cells
+        self.x0, self.y0 = origin
+        self.cell_size = cell_size
+        self.index = index
+        self.gdf = index.gdf
+        self.crs = index.crs
+        self.input_hash = input_hash
+
+    def __len__(self):
+        return len(self.gdf)
+
+    @classmethod
+    def build(cls, gdf, cell_size=None, cells_across=None):
+        index = PolygonIndex(gdf)
+        geoms = np.asarray(gdf.geometry.values)
+        min_x, min_y, max_x, max_y = gdf.total_bounds
+        if cell_size is None:
+            cell_size = max(max_x - min_x, max_y - min_y) / (cells_across or cls.CELLS_ACROSS)
+        # one cell of padding so nothing inside the layer lands off the grid
+        x0, y0 = min_x - cell_size, min_y - cell_size
+        nx_cells = int(np.ceil((max_x - x0) / cell_size)) + 1
+        ny_cells = int(np.ceil((max_y - y0) / cell_size)) + 1
+
+        edge_tree = shapely.STRtree(shapely.boundary(geoms))
+        # boxes grow a hair so points rounded into a neighbouring cell stay exact
+        pad = cell_size * 1e-6
+        x_left = x0 + np.arange(nx_cells) * cell_size
+        centres_x = x_left + cell_size / 2
+        cells = np.full((ny_cells, nx_cells), cls.OUTSIDE, dtype=np.int32)
+
+        for row in range(ny_cells):
+            y_bottom = y0 + row * cell_size
+            boxes = shapely.box(x_left - pad, y_bottom - pad, x_left + cell_size + pad, y_bottom + cell_size + pad)
+            on_edge = np.zeros(nx_cells, dtype=bool)
+            on_edge[edge_tree.query(boxes, predicate="intersects")[0]] = True
+
+            centres = shapely.points(centres_x, np.full(nx_cells, y_bottom + cell_size / 2))
+            cell_idx, poly_idx = index.tree.query(centres, predicate="within")
+            covering = np.bincount(cell_idx, minlength=nx_cells)
+            label = np.full(nx_cells, cls.OUTSIDE, dtype=np.int32)
+            label[cell_idx] = poly_idx
+            label[covering > 1] = cls.BOUNDARY
+            label[on_edge] = cls.BOUNDARY
+            cells[row] = label
+
+        return cls(cells, (x0, y0), cell_size, index, input_hash=layer_hash(gdf))
+
+    def save(self, path):
+        """Write <path>.npy and <path>.json."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.save(path + ".npy", self.cells)
+        header = {
+            "origin": [self.x0, self.y0],
+            "cell_size": self.cell_size,
+            "shape": list(self.cells.shape),
+            "crs": CRS.from_user_input(self.crs).to_wkt() if self.crs is not None else None,
+            "num_polygons": len(self.gdf),
+            "input_hash": self.input_hash,
+        }
+        with open(path + ".json", "w") as f:
+            json.dump(header, f)
+
+    @classmethod
+    def load(cls, path, gdf, mmap_mode="r"):
+        """
+        Open a saved grid over the same layer it was built from. gdf is
+        reprojected to the grid's CRS when needed; it backs the exact
+        fallback and the attribute lookups, and its geometry hash must match
+        the one recorded at build time.
+        """
+        with open(path + ".json") as f:
+            header = json.load(f)
+        if header["num_polygons"] != len(gdf):
+            raise ValueError(f"{path} was built from {header['num_polygons']} polygons, got {len(gdf)}")
+        if header["crs"] is not None and gdf.crs is not None and not CRS.from_user_input(gdf.crs).equals(CRS.from_wkt(header["crs"])):
+            gdf = gdf.to_crs(CRS.from_wkt(header["crs"]))
+        input_hash = header.get("input_hash")
+        if input_hash is None:
+            print(f"Warning: {path} predates layer hashes and cannot be checked against its layer; rebuild it")
+        elif layer_hash(gdf) != input_hash:
+            raise ValueError(f"{path} was built from a different layer; rebuild it from this one")
+        cells = np.load(path + ".npy", mmap_mode=mmap_mode)
+        return cls(cells, tuple(header["origin"]), header["cell_size"], PolygonIndex(gdf), input_hash=input_hash)
+
+    def lookup_cells(self, lats, lons):
+        """Raw cell values per point; points off the grid are OUTSIDE."""
+        xs, ys = self.index.project(lats, lons)
+        with np.errstate(invalid="ignore"):
+            cols = np.floor((xs - self.x0) / self.cell_size)
+            rows = np.floor((ys - self.y0) / self.cell_size)
+        ny_cells, nx_cells = self.cells.shape
+        on_grid = (cols >= 0) & (cols < nx_cells) & (rows >= 0) & (rows < ny_cells)
+        values = np.full(len(xs), self.OUTSIDE, dtype=np.int64)
+        values[on_grid] = self.cells[rows[on_grid].astype(np.int64), cols[on_grid].astype(np.int64)]
+        return values
+
+    def query_many(self, lats, lons):
+        """Every (point, polygon row) containment pair, sorted by point then row."""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        values = self.lookup_cells(lats, lons)
+
+        inside = np.flatnonzero(values >= 0)
+        boundary = np.flatnonzero(values == self.BOUNDARY)
+        exact_points, exact_polys = self.index.query_many(lats[boundary], lons[boundary])
+
+        point_idx = np.concatenate([inside, boundary[exact_points]])
+        poly_idx = np.concatenate([values[inside], exact_polys])
+        order = np.lexsort((poly_idx, point_idx))
+        return point_idx[order], poly_idx[order]
+
+    def locate_many(self, lats, lons):
+        """Row position of the polygon containing each point, -1 where none does."""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        located = self.lookup_cells(lats, lons)
+        boundary = np.flatnonzero(located == self.BOUNDARY)
+        located[boundary] = self.index.locate_many(lats[boundary], lons[boundary])
+        return located
+
+    def locate(self, lat, lon):
+        return int(self.locate_many([lat], [lon])[0])
+
+######################################################################################################################################
+
+def rural_layer(rural_union):
+    """The dissolved rural geometry as a one-row layer (row 0 = rural)."""
+    return gpd.GeoDataFrame(geometry=[rural_union], crs="EPSG:4326")
+
+
+def school_zone_layer(gdf):
+    """Attendance zones are matched in EPSG:4326, as QualityEducation always has."""
+    return gdf if gdf.crs == "EPSG:4326" else gdf.to_crs("EPSG:4326")
+
+
+# One parsed education score layer per file per process
+_LOADED_EDUCATION_LAYERS = {}
+
+def load_education_score_layer(path=EDUCATION_SCORE_PATH):
+    """Precomputed metro education scores (polygons with a `score` column) in EPSG:4326."""
+    path = os.path.abspath(path)
+    if path not in _LOADED_EDUCATION_LAYERS:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Education score layer not found at {path}")
+        _LOADED_EDUCATION_LAYERS[path] = school_zone_layer(gpd.read_file(path))
+    return _LOADED_EDUCATION_LAYERS[path]
+
+
+def load_polygon_raster(path, gdf):
+    """One memmap per raster and layer per process, released with the layer."""
+    path = os.path.abspath(path)
+    return cached_index(gdf, ("polygon_raster", path), lambda layer: PolygonRaster.load(path, layer))
+
+
+def build_default_rasters(out_dir=DEFAULT_RASTER_DIR, cells_across=PolygonRaster.CELLS_ACROSS):
+    """Build the rural, tract and school-zone rasters from the raw layers."""
+    layers = {
+        "rural": rural_layer(gpd.read_file(RURAL_SHAPEFILE).to_crs("EPSG:4326").unary_union),
+        "tracts": gpd.read_file(TRACT_SHAPEFILE),
+    }
+    for i, path in enumerate(SCHOOL_ZONE_FILES):
+        layers[f"school_zones_{i}"] = school_zone_layer(gpd.read_file(path))
+
+    built = {}
+    for name, gdf in layers.items():
+        raster = PolygonRaster.build(gdf, cells_across=cells_across)
+        raster.save(os.path.join(out_dir, name))
+        built[name] = raster
+    return built
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build memory-mapped lookup rasters for the scoring polygon layers.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Rasterize the rural, tract and school-zone layers")
+    build.add_argument("--out", default=DEFAULT_RASTER_DIR, help="Output directory")
+    build.add_argument("--cells-across", type=int, default=PolygonRaster.CELLS_ACROSS, help="Cells along the longer side of each layer")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        for name, raster in build_default_rasters(args.out, args.cells_across).items():
+            boundary_pct = 100 * np.mean(raster.cells == PolygonRaster.BOUNDARY)
+            print(f"{name}: {raster.cells.shape[1]}x{raster.cells.shape[0]} cells, {boundary_pct:.1f}% boundary")
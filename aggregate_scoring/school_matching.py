@@ -0,0 +1,174 @@
+"""
+School-name resolution table for Quality Education.
+
+Attendance zones name a few hundred distinct schools, but matching each name
+against the ~3,300 rows of the school performance table with
+fuzz.token_set_ratio is the slowest part of scoring a site. The table maps
+every (grade cluster, cleaned zone name) pair to its best school_df row and
+score once. Scoring reads the saved table when it matches the school table
+and zone names and otherwise rebuilds it in memory; it is only written by
+the CLI or to a path the caller names:
+
+    python -m aggregate_scoring.school_matching build
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+
+import pandas as pd
+from thefuzz import fuzz, process
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+
+DEFAULT_SCHOOL_DF_PATH = os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/quality_education_areas/Option_C_Scores_Eligibility_with_BTO.csv")
+DEFAULT_RESOLUTION_PATH = os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/quality_education_areas/school_name_resolution.json")
+
+GRADE_CLUSTERS = {"elementary": "E", "middle": "M", "high": "H"}
+
+# school_boundary_gdfs layer -> {school type: name column}, in the order QualityEducation reads them
+ZONE_NAME_COLUMNS = [
+    {"elementary": "ELEMENTARY", "middle": "MIDDLE", "high": "HIGH"},   # Administrative
+    {"elementary": "Elementary", "middle": "Middle", "high": "High"},   # APS
+    {"elementary": "DDP_ES_Nam"},                                       # DeKalb ES
+    {"middle": "DDP_MS_Name"},                                          # DeKalb MS
+    {"high": "DDP_HS_Nam"},                                             # DeKalb HS
+]
+
+######################################################################################################################################
+
+def preprocess_school_name(name):
+    name = re.sub(r'[^\w\s]', '', str(name).lower())
+    suffixes = ["elementary", "middle", "high", "school", "academy", "jr", "sr", "dr", "es", "ms", "hs"]
+    tokens = [token for token in name.split() if token not in suffixes]
+    cleaned = " ".join(tokens).strip()
+    return cleaned
+
+
+def zone_school_names(school_boundary_gdfs):
+    """Distinct school names per school type across the attendance-zone layers."""
+    names = {school_type: set() for school_type in GRADE_CLUSTERS}
+    for i, gdf in enumerate(school_boundary_gdfs):
+        if gdf is None or i >= len(ZONE_NAME_COLUMNS):
+            continue
+        for school_type, column in ZONE_NAME_COLUMNS[i].items():
+            names[school_type].update(str(name) for name in gdf[column].dropna().unique())
+    return {school_type: sorted(values) for school_type, values in names.items()}
+
+
+def source_hash(school_df, school_boundary_gdfs):
+    """Changes whenever the school table or any zone name changes."""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(school_df[["School Name", "Grade Cluster"]], index=True).values.tobytes())
+    digest.update(json.dumps(zone_school_names(school_boundary_gdfs), sort_keys=True).encode())
+    return digest.hexdigest()
+
+######################################################################################################################################
+
+class SchoolNameResolver:
+    """
+    (grade cluster, cleaned name) -> (school_df index label, score), exactly
+    what one process.extractOne call in find_best_match would pick. Names not
+    seen at build time are matched on first use and remembered.
+    """
+
+    def __init__(self, school_df, entries=None, input_hash=None):
+        self.input_hash = input_hash
+        self.entries = dict(entries or {})
+        self._choices = {}
+        for grade_cluster, group in school_df.groupby("Grade Cluster", sort=False):
+            cleaned_map = group["School Name"].apply(preprocess_school_name)
+            # first row per cleaned name, as cleaned_map[cleaned_map == match].index[0] picks
+            first_index = cleaned_map[~cleaned_map.duplicated()]
+            self._choices[grade_cluster] = (cleaned_map.tolist(), dict(zip(first_index.tolist(), first_index.index.tolist())))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def has_cluster(self, grade_cluster):
+        return grade_cluster in self._choices
+
+    def resolve(self, name, grade_cluster):
+        cleaned_input = preprocess_school_name(name)
+        key = (grade_cluster, cleaned_input)
+        if key not in self.entries:
+            cleaned_names, first_index = self._choices[grade_cluster]
+            match, score = process.extractOne(cleaned_input, cleaned_names, scorer=fuzz.token_set_ratio)
+            self.entries[key] = (first_index[match], score)
+        return self.entries[key]
+
+    @classmethod
+    def build(cls, school_df, school_boundary_gdfs):
+        resolver = cls(school_df, input_hash=source_hash(school_df, school_boundary_gdfs))
+        for school_type, names in zone_school_names(school_boundary_gdfs).items():
+            grade_cluster = GRADE_CLUSTERS[school_type]
+            if not resolver.has_cluster(grade_cluster):
+                continue
+            for name in names:
+                resolver.resolve(name, grade_cluster)
+        return resolver
+
+    def save(self, path=DEFAULT_RESOLUTION_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        payload = {
+            "input_hash": self.input_hash,
+            "entries": [[cluster, cleaned, _json_label(index), score] for (cluster, cleaned), (index, score) in self.entries.items()],
+        }
+        # several workers may rebuild at once; the rename keeps readers from seeing half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, school_df):
+        with open(path) as f:
+            payload = json.load(f)
+        entries = {(cluster, cleaned): (index, score) for cluster, cleaned, index, score in payload["entries"]}
+        return cls(school_df, entries=entries, input_hash=payload["input_hash"])
+
+
+def _json_label(label):
+    return label.item() if hasattr(label, "item") else label
+
+
+def load_school_resolver(school_df, school_boundary_gdfs, path=None):
+    """
+    Saved table when it was built from these inputs, otherwise a rebuilt one.
+    Without a path the default table is only read and a rebuild stays in
+    memory; a path given explicitly is rewritten when it is missing or stale.
+    """
+    input_hash = source_hash(school_df, school_boundary_gdfs)
+    read_path = path or DEFAULT_RESOLUTION_PATH
+    if os.path.exists(read_path):
+        resolver = SchoolNameResolver.load(read_path, school_df)
+        if resolver.input_hash == input_hash:
+            return resolver
+        print(f"School name table at {read_path} is stale; rebuilding" + ("" if path else " in memory"))
+    resolver = SchoolNameResolver.build(school_df, school_boundary_gdfs)
+    if path is not None:
+        resolver.save(path)
+    return resolver
+
+
+if __name__ == "__main__":
+    import geopandas as gpd
+
+    from .polygon_raster import SCHOOL_ZONE_FILES
+
+    parser = argparse.ArgumentParser(description="Build the school-name resolution table used by QualityEducation.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Match every attendance-zone school name once and save the table")
+    build.add_argument("--schools", default=DEFAULT_SCHOOL_DF_PATH, help="School performance CSV")
+    build.add_argument("--out", default=DEFAULT_RESOLUTION_PATH, help="Output JSON path")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        school_df = pd.read_csv(args.schools)
+        zones = [gpd.read_file(path) if os.path.exists(path) else None for path in SCHOOL_ZONE_FILES]
+        resolver = SchoolNameResolver.build(school_df, zones)
+        resolver.save(args.out)
+        print(f"Saved {len(resolver)} resolved school names to {args.out}")
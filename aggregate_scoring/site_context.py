@@ -0,0 +1,79 @@
+"""
+Per-site geometry shared across scoring criteria.
+
+Each criterion used to repeat the same lookups for a site: the containing
+tract (Desirable/Undesirable, Stable Communities and Housing Needs), the
+tracts within 402 m, the Web Mercator coordinates, the rural flag and the
+attendance zones. A SiteContext answers each of those once, on first use,
+and every criterion constructed with the same `site_context` kwarg reads
+the memoised answer.
+"""
+from pyproj import Transformer
+from shapely.geometry import Point
+
+from .spatial_index import transform_points
+
+# target CRS -> Transformer from lon/lat, built once per process
+_TRANSFORMERS = {}
+
+def lonlat_transformer(crs):
+    key = str(crs)
+    if key not in _TRANSFORMERS:
+        _TRANSFORMERS[key] = Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+    return _TRANSFORMERS[key]
+
+######################################################################################################################################
+
+class SiteContext:
+    """
+    Lazily resolved geometry for one site. Lookups are keyed by the index
+    object they run against, so criteria built from the same kwargs (and
+    therefore the same cached indexes) share them.
+    """
+
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+        self._memo = {}
+
+    @classmethod
+    def for_site(cls, latitude, longitude, context=None):
+        """The given context when it is for this site, otherwise a fresh one."""
+        if context is not None and context.latitude == latitude and context.longitude == longitude:
+            return context
+        return cls(latitude, longitude)
+
+    def get(self, key, compute):
+        """Memoise any other per-site value (rural flag, tract dict, a criterion's score)."""
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    @property
+    def point(self):
+        return self.get("point", lambda: Point(self.longitude, self.latitude))
+
+    def projected(self, crs):
+        """(x, y) of the site in crs."""
+        return self.get(("projected", str(crs)),
+                        lambda: transform_points(lonlat_transformer(crs), [self.longitude], [self.latitude]))
+
+    def polygon_rows(self, index):
+        """Row positions of every polygon of a PolygonIndex / PolygonRaster containing the site, in row order."""
+        return self.get(("rows", id(index)), lambda: index.query_many([self.latitude], [self.longitude])[1])
+
+    def locate(self, index):
+        """First containing row, -1 outside every polygon (same as index.locate)."""
+        def compute():
+            rows = self._memo.get(("rows", id(index)))
+            if rows is not None:
+                return int(rows[0]) if len(rows) else -1
+            return index.locate(self.latitude, self.longitude)
+        return self.get(("locate", id(index)), compute)
+
+    def nearby_rows(self, index, meters):
+        """Row positions of every BufferQueryIndex polygon meeting the site's buffer."""
+        def compute():
+            xs, ys = self.projected(index.crs)
+            return index.query_projected_many(xs, ys, meters)[1]
+        return self.get(("nearby", id(index), meters), compute)
@@ -0,0 +1,364 @@
+"""
+Spatial indexes shared by the scoring criteria.
+
+Criteria are constructed once per site, so anything expensive is built once
+per source table (see cached_index) and then answers queries for single
+sites or whole arrays of grid points.
+"""
+import math
+import weakref
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import CRS, Transformer
+from scipy.spatial import cKDTree
+from shapely import STRtree
+
+EARTH_RADIUS_MI = 3958.8
+
+######################################################################################################################################
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Same great-circle formula the criteria use, vectorised with numpy."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = np.radians(np.subtract(lat2, lat1))
+    dlambda = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dphi / 2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2)**2
+    return EARTH_RADIUS_MI * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def scalar_haversine_miles(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2)**2
+    return EARTH_RADIUS_MI * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def unit_vectors(lats, lons):
+    """Points on the unit sphere, so KD-tree chord distance orders like great-circle distance."""
+    phi = np.radians(np.asarray(lats, dtype=np.float64))
+    lam = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_phi = np.cos(phi)
+    return np.column_stack([cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)])
+
+
+def chord_for_miles(miles):
+    return 2 * np.sin(np.asarray(miles, dtype=np.float64) / (2 * EARTH_RADIUS_MI))
+
+
+def transform_points(transformer, xs, ys):
+    """
+    transformer.transform over coordinate arrays. A single site is passed as
+    floats: pyproj tries its scalar path first, which reads a one-element
+    array through a conversion NumPy has deprecated.
+    """
+    xs = np.atleast_1d(np.asarray(xs, dtype=np.float64))
+    ys = np.atleast_1d(np.asarray(ys, dtype=np.float64))
+    if len(xs) == 1:
+        x, y = transformer.transform(float(xs[0]), float(ys[0]))
+        return np.array([x]), np.array([y])
+    xs, ys = transformer.transform(xs, ys)
+    return np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+
+
+# (ids of the sources, kind) -> index; entries go away with any of their source objects
+_INDEX_CACHE = {}
+
+def cached_index(source, kind, builder):
+    """
+    Build an index over a kwargs table once per process and hand the same
+    object to every criterion constructed from those kwargs.
+    Tables are treated as read-only once scoring starts.
+
+    source may be a tuple of every object the index is derived from (None
+    entries allowed); the entry is keyed on all of them. Values that cannot
+    be weakly referenced (dicts, numbers) belong in kind instead.
+    """
+    sources = source if isinstance(source, tuple) else (source,)
+    key = (tuple(id(s) for s in sources), kind)
+    if key not in _INDEX_CACHE:
+        _INDEX_CACHE[key] = builder(source)
+        for s in sources:
+            if s is not None:
+                weakref.finalize(s, _INDEX_CACHE.pop, key, None)
+    return _INDEX_CACHE[key]
+
+def prepared_geometry(geom):
+    """
+    Prepare a shapely geometry in place so repeated predicates reuse its
+    internal index. Idempotent; the geometry's value is unchanged.
+    """
+    if geom is not None and not shapely.is_prepared(geom):
+        shapely.prepare(geom)
+    return geom
+
+######################################################################################################################################
+
+class PointIndex:
+    """
+    Great-circle radius queries over a table of lat/lon points. Rows with
+    missing coordinates are never returned, which matches a NaN haversine
+    distance failing every `<=` test.
+
+    Results are row positions into the source arrays plus haversine miles.
+    Distances that land within a hair of the radius are recomputed with the
+    scalar math formula so membership matches the per-row rule exactly.
+    """
+    BOUNDARY_EPS = 1e-9
+
+    def __init__(self, lats, lons):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        self.positions = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+        self.lats = lats
+        self.lons = lons
+        self._tree = cKDTree(unit_vectors(lats[self.positions], lons[self.positions]))
+
+    @classmethod
+    def from_dataframe(cls, df, lat_col="latitude", lon_col="longitude"):
+        return cls(df[lat_col].astype(float).to_numpy(), df[lon_col].astype(float).to_numpy())
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _exact_within(self, site_lats, site_lons, positions, miles, radius_miles):
+        """Re-check distances sitting on the radius with the scalar formula."""
+        keep = miles <= radius_miles
+        borderline = np.flatnonzero(np.abs(miles - radius_miles) <= self.BOUNDARY_EPS)
+        for i in borderline.tolist():
+            exact = scalar_haversine_miles(site_lats[i], site_lons[i], self.lats[positions[i]], self.lons[positions[i]])
+            miles[i] = exact
+            keep[i] = exact <= radius_miles
+        return keep
+
+    def query_radius_many(self, lats, lons, radius_miles):
+        """
+        Points within radius_miles of each site, as flat arrays
+        (site_idx, positions, miles) sorted by site then source row.
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        chord = chord_for_miles(radius_miles) * (1 + 1e-6)
+        hits = self._tree.query_ball_point(unit_vectors(lats, lons), r=chord)
+
+        counts = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+        site_idx = np.repeat(np.arange(len(lats)), counts)
+        if counts.sum() == 0:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, np.array([], dtype=np.float64)
+        positions = self.positions[np.concatenate([np.asarray(h, dtype=np.int64) for h in hits])]
+
+        order = np.lexsort((positions, site_idx))
+        site_idx, positions = site_idx[order], positions[order]
+        miles = haversine_miles(lats[site_idx], lons[site_idx], self.lats[positions], self.lons[positions])
+        keep = self._exact_within(lats[site_idx], lons[site_idx], positions, miles, radius_miles)
+        return site_idx[keep], positions[keep], miles[keep]
+
+    def query_radius(self, lat, lon, radius_miles):
+        """Source rows within radius_miles of one site, in table order, with their distances."""
+        _, positions, miles = self.query_radius_many([lat], [lon], radius_miles)
+        return positions, miles
+
+    def nearest_many(self, lats, lons):
+        """
+        Nearest point to each site as (positions, miles). Chord length orders
+        like great-circle distance, so the tree's nearest is the haversine
+        nearest; miles use the scalar formula. Empty index -> (-1, inf).
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        if len(self.positions) == 0:
+            return np.full(len(lats), -1, dtype=np.int64), np.full(len(lats), np.inf)
+        _, nearest = self._tree.query(unit_vectors(lats, lons), k=1)
+        positions = self.positions[nearest]
+        miles = np.array([scalar_haversine_miles(a, b, self.lats[p], self.lons[p])
+                          for a, b, p in zip(lats.tolist(), lons.tolist(), positions.tolist())], dtype=np.float64)
+        return positions, miles
+
+    def nearest(self, lat, lon):
+        positions, miles = self.nearest_many([lat], [lon])
+        return int(positions[0]), float(miles[0])
+
+######################################################################################################################################
+
+class AmenityIndex:
+    """
+    One KD-tree per amenity type (lower-cased amenity_key) over a desirable
+    activities table. Answers "Manhattan distance to the nearest amenity of
+    each type" for arrays of sites with the same rules as the per-site scan:
+    a bounding box of radius_miles (longitude tolerance scaled by the site's
+    latitude), the 69 mi/degree Manhattan metric using the mean latitude,
+    and a radius_miles cap. Types with nothing in range come back as inf.
+    """
+    MILES_PER_DEG = 69.0
+
+    def __init__(self, df, key_col="amenity_key", lat_col="lat", lon_col="lon", radius_miles=5.0):
+        lats = df[lat_col].astype(float).to_numpy()
+        lons = df[lon_col].astype(float).to_numpy()
+        keys = df[key_col].str.lower()
+        valid = keys.notna().to_numpy() & np.isfinite(lats) & np.isfinite(lons)
+
+        self.radius_miles = radius_miles
+        self.coords = {}
+        self.trees = {}
+        for key, rows in pd.Series(np.flatnonzero(valid)).groupby(keys[valid].to_numpy()):
+            coords = np.column_stack([lats[rows.to_numpy()], lons[rows.to_numpy()]])
+            self.coords[key] = coords
+            self.trees[key] = cKDTree(coords)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        return cls(df)
+
+    @property
+    def amenity_types(self):
+        return list(self.trees)
+
+    def nearest_distances(self, lats, lons, amenity_types):
+        """(n_sites, n_types) matrix of capped Manhattan distances in miles."""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        out = np.full((len(lats), len(amenity_types)), np.inf)
+
+        lat_tol = self.radius_miles / self.MILES_PER_DEG
+        lon_tol = np.array([self.radius_miles / (self.MILES_PER_DEG * math.cos(math.radians(lat))) for lat in lats.tolist()])
+        # Chebyshev ball that contains each site's bounding box
+        search_r = np.maximum(lat_tol, lon_tol) * (1 + 1e-9)
+        sites = np.column_stack([lats, lons])
+
+        for col, key in enumerate(amenity_types):
+            tree = self.trees.get(key)
+            if tree is None:
+                continue
+            hits = tree.query_ball_point(sites, r=search_r, p=np.inf)
+            counts = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+            if counts.sum() == 0:
+                continue
+            site_idx = np.repeat(np.arange(len(lats)), counts)
+            rows = np.concatenate([np.asarray(h, dtype=np.int64) for h in hits])
+            a_lat, a_lon = self.coords[key][rows, 0], self.coords[key][rows, 1]
+            s_lat, s_lon = lats[site_idx], lons[site_idx]
+
+            in_box = ((a_lat >= s_lat - lat_tol) & (a_lat <= s_lat + lat_tol) &
+                      (a_lon >= s_lon - lon_tol[site_idx]) & (a_lon <= s_lon + lon_tol[site_idx]))
+            lat_diff = np.abs(a_lat - s_lat) * self.MILES_PER_DEG
+            lon_diff = np.abs(a_lon - s_lon) * self.MILES_PER_DEG * np.cos(np.radians((a_lat + s_lat) / 2))
+            distance = lat_diff + lon_diff
+            keep = in_box & (distance <= self.radius_miles)
+
+            np.minimum.at(out[:, col], site_idx[keep], distance[keep])
+        return out
+
+######################################################################################################################################
+
+class PolygonIndex:
+    """
+    Point-in-polygon lookups over a GeoDataFrame. Query points are lat/lon
+    and are projected into the layer's CRS. A point counts when it is
+    "within" a polygon, same as gpd.sjoin(predicate="within"). Points on a
+    shared edge therefore match neither side.
+
+    The STRtree narrows each point to the polygons whose envelope holds it,
+    and shapely.contains_xy tests those pairs against the prepared polygons
+    in one vectorised call.
+    """
+
+    def __init__(self, gdf):
+        self.gdf = gdf
+        self.crs = gdf.crs
+        self.geoms = np.asarray(gdf.geometry.values)
+        self.tree = STRtree(self.geoms)
+        shapely.prepare(self.geoms[~shapely.is_missing(self.geoms)])
+        if self.crs is None or CRS.from_user_input(self.crs).equals(CRS.from_epsg(4326)):
+            self._to_layer = None
+        else:
+            self._to_layer = Transformer.from_crs("EPSG:4326", self.crs, always_xy=True)
+
+    @classmethod
+    def from_geodataframe(cls, gdf):
+        return cls(gdf)
+
+    @classmethod
+    def from_geometry(cls, geom, crs="EPSG:4326"):
+        """One row per part of a (multi)polygon, e.g. a dissolved union; any row hit means inside geom."""
+        return cls(gpd.GeoDataFrame(geometry=shapely.get_parts(geom), crs=crs))
+
+    def __len__(self):
+        return len(self.gdf)
+
+    def project(self, lats, lons):
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        if self._to_layer is None:
+            return lons, lats
+        return transform_points(self._to_layer, lons, lats)
+
+    def contains_xy(self, xs, ys):
+        """Every (point, polygon row) pair with the point inside the polygon, for points in the layer CRS."""
+        xs = np.atleast_1d(np.asarray(xs, dtype=np.float64))
+        ys = np.atleast_1d(np.asarray(ys, dtype=np.float64))
+        point_idx, poly_idx = self.tree.query(shapely.points(xs, ys))
+        inside = shapely.contains_xy(self.geoms[poly_idx], xs[point_idx], ys[point_idx])
+        point_idx, poly_idx = point_idx[inside], poly_idx[inside]
+        order = np.lexsort((poly_idx, point_idx))
+        return point_idx[order].astype(np.int64), poly_idx[order].astype(np.int64)
+
+    def query_many(self, lats, lons):
+        """Every (point, polygon row) containment pair, sorted by point then row."""
+        return self.contains_xy(*self.project(lats, lons))
+
+    def locate_many(self, lats, lons):
+        """
+        Row position of the polygon containing each point, -1 where none does.
+        Overlapping polygons resolve to the first row in table order.
+        """
+        point_idx, poly_idx = self.query_many(lats, lons)
+        located = np.full(len(np.atleast_1d(lats)), -1, dtype=np.int64)
+        if len(point_idx):
+            first = np.unique(point_idx, return_index=True)[1]
+            located[point_idx[first]] = poly_idx[first]
+        return located
+
+    def locate(self, lat, lon):
+        return int(self.locate_many([lat], [lon])[0])
+
+######################################################################################################################################
+
+class BufferQueryIndex:
+    """
+    Polygons meeting a metre buffer around lat/lon points. The layer is
+    projected once (Web Mercator by default, which is what the criteria have
+    always buffered in) and held in an STRtree.
+    """
+
+    def __init__(self, gdf, crs="EPSG:3857"):
+        self.gdf = gdf
+        self.crs = crs
+        self.geoms = np.asarray(gdf.to_crs(crs).geometry.values)
+        self.tree = STRtree(self.geoms)
+        self._to_projected = Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+
+    @classmethod
+    def from_geodataframe(cls, gdf):
+        return cls(gdf)
+
+    def __len__(self):
+        return len(self.gdf)
+
+    def query_many(self, lats, lons, meters):
+        """Every (point, polygon row) pair where the polygon intersects the buffer, sorted by point then row."""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        return self.query_projected_many(*transform_points(self._to_projected, lons, lats), meters)
+
+    def query_projected_many(self, xs, ys, meters):
+        """query_many for points already in the index CRS."""
+        # quad_segs=16 is the Point.buffer / GeoSeries.buffer default
+        buffers = shapely.buffer(shapely.points(xs, ys), meters, quad_segs=16)
+        point_idx, poly_idx = self.tree.query(buffers, predicate="intersects")
+        order = np.lexsort((poly_idx, point_idx))
+        return point_idx[order].astype(np.int64), poly_idx[order].astype(np.int64)
@@ -0,0 +1,166 @@
+"""
+Exact Stable Communities score surface.
+
+A site's Stable Communities score depends only on the tract containing it
+and the tracts within 402 m of it, and both are constant between tract edges
+and the edges of the tracts' 402 m buffers. Noding all of those edges and
+polygonizing gives faces with one (actual tract, nearby tracts) answer each;
+every face carries its StableCommunities score. The result is a vector map
+layer and a lookup table: a point is scored by finding its face.
+
+    python -m aggregate_scoring.stable_surface build
+
+Faces are built in EPSG:3857, where the criterion has always buffered. The
+point buffer and the tract buffers approximate circles slightly differently
+(well under a metre), so points within TOLERANCE_M of a face edge are left
+to the exact per-site path.
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
+
+from .spatial_index import transform_points
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+
+DEFAULT_STABLE_SURFACE_PATH = os.path.join(PROJECT_ROOT, "data/maps/stable_communities/stable_communities_surface.parquet")
+INDICATORS_PATH = os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/stable_communities/stable_communities_2024_processed_v3.csv")
+TRACT_SHAPEFILE = os.path.join(PROJECT_ROOT, "data/raw/shapefiles/tl_2024_13_tract/tl_2024_13_tract.shp")
+
+SURFACE_CRS = "EPSG:3857"
+
+######################################################################################################################################
+
+def surface_hash(indicators_df, tracts_shp):
+    from .aggregate_scoring import StableCommunities
+
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(indicators_df[["2020 Census Tract"] + StableCommunities.INDICATORS].astype(str), index=False).values.tobytes())
+    digest.update(pd.util.hash_pandas_object(tracts_shp["GEOID"].astype(str), index=True).values.tobytes())
+    digest.update(b"".join(shapely.to_wkb(np.asarray(tracts_shp.geometry.values))))
+    return digest.hexdigest()
+
+
+def build_stable_surface(indicators_df, tracts_shp):
+    """Scored faces of the tract / 402 m buffer arrangement, in EPSG:3857."""
+    from .aggregate_scoring import StableCommunities
+
+    # containment is tested on tracts_shp's own straight edges, the buffer on the projected ones;
+    # densifying before projecting keeps the former straight to within millimetres in 3857
+    tract_edges = shapely.boundary(np.asarray(gpd.GeoSeries(
+        shapely.segmentize(np.asarray(tracts_shp.geometry.values), 0.001), crs=tracts_shp.crs).to_crs(SURFACE_CRS).values))
+    buffers = shapely.buffer(np.asarray(tracts_shp.to_crs(SURFACE_CRS).geometry.values), StableCommunities.NEARBY_METERS, quad_segs=16)
+    noded = shapely.union_all(np.concatenate([tract_edges, shapely.boundary(buffers)]))
+    faces = np.asarray(shapely.get_parts(shapely.polygonize(shapely.get_parts(noded))))
+
+    # score each face at an interior point through the per-site path
+    anchors = shapely.point_on_surface(faces)
+    lons, lats = Transformer.from_crs(SURFACE_CRS, "EPSG:4326", always_xy=True).transform(shapely.get_x(anchors), shapely.get_y(anchors))
+    criterion = StableCommunities(0, 0, indicators_df=indicators_df, tracts_shp=tracts_shp, tract_dict={})
+    tract_index, nearby_index = criterion.get_tract_indexes()
+    tract_dicts = StableCommunities.find_census_tracts_many(lats, lons, tract_index, nearby_index)
+    masks = StableCommunities.tract_masks_many(tract_dicts, criterion.get_indicator_masks())
+    *_, actual_only_score, nearby_score = StableCommunities.score_masks(*masks)
+
+    keep = np.array([bool(tract_dict) for tract_dict in tract_dicts], dtype=bool)
+    surface = gpd.GeoDataFrame({
+        "actual_tract": [tract_dict.get("actual") for tract_dict in tract_dicts],
+        "nearby_tracts": ["; ".join(str(t) for k, t in tract_dict.items() if k != "actual") for tract_dict in tract_dicts],
+        "score": np.maximum(actual_only_score, nearby_score),
+    }, geometry=faces, crs=SURFACE_CRS)[keep].reset_index(drop=True)
+    surface.attrs["input_hash"] = surface_hash(indicators_df, tracts_shp)
+    return surface
+
+
+def save_stable_surface(surface, path=DEFAULT_STABLE_SURFACE_PATH):
+    """GeoParquet in EPSG:3857, or GeoJSON (written as EPSG:4326), plus a <path>.json header."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith(".parquet"):
+        surface.to_parquet(path)
+    else:
+        surface.to_crs("EPSG:4326").to_file(path)
+    with open(path + ".json", "w") as f:
+        json.dump({"input_hash": surface.attrs.get("input_hash"), "faces": len(surface)}, f)
+
+######################################################################################################################################
+
+class StableSurface:
+    """Point lookups into a scored surface; NaN where the exact path must decide."""
+    TOLERANCE_M = 1.0
+
+    def __init__(self, surface):
+        self.surface = surface.to_crs(SURFACE_CRS)
+        self.faces = np.asarray(self.surface.geometry.values)
+        self.scores = self.surface["score"].to_numpy(dtype=np.float64)
+        self.tree = shapely.STRtree(self.faces)
+        self._to_surface = Transformer.from_crs("EPSG:4326", SURFACE_CRS, always_xy=True)
+
+    def __len__(self):
+        return len(self.faces)
+
+    def scores_many(self, lats, lons):
+        return self.scores_projected_many(*transform_points(self._to_surface, lons, lats))
+
+    def scores_projected_many(self, xs, ys):
+        """scores_many for points already in SURFACE_CRS."""
+        xs = np.atleast_1d(np.asarray(xs, dtype=np.float64))
+        ys = np.atleast_1d(np.asarray(ys, dtype=np.float64))
+        points = shapely.points(xs, ys)
+        point_idx, face_idx = self.tree.query(points, predicate="dwithin", distance=self.TOLERANCE_M)
+        near_faces = np.bincount(point_idx, minlength=len(points))
+
+        # nothing within reach of any face: no tract and no tract within 402 m
+        scores = np.where(near_faces == 0, 0.0, np.nan)
+        single = near_faces[point_idx] == 1
+        point_idx, face_idx = point_idx[single], face_idx[single]
+        clear = (shapely.contains_xy(self.faces[face_idx], xs[point_idx], ys[point_idx]) &
+                 (shapely.distance(points[point_idx], shapely.boundary(self.faces[face_idx])) > self.TOLERANCE_M))
+        scores[point_idx[clear]] = self.scores[face_idx[clear]]
+        return scores
+
+
+# One surface per file per process
+_LOADED_SURFACES = {}
+
+def load_stable_surface(path=DEFAULT_STABLE_SURFACE_PATH, input_hash=None):
+    """Saved surface, or None when it is missing or was built from other inputs."""
+    path = os.path.abspath(path)
+    if path not in _LOADED_SURFACES:
+        if not os.path.exists(path):
+            return None
+        surface = gpd.read_parquet(path) if path.endswith(".parquet") else gpd.read_file(path)
+        header_path = path + ".json"
+        stored_hash = None
+        if os.path.exists(header_path):
+            with open(header_path) as f:
+                stored_hash = json.load(f).get("input_hash")
+        _LOADED_SURFACES[path] = (StableSurface(surface), stored_hash)
+    surface, stored_hash = _LOADED_SURFACES[path]
+    if input_hash is not None and stored_hash != input_hash:
+        print(f"Warning: Stable Communities surface at {path} was built from different inputs; ignoring it")
+        return None
+    return surface
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the exact Stable Communities score surface.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Overlay tracts with their 402 m buffers and score every face")
+    build.add_argument("--indicators", default=INDICATORS_PATH, help="Processed stable communities indicator CSV")
+    build.add_argument("--tracts", default=TRACT_SHAPEFILE, help="Census tract shapefile")
+    build.add_argument("--out", default=DEFAULT_STABLE_SURFACE_PATH, help="Output path (.parquet or .geojson)")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        surface = build_stable_surface(pd.read_csv(args.indicators), gpd.read_file(args.tracts).to_crs("EPSG:4326"))
+        save_stable_surface(surface, args.out)
+        print(f"Saved {len(surface)} scored faces to {args.out}")
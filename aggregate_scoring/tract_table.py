@@ -0,0 +1,168 @@
+"""
+Tract-level scoring table.
+
+Several criteria only need the tract a site falls in: the actual-tract part
+of Stable Communities, the USDA food-desert flag, and all of Housing Needs.
+This computes every tract-only quantity once for the ~2,800 Georgia tracts
+and stores them keyed by GEOID, so those criteria become a dictionary read
+after the point-in-tract lookup:
+
+    python -m aggregate_scoring.tract_table build
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+
+DEFAULT_TRACT_TABLE_PATH = os.path.join(PROJECT_ROOT, "data/processed/tract_table/georgia_tract_table.parquet")
+HOUSING_DATA_PATHS = [
+    os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/housing_needs_characteristics/merged_housing_data.csv"),
+    os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/housing_needs_characteristics/merged_housing_data_v2.csv"),
+]
+INDICATORS_PATH = os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/stable_communities/stable_communities_2024_processed_v3.csv")
+USDA_PATH = os.path.join(PROJECT_ROOT, "data/raw/scoring_indicators/desirable_undesirable_activities/usda/food_access_research_atlas.csv")
+
+# HousingNeedsCharacteristics record keys -> source columns (fractions in the CSVs, percentages in the QAP)
+SEVERE_HOUSING_KEY = "% of rental units occupied by 80% AMI and below with Severe Housing Problems"
+POP_GREW_KEY = "Is 2021 greater than 2011?"
+POP_GROWTH_KEY = "Average: YoY Growth 2018-2021"
+EMP_GROWTH_KEY = "Average change: 2020-2022"
+IN_QCT_KEY = "In QCT"
+
+######################################################################################################################################
+
+def _percent(series):
+    return pd.to_numeric(series, errors="coerce") * 100
+
+
+def _yes_no(series):
+    return series.astype(str).str.strip().str.lower().map({"yes": True, "no": False})
+
+
+def housing_tract_frame(*housing_dfs):
+    """
+    merged_housing_data*.csv in either layout -> one row per GEOID with the
+    HousingNeedsCharacteristics record keys. Later frames win where both
+    have a value.
+    """
+    frames = []
+    for df in housing_dfs:
+        out = pd.DataFrame(index=df["2020 Census Tract"].astype(str).to_numpy())
+        if SEVERE_HOUSING_KEY in df.columns:
+            out[SEVERE_HOUSING_KEY] = _percent(df[SEVERE_HOUSING_KEY]).to_numpy()
+        elif "pct_severe_housing_problems" in df.columns:
+            out[SEVERE_HOUSING_KEY] = _percent(df["pct_severe_housing_problems"]).to_numpy()
+        if "pop_2021_gt_2011" in df.columns:
+            out[POP_GREW_KEY] = _yes_no(df["pop_2021_gt_2011"]).to_numpy()
+        if "avg_pop_yoy_growth_2018_2021" in df.columns:
+            out[POP_GROWTH_KEY] = _percent(df["avg_pop_yoy_growth_2018_2021"]).to_numpy()
+        if "avg_emp_growth_2020_2022" in df.columns:
+            out[EMP_GROWTH_KEY] = _percent(df["avg_emp_growth_2020_2022"]).to_numpy()
+        if "qct?" in df.columns:
+            out[IN_QCT_KEY] = _yes_no(df["qct?"]).to_numpy()
+        frames.append(out[~out.index.duplicated(keep="first")])
+
+    combined = frames[0] if frames else pd.DataFrame()
+    for frame in frames[1:]:
+        combined = frame.combine_first(combined)
+    return combined.astype(object)
+
+
+def housing_records(*housing_dfs):
+    """GEOID -> record dict; missing values are left out so the criterion's .get defaults apply."""
+    frame = housing_tract_frame(*housing_dfs)
+    return {geoid: {key: value for key, value in row.items() if not pd.isna(value)}
+            for geoid, row in zip(frame.index, frame.to_dict("records"))}
+
+######################################################################################################################################
+
+class TractTable:
+    """Per-GEOID housing record, Stable Communities indicator mask and USDA flag."""
+
+    def __init__(self, table):
+        self.table = table
+        housing_columns = [c for c in (SEVERE_HOUSING_KEY, POP_GREW_KEY, POP_GROWTH_KEY, EMP_GROWTH_KEY, IN_QCT_KEY) if c in table.columns]
+        self.housing = {geoid: {key: value for key, value in row.items() if not pd.isna(value)}
+                        for geoid, row in zip(table.index, table[housing_columns].to_dict("records"))}
+        masks = table["indicator_mask"].dropna()
+        self.indicator_masks = pd.Series(masks.to_numpy(dtype=np.uint8), index=masks.index)
+        self.food_desert_flags = table["LILATracts_1And10"].dropna().to_dict()
+
+    def __len__(self):
+        return len(self.table)
+
+    @classmethod
+    def build(cls, housing_dfs, indicators_df, usda_df):
+        from .aggregate_scoring import DesirableUndesirableActivities, StableCommunities
+
+        housing = housing_tract_frame(*housing_dfs)
+        masks = StableCommunities.build_indicator_masks(indicators_df).rename("indicator_mask")
+        lila = pd.Series(DesirableUndesirableActivities.build_food_desert_flags(usda_df), name="LILATracts_1And10", dtype=object)
+
+        table = housing.join(masks.astype("Int64"), how="outer").join(lila, how="outer")
+        table.index.name = "GEOID"
+        return cls(table)
+
+    def save(self, path=DEFAULT_TRACT_TABLE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        table = self.table.copy()
+        for column in (POP_GREW_KEY, IN_QCT_KEY):
+            if column in table.columns:
+                table[column] = table[column].astype("boolean")
+        for column in (SEVERE_HOUSING_KEY, POP_GROWTH_KEY, EMP_GROWTH_KEY):
+            if column in table.columns:
+                table[column] = table[column].astype(float)
+        table["LILATracts_1And10"] = table["LILATracts_1And10"].astype(str).where(table["LILATracts_1And10"].notna())
+        table.to_parquet(path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_TRACT_TABLE_PATH):
+        table = pd.read_parquet(path).astype(object)
+        table = table.where(table.notna(), None)
+        # the USDA flag was stored as text; the criteria compare against 1 / True / '1'
+        table["LILATracts_1And10"] = table["LILATracts_1And10"].map(lambda flag: None if flag is None else (int(flag) if str(flag).isdigit() else flag))
+        return cls(table)
+
+    def housing_record(self, geoid):
+        return self.housing.get(geoid, {})
+
+
+# One table per file per process
+_LOADED_TABLES = {}
+
+def load_tract_table(path=DEFAULT_TRACT_TABLE_PATH):
+    path = os.path.abspath(path)
+    if path not in _LOADED_TABLES:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Tract table not found at {path}; build it with `python -m aggregate_scoring.tract_table build`")
+        _LOADED_TABLES[path] = TractTable.load(path)
+    return _LOADED_TABLES[path]
+
+
+def resolve_tract_table(tract_table):
+    """kwargs value -> TractTable: a loaded table, a path to one, or None."""
+    if tract_table is None or isinstance(tract_table, TractTable):
+        return tract_table
+    return load_tract_table(tract_table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize every tract-only scoring quantity once per Georgia tract.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Build the tract table from the housing, stable communities and USDA tables")
+    build.add_argument("--out", default=DEFAULT_TRACT_TABLE_PATH, help="Output .parquet path")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        table = TractTable.build(
+            [pd.read_csv(path) for path in HOUSING_DATA_PATHS if os.path.exists(path)],
+            pd.read_csv(INDICATORS_PATH),
+            pd.read_csv(USDA_PATH, dtype={"CensusTract": str}),
+        )
+        table.save(args.out)
+        print(f"Saved {len(table)} tracts to {args.out}")
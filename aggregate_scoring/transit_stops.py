@@ -0,0 +1,132 @@
+"""
+Transit stop table preprocessing for Community Transportation Options.
+
+The Google Places sweep (phase1_get_trans_google.ipynb) queries six transit
+place types separately on overlapping 2 km circles, so one physical stop
+shows up many times. Every copy used to cost its own walking-distance
+computation. This collapses stops within a few metres of each other into
+one row, ORs their hub flags and writes the compact table the scoring class
+and the data bundle load by default (the raw table until it has been built):
+
+    python -m aggregate_scoring.transit_stops dedupe
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from .spatial_index import PointIndex, chord_for_miles, unit_vectors
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+
+RAW_TRANSIT_PATH = os.path.join(PROJECT_ROOT, "data/raw/scoring_indicators/community_trans_options_sites/georgia_transit_locations_with_hub.csv")
+DEFAULT_TRANSIT_STOPS_PATH = os.path.join(PROJECT_ROOT, "data/processed/scoring_indicators/community_transportation_options/georgia_transit_stops_dedup.csv")
+
+DEDUP_RADIUS_M = 5.0
+METERS_PER_MILE = 1609.344
+
+######################################################################################################################################
+
+def deduplicate_stops(transit_df, radius_m=DEDUP_RADIUS_M):
+    """
+    Clusters of stops that are all within radius_m of each other (complete
+    linkage, so a chain of close stops never merges ends that are further
+    apart). Clusters grow greedily in table order: the first unassigned row
+    is the representative and takes each unassigned neighbour, in table
+    order, that is within radius_m of every member so far. is_potential_hub
+    is ORed across the cluster and merged_count records how many rows it
+    replaced. Rows with missing coordinates are dropped (they never score).
+    """
+    df = transit_df.dropna(subset=["latitude", "longitude"]).reset_index(drop=True)
+    if df.empty:
+        return df.assign(merged_count=pd.Series(dtype=np.int64))
+
+    points = unit_vectors(df["latitude"].to_numpy(), df["longitude"].to_numpy())
+    chord = float(chord_for_miles(radius_m / METERS_PER_MILE))
+    neighbours = cKDTree(points).query_ball_point(points, r=chord)
+    cluster = np.full(len(df), -1, dtype=np.int64)
+    for i in range(len(df)):
+        if cluster[i] >= 0:
+            continue
+        cluster[i] = i
+        members = [i]
+        for j in sorted(neighbours[i]):
+            if cluster[j] < 0 and (np.linalg.norm(points[members] - points[j], axis=1) <= chord).all():
+                cluster[j] = i
+                members.append(j)
+
+    # same truthiness as apply_qap_scoring's `if r['is_potential_hub']`
+    is_hub = pd.Series(df["is_potential_hub"].astype(bool).to_numpy()).groupby(cluster).any()
+    merged_count = pd.Series(cluster).value_counts().sort_index()
+
+    first_rows = pd.Series(np.arange(len(df))).groupby(cluster).first()
+    deduped = df.iloc[first_rows.to_numpy()].copy()
+    deduped["is_potential_hub"] = is_hub.loc[cluster[first_rows.to_numpy()]].to_numpy()
+    deduped["merged_count"] = merged_count.loc[cluster[first_rows.to_numpy()]].to_numpy()
+    return deduped.reset_index(drop=True)
+
+
+def dedup_report(original_df, deduped_df, site_lats, site_lons, radius_miles=1.1):
+    """How much deduplication shrank the table and the per-site candidate lists."""
+    before = PointIndex.from_dataframe(original_df).query_radius_many(site_lats, site_lons, radius_miles)[0]
+    after = PointIndex.from_dataframe(deduped_df).query_radius_many(site_lats, site_lons, radius_miles)[0]
+    n_sites = len(site_lats)
+    return {
+        "rows_before": len(original_df),
+        "rows_after": len(deduped_df),
+        "row_reduction_pct": 100 * (1 - len(deduped_df) / max(len(original_df), 1)),
+        "hubs_after": int(deduped_df["is_potential_hub"].sum()),
+        "sites": n_sites,
+        "mean_candidates_before": len(before) / max(n_sites, 1),
+        "mean_candidates_after": len(after) / max(n_sites, 1),
+        "max_candidates_before": int(np.bincount(before, minlength=n_sites).max(initial=0)),
+        "max_candidates_after": int(np.bincount(after, minlength=n_sites).max(initial=0)),
+    }
+
+######################################################################################################################################
+
+# One copy of the stop table per process
+_LOADED_STOPS = {}
+
+def load_transit_stops(path=None):
+    """The deduplicated stop table, or the raw phase 1 table until it has been built."""
+    if path is None:
+        path = DEFAULT_TRANSIT_STOPS_PATH if os.path.exists(DEFAULT_TRANSIT_STOPS_PATH) else RAW_TRANSIT_PATH
+    path = os.path.abspath(path)
+    if path not in _LOADED_STOPS:
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Transit stops not found at {path}; build them with "
+                f"`python -m aggregate_scoring.transit_stops dedupe` or pass transit_df")
+        _LOADED_STOPS[path] = pd.read_csv(path)
+    return _LOADED_STOPS[path]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate the Google Places transit stop table.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    dedupe = subparsers.add_parser("dedupe", help="Merge stops within a few metres and write the compact table")
+    dedupe.add_argument("source", nargs="?", default=RAW_TRANSIT_PATH, help="Raw transit CSV from phase 1")
+    dedupe.add_argument("out", nargs="?", default=DEFAULT_TRANSIT_STOPS_PATH, help="Output CSV path")
+    dedupe.add_argument("--radius-m", type=float, default=DEDUP_RADIUS_M, help="Merge distance in metres")
+    dedupe.add_argument("--sites", help="Optional CSV of latitude/longitude sites for the candidate-count report")
+
+    args = parser.parse_args()
+    if args.command == "dedupe":
+        raw = pd.read_csv(args.source)
+        deduped = deduplicate_stops(raw, radius_m=args.radius_m)
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        deduped.to_csv(args.out, index=False)
+
+        if args.sites:
+            sites = pd.read_csv(args.sites)
+        else:
+            # transit-dense locations are where duplicate candidates hurt most
+            sites = deduped.sample(n=min(500, len(deduped)), random_state=0)
+        report = dedup_report(raw, deduped, sites["latitude"].to_numpy(), sites["longitude"].to_numpy())
+        for key, value in report.items():
+            print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
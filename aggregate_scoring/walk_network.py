@@ -0,0 +1,494 @@
+"""
+Local walk-network store for Community Transportation Options.
+
+The scoring grid runs without outbound network access, so instead of asking
+Overpass for a fresh graph on every call the walk network for the scoring
+region is built once from a local OSM XML extract (already filtered to
+walkable ways) or a GraphML file, saved as plain numpy arrays, and loaded
+once per process:
+
+    python -m aggregate_scoring.walk_network build metro_atl_walk.graphml
+
+Routing runs either through networkx or, for grid workers, through a compact
+CSR adjacency (float32 lengths) with scipy's compiled Dijkstra:
+
+    python -m aggregate_scoring.walk_network validate --sample 200
+
+For grid runs the problem is turned around: two multi-source Dijkstras from
+every stop and every potential hub give each node its walking distance to the
+nearest of each, so scoring a point is a snap plus two array reads:
+
+    python -m aggregate_scoring.walk_network build-field georgia_transit_locations_with_hub.csv
+
+A statewide network does not fit in one worker, so it can also be split into
+fixed-size tiles (each with a halo wide enough for any scoring route) that
+are loaded on demand and evicted least-recently-used under a memory budget:
+
+    python -m aggregate_scoring.walk_network build-tiles --store georgia_walk_network.npz
+"""
+import argparse
+import json
+import math
+import os
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+import osmnx as ox
+import pandas as pd
+from scipy.sparse import coo_matrix, triu
+from scipy.sparse.csgraph import connected_components, dijkstra
+from scipy.spatial import cKDTree
+
+from .spatial_index import unit_vectors
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+
+DEFAULT_WALK_NETWORK_PATH = os.path.join(PROJECT_ROOT, "data/processed/walk_network/metro_atl_walk_network.npz")
+DEFAULT_TRANSIT_FIELD_PATH = os.path.join(PROJECT_ROOT, "data/processed/walk_network/metro_atl_transit_distance_field.npz")
+DEFAULT_TILE_DIR = os.path.join(PROJECT_ROOT, "data/processed/walk_network/georgia_tiles")
+
+# Georgia bbox used by the transit stop sweep (phase1_get_trans_google.ipynb)
+GEORGIA_MIN_LAT, GEORGIA_MAX_LAT = 30.35, 35.00
+GEORGIA_MIN_LON, GEORGIA_MAX_LON = -85.60, -80.84
+
+EARTH_RADIUS_M = 6371009
+
+######################################################################################################################################
+
+class WalkNetwork:
+    """
+    Undirected walk network held as flat arrays: node coordinates plus one
+    row per street segment (node index pair and length in meters).
+
+    Two routing engines share the same snapping:
+      "networkx": Dijkstra over an nx.Graph built from the edge list
+      "csr":      scipy.sparse.csgraph Dijkstra over a CSR adjacency with
+                  float32 lengths; call compact() to drop everything else
+    """
+    MAX_SNAP_METERS = 250  # points further than this from any node are off the network
+
+    def __init__(self, node_ids, lats, lons, edge_u, edge_v, edge_length, components=None):
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.edge_u = np.asarray(edge_u, dtype=np.int32)
+        self.edge_v = np.asarray(edge_v, dtype=np.int32)
+        self.edge_length = np.asarray(edge_length, dtype=np.float64)
+        self._graph = None
+        self._csr = None
+        # labels carried over from a larger network (tiles), so "no path" means no path in the full graph
+        self._components = None if components is None else np.asarray(components, dtype=np.int32)
+        self._kdtree = None
+
+    @classmethod
+    def from_graph(cls, G):
+        """Flatten an osmnx graph, keeping the shortest of any parallel edges."""
+        node_ids = np.fromiter(G.nodes, dtype=np.int64, count=G.number_of_nodes())
+        position = {node: i for i, node in enumerate(node_ids)}
+        lats = np.array([G.nodes[node]["y"] for node in node_ids], dtype=np.float64)
+        lons = np.array([G.nodes[node]["x"] for node in node_ids], dtype=np.float64)
+
+        shortest = {}
+        for u, v, data in G.edges(data=True):
+            if u == v:
+                continue
+            a, b = sorted((position[u], position[v]))
+            length = float(data["length"])
+            if length < shortest.get((a, b), math.inf):
+                shortest[(a, b)] = length
+
+        pairs = np.array(list(shortest.keys()), dtype=np.int32).reshape(-1, 2)
+        lengths = np.fromiter(shortest.values(), dtype=np.float64, count=len(shortest))
+        return cls(node_ids, lats, lons, pairs[:, 0], pairs[:, 1], lengths)
+
+    @classmethod
+    def from_file(cls, source_path):
+        """Build from a GraphML file or an OSM XML extract of walkable ways."""
+        if source_path.lower().endswith(".graphml"):
+            G = ox.load_graphml(source_path)
+        else:
+            G = ox.graph_from_xml(source_path, bidirectional=True, simplify=True, retain_all=False)
+        return cls.from_graph(G)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        arrays = dict(node_ids=self.node_ids, lats=self.lats, lons=self.lons,
+                      edge_u=self.edge_u, edge_v=self.edge_v, edge_length=self.edge_length)
+        if self._components is not None:
+            arrays["components"] = self._components
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["node_ids"], data["lats"], data["lons"],
+                       data["edge_u"], data["edge_v"], data["edge_length"],
+                       components=data["components"] if "components" in data.files else None)
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def nbytes(self):
+        """Approximate resident size of the arrays, CSR matrix and KD-tree."""
+        arrays = [self.node_ids, self.lats, self.lons, self.edge_u, self.edge_v, self.edge_length]
+        total = sum(a.nbytes for a in arrays if a is not None)
+        if self._csr is not None:
+            total += self._csr.data.nbytes + self._csr.indices.nbytes + self._csr.indptr.nbytes
+        if self._components is not None:
+            total += self._components.nbytes
+        if self._kdtree is not None:
+            total += self.num_nodes * (3 * 8 + 8)
+        return total
+
+    def subset(self, min_lat, max_lat, min_lon, max_lon):
+        """Nodes inside the box and the edges between them, re-indexed, keeping this network's component labels."""
+        keep = (self.lats >= min_lat) & (self.lats <= max_lat) & (self.lons >= min_lon) & (self.lons <= max_lon)
+        position = np.full(self.num_nodes, -1, dtype=np.int64)
+        position[keep] = np.arange(keep.sum())
+        edges = keep[self.edge_u] & keep[self.edge_v]
+        return WalkNetwork(self.node_ids[keep], self.lats[keep], self.lons[keep],
+                           position[self.edge_u[edges]], position[self.edge_v[edges]], self.edge_length[edges],
+                           components=self.components[keep])
+
+    @property
+    def graph(self):
+        """networkx view of the store, keyed by node position."""
+        if self._graph is None:
+            G = nx.Graph()
+            G.add_nodes_from(range(self.num_nodes))
+            if self.edge_length is not None:
+                edges = zip(self.edge_u.tolist(), self.edge_v.tolist(), self.edge_length.tolist())
+            else:
+                upper = triu(self.csr).tocoo()
+                edges = zip(upper.row.tolist(), upper.col.tolist(), upper.data.tolist())
+            G.add_weighted_edges_from(edges, weight="length")
+            self._graph = G
+        return self._graph
+
+    @property
+    def csr(self):
+        """Symmetric CSR adjacency: int32 indices, float32 lengths in meters."""
+        if self._csr is None:
+            rows = np.concatenate([self.edge_u, self.edge_v])
+            cols = np.concatenate([self.edge_v, self.edge_u])
+            lengths = np.concatenate([self.edge_length, self.edge_length]).astype(np.float32)
+            csr = coo_matrix((lengths, (rows, cols)), shape=(self.num_nodes, self.num_nodes)).tocsr()
+            csr.indices = csr.indices.astype(np.int32, copy=False)
+            csr.indptr = csr.indptr.astype(np.int32, copy=False)
+            self._csr = csr
+        return self._csr
+
+    def compact(self):
+        """Keep only the CSR adjacency and coordinate arrays (the grid-worker footprint)."""
+        self.csr
+        self.edge_u = self.edge_v = self.edge_length = None
+        self._graph = None
+        return self
+
+    @property
+    def components(self):
+        """Connected-component label per node, so 'no path' checks are O(1)."""
+        if self._components is None:
+            _, labels = connected_components(self.csr, directed=False)
+            self._components = labels.astype(np.int32)
+        return self._components
+
+    def nearest_nodes(self, lats, lons):
+        """Node index and snap distance (meters) for each point; -1 when off the network."""
+        if self._kdtree is None:
+            self._kdtree = cKDTree(unit_vectors(self.lats, self.lons))
+        chord, pos = self._kdtree.query(unit_vectors(np.atleast_1d(lats), np.atleast_1d(lons)), k=1)
+        snap_meters = 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(chord / 2, 1.0))
+        nodes = np.where(snap_meters <= self.MAX_SNAP_METERS, pos, -1)
+        return nodes, snap_meters
+
+    def distances_from(self, origin, limit_meters, engine="networkx"):
+        """Capped single-source distances (meters) from a node: {node: meters} for networkx, a dense array for csr."""
+        if engine == "csr":
+            return dijkstra(self.csr, directed=True, indices=int(origin), limit=limit_meters)
+        return nx.single_source_dijkstra_path_length(self.graph, int(origin), cutoff=limit_meters, weight="length")
+
+    def walking_distances(self, orig_lat, orig_lon, dest_lats, dest_lons, limit_meters, engine="networkx"):
+        """
+        Network distance (meters) from one origin to each destination, using a
+        single Dijkstra capped at limit_meters.
+
+        Returns an array with inf for destinations that are connected but
+        further than the cap and nan for destinations that cannot be routed
+        (off the network or in a different component).
+        """
+        nodes, _ = self.nearest_nodes(np.r_[orig_lat, dest_lats], np.r_[orig_lon, dest_lons])
+        origin, targets = nodes[0], nodes[1:]
+        meters = np.full(len(targets), np.nan)
+        if origin < 0:
+            return meters
+
+        on_network = targets >= 0
+        if engine == "csr":
+            meters[on_network] = self.distances_from(origin, limit_meters, engine)[targets[on_network]]
+        else:
+            lengths = self.distances_from(origin, limit_meters, engine)
+            meters[on_network] = [lengths.get(node, np.inf) for node in targets[on_network].tolist()]
+
+        # Unsettled within the cap only means "too far" if a path exists at all
+        components = self.components
+        no_path = on_network & (components[np.maximum(targets, 0)] != components[origin])
+        meters[no_path] = np.nan
+        return meters
+
+######################################################################################################################################
+
+class TransitDistanceField:
+    """
+    Walking distance (meters, float32) from every node of a WalkNetwork to the
+    nearest transit stop and the nearest potential hub, capped at the scoring
+    limit (inf beyond it). Built with one multi-source Dijkstra per array.
+    """
+    def __init__(self, stop_meters, hub_meters):
+        self.stop_meters = np.asarray(stop_meters, dtype=np.float32)
+        self.hub_meters = np.asarray(hub_meters, dtype=np.float32)
+
+    @classmethod
+    def build(cls, network, transit_df, limit_meters=1609.344):
+        stop_nodes, _ = network.nearest_nodes(transit_df["latitude"].to_numpy(), transit_df["longitude"].to_numpy())
+        # same truthiness as apply_qap_scoring's `if r['is_potential_hub']`
+        is_hub = transit_df["is_potential_hub"].astype(bool).to_numpy()
+
+        def nearest_source_distance(sources):
+            sources = np.unique(sources[sources >= 0])
+            if len(sources) == 0:
+                return np.full(network.num_nodes, np.inf)
+            return dijkstra(network.csr, directed=True, indices=sources, limit=limit_meters, min_only=True)
+
+        return cls(nearest_source_distance(stop_nodes), nearest_source_distance(stop_nodes[is_hub]))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(path, stop_meters=self.stop_meters, hub_meters=self.hub_meters)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["stop_meters"], data["hub_meters"])
+
+    def lookup(self, network, lats, lons):
+        """Nearest-stop and nearest-hub distances (meters) for each point; inf when off the network."""
+        if not isinstance(network, WalkNetwork):
+            raise ValueError("Transit distance fields are built for a single .npz store, not a tile directory")
+        if len(self.stop_meters) != network.num_nodes:
+            raise ValueError("Transit distance field was built for a different walk network")
+        nodes, _ = network.nearest_nodes(lats, lons)
+        on_network = nodes >= 0
+        stop_meters = np.full(len(nodes), np.inf)
+        hub_meters = np.full(len(nodes), np.inf)
+        stop_meters[on_network] = self.stop_meters[nodes[on_network]]
+        hub_meters[on_network] = self.hub_meters[nodes[on_network]]
+        return stop_meters, hub_meters
+
+######################################################################################################################################
+
+class TiledWalkNetwork:
+    """
+    Walk network split into TILE_DEG x TILE_DEG tiles, each saved with a halo
+    of HALO_DEG so that every node within a 1.1-mile route of a point in the
+    tile core is present. Tiles are loaded (compacted) on first use and the
+    least recently used ones are evicted once memory_budget_mb is exceeded.
+
+    Each tile carries the connected-component labels of the full network, so
+    a stop whose only path leaves the halo is still "connected but too far"
+    (inf), exactly as on the untiled store, rather than "no path" (nan).
+    """
+    TILE_DEG = 0.25
+    HALO_DEG = 0.03   # 1.1 mi is ~0.016 deg of latitude and ~0.02 deg of longitude in north Georgia, plus snapping
+
+    def __init__(self, tile_dir=DEFAULT_TILE_DIR, memory_budget_mb=1024):
+        manifest = read_tile_manifest(tile_dir)
+        self.tile_dir = tile_dir
+        self.tile_deg = manifest["tile_deg"]
+        self.halo_deg = manifest["halo_deg"]
+        self.origin_lat = manifest["origin_lat"]
+        self.origin_lon = manifest["origin_lon"]
+        self.tile_files = {tuple(key): name for key, name in manifest["tiles"]}
+        if not manifest.get("global_components", False):
+            print(f"Warning: tiles in {tile_dir} were built without full-network component labels; stops connected "
+                  f"only outside the halo will fall back to haversine. Rebuild them with build-tiles.")
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._tiles = OrderedDict()
+        self.loads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def tile_key(lat, lon, tile_deg=TILE_DEG, origin_lat=GEORGIA_MIN_LAT, origin_lon=GEORGIA_MIN_LON):
+        return int(math.floor((lat - origin_lat) / tile_deg)), int(math.floor((lon - origin_lon) / tile_deg))
+
+    def key_for(self, lat, lon):
+        return self.tile_key(lat, lon, self.tile_deg, self.origin_lat, self.origin_lon)
+
+    def network_for(self, lat, lon):
+        """Tile covering the point (None outside the tiled area)."""
+        key = self.key_for(lat, lon)
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+        if key not in self.tile_files:
+            return None
+
+        tile = WalkNetwork.load(os.path.join(self.tile_dir, self.tile_files[key])).compact()
+        self._tiles[key] = tile
+        self.loads += 1
+        while len(self._tiles) > 1 and sum(t.nbytes for t in self._tiles.values()) > self.memory_budget:
+            self._tiles.popitem(last=False)
+            self.evictions += 1
+        return tile
+
+    def walking_distances(self, orig_lat, orig_lon, dest_lats, dest_lons, limit_meters, engine="csr"):
+        """WalkNetwork.walking_distances on the tile that holds the origin."""
+        tile = self.network_for(orig_lat, orig_lon)
+        if tile is None:
+            return np.full(len(dest_lats), np.nan)
+        return tile.walking_distances(orig_lat, orig_lon, dest_lats, dest_lons, limit_meters, engine="csr")
+
+
+def read_tile_manifest(tile_dir=DEFAULT_TILE_DIR):
+    with open(os.path.join(tile_dir, "tiles.json")) as f:
+        return json.load(f)
+
+
+def tile_grid(tile_dir=DEFAULT_TILE_DIR):
+    """tile_deg / origin of the tiles on disk, as keyword arguments for group_points_by_tile."""
+    manifest = read_tile_manifest(tile_dir)
+    return {key: manifest[key] for key in ("tile_deg", "origin_lat", "origin_lon")}
+
+
+def build_tiles(network, tile_dir=DEFAULT_TILE_DIR, tile_deg=TiledWalkNetwork.TILE_DEG,
+                halo_deg=TiledWalkNetwork.HALO_DEG, origin_lat=GEORGIA_MIN_LAT, origin_lon=GEORGIA_MIN_LON):
+    """Split a walk network into halo'd tiles plus a tiles.json manifest; tiles keep the full network's components."""
+    os.makedirs(tile_dir, exist_ok=True)
+    keys = {TiledWalkNetwork.tile_key(lat, lon, tile_deg, origin_lat, origin_lon)
+            for lat, lon in zip(network.lats.tolist(), network.lons.tolist())}
+
+    tiles = []
+    for i, j in sorted(keys):
+        south = origin_lat + i * tile_deg
+        west = origin_lon + j * tile_deg
+        tile = network.subset(south - halo_deg, south + tile_deg + halo_deg, west - halo_deg, west + tile_deg + halo_deg)
+        name = f"tile_{i}_{j}.npz"
+        tile.save(os.path.join(tile_dir, name))
+        tiles.append([[i, j], name])
+
+    with open(os.path.join(tile_dir, "tiles.json"), "w") as f:
+        json.dump({"tile_deg": tile_deg, "halo_deg": halo_deg,
+                   "origin_lat": origin_lat, "origin_lon": origin_lon, "global_components": True, "tiles": tiles}, f)
+    return len(tiles)
+
+
+def group_points_by_tile(lat_lon_pairs, max_chunk=500, tile_deg=TiledWalkNetwork.TILE_DEG,
+                         origin_lat=GEORGIA_MIN_LAT, origin_lon=GEORGIA_MIN_LON):
+    """
+    Split (lat, lon) pairs into chunks that never straddle a tile, so a worker
+    that takes a chunk loads its tile once instead of once per point.
+    """
+    by_tile = {}
+    for lat, lon in lat_lon_pairs:
+        by_tile.setdefault(TiledWalkNetwork.tile_key(lat, lon, tile_deg, origin_lat, origin_lon), []).append((lat, lon))
+
+    chunks = []
+    for key in sorted(by_tile):
+        points = by_tile[key]
+        chunks.extend(points[i:i + max_chunk] for i in range(0, len(points), max_chunk))
+    return chunks
+
+######################################################################################################################################
+
+# One store per path per process; grid workers load it on first use
+_LOADED_NETWORKS = {}
+
+def load_walk_network(path=DEFAULT_WALK_NETWORK_PATH, compact=False, memory_budget_mb=1024):
+    """A .npz store, or a tile directory (always routed with the CSR engine)."""
+    path = os.path.abspath(path)
+    if path not in _LOADED_NETWORKS:
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Walk network store not found at {path}; build it with "
+                f"`python -m aggregate_scoring.walk_network build <extract>`")
+        if os.path.isdir(path):
+            _LOADED_NETWORKS[path] = TiledWalkNetwork(path, memory_budget_mb=memory_budget_mb)
+        else:
+            _LOADED_NETWORKS[path] = WalkNetwork.load(path)
+    network = _LOADED_NETWORKS[path]
+    return network.compact() if compact and isinstance(network, WalkNetwork) else network
+
+
+def build_walk_network(source_path, out_path=DEFAULT_WALK_NETWORK_PATH):
+    network = WalkNetwork.from_file(source_path)
+    network.save(out_path)
+    return network
+
+
+def validate_csr_engine(network, sample_size=100, limit_meters=1609.344, seed=0):
+    """
+    Route from a random sample of nodes with both engines and compare the
+    settled distances. Must run before compact(), while the float64 edge list
+    still backs the networkx engine.
+    """
+    rng = np.random.default_rng(seed)
+    origins = rng.choice(network.num_nodes, size=min(sample_size, network.num_nodes), replace=False)
+
+    max_abs_diff = 0.0
+    reach_mismatches = 0
+    for origin in origins:
+        nx_lengths = network.distances_from(origin, limit_meters, engine="networkx")
+        csr_dist = network.distances_from(origin, limit_meters, engine="csr")
+        csr_reached = np.flatnonzero(np.isfinite(csr_dist))
+
+        nx_nodes = np.fromiter(nx_lengths.keys(), dtype=np.int64, count=len(nx_lengths))
+        nx_meters = np.fromiter(nx_lengths.values(), dtype=np.float64, count=len(nx_lengths))
+        common = np.isfinite(csr_dist[nx_nodes])
+        if len(nx_nodes):
+            max_abs_diff = max(max_abs_diff, float(np.abs(csr_dist[nx_nodes[common]] - nx_meters[common]).max(initial=0.0)))
+        # Only nodes right at the cap may legitimately differ through float32 rounding
+        reach_mismatches += len(np.setxor1d(csr_reached, nx_nodes))
+
+    return {"sites": len(origins), "max_abs_diff_m": max_abs_diff, "reach_mismatches": reach_mismatches}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local walk-network store used for transit scoring.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Convert an OSM XML extract or GraphML file into the binary store")
+    build.add_argument("source", help="Path to a .osm/.xml extract of walkable ways or a .graphml file")
+    build.add_argument("out", nargs="?", default=DEFAULT_WALK_NETWORK_PATH, help="Output .npz path")
+
+    validate = subparsers.add_parser("validate", help="Check the CSR engine against networkx on sampled sites")
+    validate.add_argument("store", nargs="?", default=DEFAULT_WALK_NETWORK_PATH, help="Path to the .npz store")
+    validate.add_argument("--sample", type=int, default=100, help="Number of sampled origin nodes")
+
+    build_field = subparsers.add_parser("build-field", help="Precompute nearest stop / hub walking distance for every node")
+    build_field.add_argument("transit_csv", help="Transit stop table with latitude, longitude and is_potential_hub")
+    build_field.add_argument("--store", default=DEFAULT_WALK_NETWORK_PATH, help="Path to the .npz store")
+    build_field.add_argument("--out", default=DEFAULT_TRANSIT_FIELD_PATH, help="Output .npz path")
+
+    build_tiles_parser = subparsers.add_parser("build-tiles", help="Split a store into halo'd tiles for statewide runs")
+    build_tiles_parser.add_argument("--store", default=DEFAULT_WALK_NETWORK_PATH, help="Path to the .npz store to split")
+    build_tiles_parser.add_argument("--out", default=DEFAULT_TILE_DIR, help="Output tile directory")
+    build_tiles_parser.add_argument("--tile-deg", type=float, default=TiledWalkNetwork.TILE_DEG, help="Tile size in degrees")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        network = build_walk_network(args.source, args.out)
+        print(f"Saved {network.num_nodes} nodes and {len(network.edge_length)} edges to {args.out}")
+    elif args.command == "build-field":
+        transit_df = pd.read_csv(args.transit_csv)
+        field = TransitDistanceField.build(load_walk_network(args.store, compact=True), transit_df)
+        field.save(args.out)
+        print(f"Saved nearest stop / hub distances for {len(field.stop_meters)} nodes to {args.out}")
+    elif args.command == "build-tiles":
+        count = build_tiles(WalkNetwork.load(args.store), args.out, tile_deg=args.tile_deg)
+        print(f"Saved {count} tiles to {args.out}")
+    elif args.command == "validate":
+        print(validate_csr_engine(WalkNetwork.load(args.store), sample_size=args.sample))
@@ -0,0 +1,115 @@
+"""
+Wetlands deduction for Desirable/Undesirable Activities.
+
+The wetland polygons are loaded once, projected to an equal-area CRS
+(CONUS Albers, EPSG:5070) and held in an STRtree. For each site only the
+polygons whose envelope meets the 402 m (quarter-mile) buffer are clipped,
+and the clipped area is summed in acres.
+
+The cleaned layer is built once from the National Wetlands Inventory state
+download:
+
+    python -m aggregate_scoring.wetlands clean
+"""
+import argparse
+import os
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from pyproj import Transformer
+
+from .spatial_index import transform_points
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+
+RAW_WETLANDS_PATH = os.path.join(PROJECT_ROOT, "data/raw/scoring_indicators/desirable_undesirable_activities/wetlands/GA_shapefile_wetlands/GA_Wetlands.shp")
+DEFAULT_WETLANDS_PATH = os.path.join(PROJECT_ROOT, "data/preprocessed/scoring_indicators/desirable_undesirable_activities/ga_wetlands_cleaned.gpkg")
+
+EQUAL_AREA_CRS = "EPSG:5070"
+SQ_METERS_PER_ACRE = 4046.8564224
+
+######################################################################################################################################
+
+def clean_wetlands(wetlands_gdf):
+    """
+    Valid, non-empty wetland polygons in EQUAL_AREA_CRS with their area in an
+    acres column (the column the original per-site deduction summed).
+    """
+    projected = wetlands_gdf.to_crs(EQUAL_AREA_CRS)
+    # "structure" drops collapsed slivers instead of keeping them as lines; only areas count
+    geoms = shapely.make_valid(np.asarray(projected.geometry.values), method="structure", keep_collapsed=False)
+    keep = ~shapely.is_missing(geoms) & ~shapely.is_empty(geoms) & (shapely.area(geoms) > 0)
+    cleaned = projected.loc[keep].set_geometry(geoms[keep])
+    cleaned["acres"] = shapely.area(geoms[keep]) / SQ_METERS_PER_ACRE
+    return cleaned.reset_index(drop=True)
+
+######################################################################################################################################
+
+class WetlandsIndex:
+    BUFFER_METERS = 402
+    THRESHOLD_ACRES = 1.0
+    DEDUCTION_POINTS = 2
+    CHUNK_SIZE = 5000
+
+    def __init__(self, wetlands_gdf):
+        projected = wetlands_gdf.to_crs(EQUAL_AREA_CRS)
+        geoms = shapely.make_valid(np.asarray(projected.geometry.values))
+        self.geoms = geoms[~shapely.is_empty(geoms) & ~shapely.is_missing(geoms)]
+        self.tree = shapely.STRtree(self.geoms)
+        self._to_equal_area = Transformer.from_crs("EPSG:4326", EQUAL_AREA_CRS, always_xy=True)
+
+    def __len__(self):
+        return len(self.geoms)
+
+    def acres_many(self, lats, lons, buffer_meters=None):
+        """Wetland acres inside the buffer around each site (overlapping polygons count twice)."""
+        buffer_meters = self.BUFFER_METERS if buffer_meters is None else buffer_meters
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        acres = np.zeros(len(lats))
+
+        for start in range(0, len(lats), self.CHUNK_SIZE):
+            xs, ys = transform_points(self._to_equal_area, lons[start:start + self.CHUNK_SIZE], lats[start:start + self.CHUNK_SIZE])
+            buffers = shapely.buffer(shapely.points(xs, ys), buffer_meters, quad_segs=16)  # GeoSeries.buffer default
+            site_idx, wetland_idx = self.tree.query(buffers, predicate="intersects")
+            if len(site_idx) == 0:
+                continue
+            clipped = shapely.area(shapely.intersection(buffers[site_idx], self.geoms[wetland_idx]))
+            acres[start:start + len(buffers)] = np.bincount(site_idx, weights=clipped, minlength=len(buffers)) / SQ_METERS_PER_ACRE
+        return acres
+
+    def deductions_many(self, lats, lons):
+        return np.where(self.acres_many(lats, lons) >= self.THRESHOLD_ACRES, self.DEDUCTION_POINTS, 0)
+
+######################################################################################################################################
+
+# One index per wetlands file per process
+_LOADED_WETLANDS = {}
+
+def load_wetlands_index(path=DEFAULT_WETLANDS_PATH):
+    path = os.path.abspath(path)
+    if path not in _LOADED_WETLANDS:
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Wetlands layer not found at {path}; build it with `python -m aggregate_scoring.wetlands clean`, "
+                f"pass wetlands_gdf or wetlands_index, or set wetlands_index=False to skip the deduction")
+        _LOADED_WETLANDS[path] = WetlandsIndex(gpd.read_file(path))
+    return _LOADED_WETLANDS[path]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the wetlands layer for the Desirable/Undesirable deduction.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    clean = subparsers.add_parser("clean", help="Project, repair and write the wetland polygons")
+    clean.add_argument("source", nargs="?", default=RAW_WETLANDS_PATH, help="NWI wetlands shapefile for Georgia")
+    clean.add_argument("out", nargs="?", default=DEFAULT_WETLANDS_PATH, help="Output GeoPackage path")
+
+    args = parser.parse_args()
+    if args.command == "clean":
+        cleaned = clean_wetlands(gpd.read_file(args.source))
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        cleaned.to_file(args.out, driver="GPKG")
+        print(f"Saved {len(cleaned)} wetland polygons ({cleaned['acres'].sum():,.0f} acres) to {args.out}")
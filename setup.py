@@ -6,11 +6,14 @@ setup(
     packages=find_packages(include=["aggregate_scoring", "aggregate_scoring.*"]),
     install_requires=[
         "pandas",
+        "pyarrow",
         "geopandas",
         "shapely",
         "numpy",
         "osmnx",
         "networkx",
+        "scikit-learn",
+        "scipy",
         "thefuzz",
         "requests",
         "geopy"
@@ -0,0 +1,217 @@
+"""
+Synthetic scoring inputs: a street grid, tracts, attendance zones and the
+tables the criteria read, laid over a few square kilometres of Atlanta so
+every test runs offline in seconds.
+"""
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pytest
+import shapely
+
+from aggregate_scoring.aggregate_scoring import DesirableUndesirableActivities, StableCommunities
+from aggregate_scoring.spatial_index import haversine_miles
+from aggregate_scoring.tract_table import TractTable
+from aggregate_scoring.walk_network import WalkNetwork
+
+SOUTH, NORTH = 33.74, 33.79
+WEST, EAST = -84.42, -84.37
+METERS_PER_MILE = 1609.344
+
+STATE_AVG_BY_YEAR = {
+    "elementary": {2018: 77.8, 2019: 79.9},
+    "middle": {2018: 76.2, 2019: 77.0},
+    "high": {2018: 75.3, 2019: 78.8},
+}
+
+######################################################################################################################################
+
+def random_sites(n, seed=0, margin=0.002):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(SOUTH + margin, NORTH - margin, n), rng.uniform(WEST + margin, EAST - margin, n)
+
+
+def voronoi_cells(n, seed, bounds=(WEST, SOUTH, EAST, NORTH)):
+    """n irregular polygons tiling the box."""
+    rng = np.random.default_rng(seed)
+    west, south, east, north = bounds
+    seeds = shapely.multipoints(np.column_stack([rng.uniform(west, east, n), rng.uniform(south, north, n)]))
+    box = shapely.box(west, south, east, north)
+    cells = shapely.get_parts(shapely.voronoi_polygons(seeds, extend_to=box))
+    return np.asarray(shapely.intersection(cells, box))
+
+
+def grid_streets(n=36, step=0.0015, seed=0):
+    """
+    Jittered street grid with ~10% of the blocks missing and lengths 0-20% over
+    the straight line, as (node_ids, lats, lons, edge_u, edge_v, lengths).
+    """
+    rng = np.random.default_rng(seed)
+    ii, jj = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+    lats = (SOUTH + ii * step + rng.normal(0, 1e-4, ii.shape)).ravel()
+    lons = (WEST + jj * step + rng.normal(0, 1e-4, jj.shape)).ravel()
+    node = np.arange(n * n).reshape(n, n)
+    edge_u = np.concatenate([node[:, :-1].ravel(), node[:-1, :].ravel()])
+    edge_v = np.concatenate([node[:, 1:].ravel(), node[1:, :].ravel()])
+    keep = rng.random(len(edge_u)) > 0.1
+    edge_u, edge_v = edge_u[keep], edge_v[keep]
+    lengths = haversine_miles(lats[edge_u], lons[edge_u], lats[edge_v], lons[edge_v]) * METERS_PER_MILE
+    lengths *= 1 + 0.2 * rng.random(len(lengths))
+    return 1000 + np.arange(n * n), lats, lons, edge_u, edge_v, lengths
+
+
+def grid_network(**kwargs):
+    return WalkNetwork(*grid_streets(**kwargs))
+
+
+def transit_stops(n=40, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "name": [f"stop {i}" for i in range(n)],
+        "latitude": rng.uniform(SOUTH, NORTH, n),
+        "longitude": rng.uniform(WEST, EAST, n),
+        "is_potential_hub": rng.random(n) < 0.3,
+    })
+
+
+def tracts(n=16, seed=2):
+    geoids = [f"13121{(i + 1) * 100:06d}" for i in range(n)]
+    return gpd.GeoDataFrame({"GEOID": geoids}, geometry=voronoi_cells(n, seed), crs="EPSG:4326")
+
+
+def school_zones(seed=3):
+    """Administrative zones over the whole box and APS zones over its west half; the DeKalb layers are absent."""
+    administrative = gpd.GeoDataFrame({
+        "ELEMENTARY": ["Oak Elementary School", "Pine Elementary School", "Elm Elementary School", "Ash Elementary School", None],
+        "MIDDLE": ["North Middle School", "North Middle School", "South Middle School", "South Middle School", "South Middle School"],
+        "HIGH": ["Central High School"] * 4 + ["Lakeside High School"],
+    }, geometry=voronoi_cells(5, seed), crs="EPSG:4326")
+    aps = gpd.GeoDataFrame({
+        "Elementary": ["Birch Elementary School", "Oak Elementary School", "Cedar Elementary School"],
+        "Middle": ["West Middle School", "North Middle School", "West Middle School"],
+        "High": ["Westside High School", "Westside High School", "Central High School"],
+    }, geometry=voronoi_cells(3, seed + 1, (WEST, SOUTH, (WEST + EAST) / 2, NORTH)), crs="EPSG:4326")
+    return [administrative, aps, None, None, None]
+
+
+def school_table(zones):
+    """One row per zone school name; qualifies by BTO, by score growth, or not at all."""
+    rows = []
+    for i, name in enumerate(sorted({name for gdf in zones if gdf is not None
+                                     for column in gdf.columns if column != "geometry"
+                                     for name in gdf[column].dropna()})):
+        cluster = "E" if "Elementary" in name else "M" if "Middle" in name else "H"
+        rows.append({
+            "School Name": name,
+            "Grade Cluster": cluster,
+            "2019 BTO Designation": "Beating the Odds" if i % 4 == 0 else "",
+            "YoY Average": 1.5 if i % 4 == 1 else -0.5,
+            "Average score": 80.0,
+            "Applicable 25th Percentile": 70.0,
+        })
+    return pd.DataFrame(rows)
+
+
+def indicators(tracts_gdf, seed=4):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"2020 Census Tract": tracts_gdf["GEOID"].astype(np.int64)})
+    for column in StableCommunities.INDICATORS:
+        df[column] = (rng.random(len(df)) < 0.6).astype(int)
+    return df
+
+
+def housing_data(tracts_gdf, seed=5):
+    """merged_housing_data.csv layout (fractions and Yes/No flags)."""
+    rng = np.random.default_rng(seed)
+    n = len(tracts_gdf)
+    return pd.DataFrame({
+        "2020 Census Tract": tracts_gdf["GEOID"].astype(np.int64),
+        "pct_severe_housing_problems": rng.uniform(0.2, 0.6, n),
+        "pop_2021_gt_2011": rng.choice(["Yes", "No"], n),
+        "avg_pop_yoy_growth_2018_2021": rng.uniform(-0.02, 0.03, n),
+        "avg_emp_growth_2020_2022": rng.uniform(-0.02, 0.03, n),
+        "qct?": rng.choice(["Yes", "No"], n, p=[0.3, 0.7]),
+    })
+
+
+def usda_table(tracts_gdf, seed=6):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"CensusTract": tracts_gdf["GEOID"].astype(str),
+                         "LILATracts_1And10": rng.integers(0, 2, len(tracts_gdf))})
+
+
+def amenities(n=300, seed=7):
+    rng = np.random.default_rng(seed)
+    keys = list(DesirableUndesirableActivities.AMENITY_GROUPS) + ["Grocery_Store"]
+    return pd.DataFrame({"amenity_key": rng.choice(keys, n),
+                         "lat": rng.uniform(SOUTH - 0.05, NORTH + 0.05, n),
+                         "lon": rng.uniform(WEST - 0.05, EAST + 0.05, n)})
+
+
+def undesirable_sites(n=200, seed=8):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"site_latitude": rng.uniform(SOUTH, NORTH, n), "site_longitude": rng.uniform(WEST, EAST, n)})
+
+
+def rural_union():
+    return shapely.union_all([shapely.Point(WEST + 0.01, SOUTH + 0.01).buffer(0.012),
+                              shapely.Point(EAST - 0.015, NORTH - 0.01).buffer(0.008)])
+
+
+def wetlands(n=60, seed=91):
+    rng = np.random.default_rng(seed)
+    centres = zip(rng.uniform(WEST, EAST, n), rng.uniform(SOUTH, NORTH, n), rng.uniform(0.0003, 0.003, n))
+    return gpd.GeoDataFrame(geometry=[shapely.Point(x, y).buffer(r) for x, y, r in centres], crs="EPSG:4326")
+
+
+######################################################################################################################################
+
+@pytest.fixture(scope="session")
+def walk_network():
+    return grid_network()
+
+
+@pytest.fixture(scope="session")
+def transit_df():
+    return transit_stops()
+
+
+@pytest.fixture(scope="session")
+def tracts_gdf():
+    return tracts()
+
+
+@pytest.fixture(scope="session")
+def zones():
+    return school_zones()
+
+
+@pytest.fixture(scope="session")
+def scoring_kwargs(tracts_gdf, zones, transit_df, walk_network):
+    """Every data kwarg of the five criteria, with the saved default artifacts switched off."""
+    indicators_df = indicators(tracts_gdf)
+    housing_df = housing_data(tracts_gdf)
+    usda_df = usda_table(tracts_gdf)
+    desirable = amenities()
+    return {
+        "transit_df": transit_df,
+        "walk_network": walk_network,
+        "desirable_csv": desirable,
+        "grocery_csv": desirable,
+        "undesirable_csv": undesirable_sites(),
+        "usda_csv": usda_df,
+        "tract_shapefile": tracts_gdf,
+        "tracts_shp": tracts_gdf,
+        "tracts_gdf": tracts_gdf,
+        "rural_gdf_unary_union": rural_union(),
+        "wetlands_gdf": wetlands(),
+        "indicators_df": indicators_df,
+        "census_tract_data": housing_df,
+        "tract_table": TractTable.build([housing_df], indicators_df, usda_df),
+        "school_df": school_table(zones),
+        "school_boundary_gdfs": zones,
+        "state_avg_by_year": STATE_AVG_BY_YEAR,
+        "education_mode": "schools",
+        "education_partition": False,
+        "stable_surface": False,
+    }
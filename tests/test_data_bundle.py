@@ -0,0 +1,116 @@
+import os
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+import shapely
+
+from aggregate_scoring import data_bundle
+from aggregate_scoring.aggregate_scoring import score_many
+from aggregate_scoring.polygon_raster import PolygonRaster
+from aggregate_scoring.transit_stops import deduplicate_stops
+
+from conftest import EAST, NORTH, SOUTH, STATE_AVG_BY_YEAR, WEST, random_sites, rural_union
+
+# what the runners pass next to the data kwargs
+SETTINGS = {"state_avg_by_year": STATE_AVG_BY_YEAR, "education_mode": "schools", "education_partition": False, "stable_surface": False}
+
+
+@pytest.fixture
+def sources(scoring_kwargs, tmp_path, monkeypatch):
+    """Write the synthetic inputs where the bundle reads its sources from."""
+    src = tmp_path / "sources"
+    src.mkdir()
+
+    tables = {}
+    for name in ("transit_df", "desirable_csv", "usda_csv", "undesirable_csv", "school_df", "indicators_df", "census_tract_data"):
+        tables[name] = str(src / f"{name}.csv")
+        scoring_kwargs[name].to_csv(tables[name], index=False)
+    # the deduplicated stops are preferred once they exist
+    tables["transit_stops"] = str(src / "transit_stops.csv")
+    table_sources = {name: [path] for name, path in tables.items() if name != "transit_stops"}
+    table_sources["transit_df"] = [tables["transit_stops"], tables["transit_df"]]
+    monkeypatch.setattr(data_bundle, "TABLE_SOURCES", table_sources)
+    monkeypatch.setattr(data_bundle, "HOUSING_DATA_PATHS", [tables["census_tract_data"]])
+    monkeypatch.setattr(data_bundle, "INDICATORS_PATH", tables["indicators_df"])
+    monkeypatch.setattr(data_bundle, "USDA_PATH", tables["usda_csv"])
+
+    tracts = scoring_kwargs["tracts_shp"]
+    tracts.to_file(src / "tracts.shp")
+    # the housing layer is its own file, in another CRS, so a mix-up between the two shows
+    tracts.to_crs("EPSG:4269").to_file(src / "housing_tracts.shp")
+    rural = gpd.GeoDataFrame(geometry=shapely.get_parts(rural_union()), crs="EPSG:4326")
+    rural.to_file(src / "rural.shp")
+    zone_files = []
+    for i, gdf in enumerate(scoring_kwargs["school_boundary_gdfs"]):
+        zone_files.append(str(src / f"zones_{i}.geojson"))
+        if gdf is not None:
+            gdf.to_file(zone_files[-1], driver="GeoJSON")
+    wetlands = gpd.GeoDataFrame(geometry=[shapely.Point((WEST + EAST) / 2, (SOUTH + NORTH) / 2).buffer(0.004)], crs="EPSG:4326")
+    wetlands.to_file(src / "wetlands.gpkg")
+
+    monkeypatch.setattr(data_bundle, "TRACT_SHAPEFILE", str(src / "tracts.shp"))
+    monkeypatch.setattr(data_bundle, "HOUSING_TRACT_SHAPEFILE", str(src / "housing_tracts.shp"))
+    monkeypatch.setattr(data_bundle, "RURAL_SHAPEFILE", str(src / "rural.shp"))
+    monkeypatch.setattr(data_bundle, "SCHOOL_ZONE_FILES", zone_files)
+    monkeypatch.setattr(data_bundle, "DEFAULT_WETLANDS_PATH", str(src / "wetlands.gpkg"))
+    return tables
+
+
+def test_bundle_round_trip(sources, scoring_kwargs, tmp_path):
+    bundle_dir = str(tmp_path / "bundle")
+    manifest = data_bundle.build_bundle(bundle_dir, cells_across=64)
+    assert set(manifest["rasters"]) == {"rural", "tracts", "housing_tracts", "school_zones_0", "school_zones_1"}
+    assert data_bundle.stale_entries(bundle_dir, with_hash=True) == []
+
+    from_sources = data_bundle.read_sources()
+    bundled = data_bundle.load_bundle(bundle_dir)
+    assert set(bundled) >= set(from_sources)
+    for name in data_bundle.TABLE_SOURCES:
+        pd.testing.assert_frame_equal(bundled[name], from_sources[name])
+    for name in ("tracts_shp", "tracts_gdf", "wetlands_gdf"):
+        assert bundled[name].geom_equals(from_sources[name]).all()
+    assert isinstance(bundled["tract_index"], PolygonRaster)
+    assert bundled["tract_index"] is bundled["stable_tract_index"]
+    assert bundled["housing_tract_index"].gdf is bundled["tracts_gdf"]
+
+    lats, lons = random_sites(150, seed=70)
+    routing = {"walk_network": scoring_kwargs["walk_network"]}
+    expected = score_many(lats, lons, **from_sources, **routing, **SETTINGS)
+    assert expected["housing_needs_characteristics_score"].nunique() > 1
+    pd.testing.assert_frame_equal(score_many(lats, lons, **bundled, **routing, **SETTINGS), expected)
+
+
+def test_bundle_reports_changed_sources(sources, tmp_path, capsys):
+    bundle_dir = str(tmp_path / "bundle")
+    data_bundle.build_bundle(bundle_dir, cells_across=64)
+    usda = pd.read_csv(sources["usda_csv"], dtype={"CensusTract": str})
+    usda.assign(LILATracts_1And10=1 - usda["LILATracts_1And10"]).to_csv(sources["usda_csv"], index=False)
+    os.utime(sources["usda_csv"], ns=(0, 0))
+
+    assert data_bundle.stale_entries(bundle_dir) == ["usda_csv", "tract_table"]
+    data_bundle.load_bundle(bundle_dir)
+    assert "rebuild it" in capsys.readouterr().out
+
+
+def test_bundle_prefers_deduplicated_stops(sources, scoring_kwargs, tmp_path):
+    bundle_dir = str(tmp_path / "bundle")
+    data_bundle.build_bundle(bundle_dir, cells_across=64)
+    assert len(data_bundle.load_bundle(bundle_dir)["transit_df"]) == len(scoring_kwargs["transit_df"])
+
+    deduped = deduplicate_stops(scoring_kwargs["transit_df"])
+    deduped.to_csv(sources["transit_stops"], index=False)
+    assert data_bundle.stale_entries(bundle_dir) == ["transit_df"]
+    from_sources = data_bundle.read_sources()
+    assert "transit_stops" not in from_sources
+    pd.testing.assert_frame_equal(from_sources["transit_df"], deduped)
+
+    rebuilt_dir = str(tmp_path / "rebuilt")
+    data_bundle.build_bundle(rebuilt_dir, cells_across=64)
+    pd.testing.assert_frame_equal(data_bundle.load_bundle(rebuilt_dir)["transit_df"], deduped)
+
+
+def test_missing_bundle_raises(tmp_path):
+    assert not data_bundle.bundle_exists(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        data_bundle.load_bundle(str(tmp_path))
@@ -0,0 +1,152 @@
+"""
+DesirableUndesirableActivities against the per-site scans it replaced: a
+Point.within rural test, a bounding-box Manhattan scan of the amenity
+table, haversine over every grocery and undesirable site, and a spatial
+join for the food-desert tract.
+"""
+import math
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from aggregate_scoring import aggregate_scoring
+from aggregate_scoring.aggregate_scoring import DesirableUndesirableActivities as DUA
+from aggregate_scoring.polygon_raster import PolygonRaster, rural_layer
+from aggregate_scoring.spatial_index import scalar_haversine_miles
+from aggregate_scoring.wetlands import EQUAL_AREA_CRS, WetlandsIndex, clean_wetlands
+
+from conftest import EAST, NORTH, SOUTH, WEST, random_sites
+
+
+def scan_is_rural(lat, lon, rural_union):
+    return shapely.Point(lon, lat).within(rural_union)
+
+
+def scan_desirable_score(lat, lon, desirable, is_rural):
+    lat_tol = 5.0 / 69.0
+    lon_tol = 5.0 / (69.0 * math.cos(math.radians(lat)))
+    df = desirable[desirable["lat"].between(lat - lat_tol, lat + lat_tol) & desirable["lon"].between(lon - lon_tol, lon + lon_tol)]
+    distance = np.abs(df["lat"] - lat) * 69.0 + np.abs(df["lon"] - lon) * 69.0 * np.cos(np.radians((df["lat"] + lat) / 2))
+    closest = distance[distance <= 5.0].groupby(df["amenity_key"].str.lower()).min().to_dict()
+
+    total = 0.0
+    for amenity, group in DUA.AMENITY_GROUPS.items():
+        d = closest.get(amenity)
+        if d is None:
+            continue
+        if group == 1:
+            total += 2.5 if d <= 0.55 else 2.0 if d <= 1.05 else 1.5 if not is_rural and d <= 1.5 else 2.5 if is_rural and d <= 2.5 else 0
+        else:
+            total += 2.0 if d <= 0.55 else 1.5 if d <= 1.05 else 1.0 if (d <= 1.5 if not is_rural else d <= 2.5) else 0
+    return total
+
+
+def scan_undesirable_deduction(lat, lon, undesirable):
+    miles = [scalar_haversine_miles(lat, lon, a, b) for a, b in zip(undesirable["site_latitude"], undesirable["site_longitude"])]
+    return sum(m <= 0.25 for m in miles) * 2
+
+
+def scan_food_desert_deduction(lat, lon, grocery, tracts, usda):
+    stores = grocery[grocery["amenity_key"].str.lower() == "grocery_store"]
+    near_grocery = min(scalar_haversine_miles(lat, lon, a, b) for a, b in zip(stores["lat"], stores["lon"])) <= 0.25
+    site = gpd.GeoDataFrame(geometry=[shapely.Point(lon, lat)], crs="EPSG:4326").to_crs(tracts.crs)
+    joined = gpd.sjoin(site, tracts, how="left", predicate="within")
+    row = usda[usda["CensusTract"].str.strip() == str(joined.iloc[0]["GEOID"]).strip()]
+    in_food_desert = not row.empty and row.iloc[0]["LILATracts_1And10"] in [1, True, "1"]
+    return 2 if in_food_desert and not near_grocery else 0
+
+
+@pytest.fixture(scope="module")
+def sites():
+    # a margin past the tracts, so sites outside every tract are covered too
+    return random_sites(80, seed=90, margin=-0.005)
+
+
+def test_rural_classification(scoring_kwargs, sites):
+    union = scoring_kwargs["rural_gdf_unary_union"]
+    expected = [scan_is_rural(lat, lon, union) for lat, lon in zip(*sites)]
+    assert any(expected) and not all(expected)
+    raster = PolygonRaster.build(rural_layer(union), cells_across=64)
+    for rural_raster in (None, raster):
+        assert DUA.classify_locations_many(*sites, union, rural_raster).tolist() == expected
+
+
+def test_desirable_score(scoring_kwargs, sites):
+    is_rural = DUA.classify_locations_many(*sites, scoring_kwargs["rural_gdf_unary_union"])
+    expected = [scan_desirable_score(lat, lon, scoring_kwargs["desirable_csv"], rural) for lat, lon, rural in zip(*sites, is_rural)]
+    assert len(set(expected)) > 5
+    criterion = DUA(*[s[0] for s in sites], **scoring_kwargs)
+    np.testing.assert_array_equal(DUA.desirable_scores_many(*sites, criterion.get_amenity_index(), is_rural), expected)
+    assert [DUA(lat, lon, **scoring_kwargs).compute_desirable_score() for lat, lon in zip(*sites)] == expected
+
+
+def test_undesirable_deduction(scoring_kwargs, sites):
+    expected = [scan_undesirable_deduction(lat, lon, scoring_kwargs["undesirable_csv"]) for lat, lon in zip(*sites)]
+    assert len(set(expected)) > 1
+    criterion = DUA(*[s[0] for s in sites], **scoring_kwargs)
+    np.testing.assert_array_equal(DUA.undesirable_counts_many(*sites, criterion.get_undesirable_index()) * DUA.UNDESIRABLE_POINTS, expected)
+    assert [DUA(lat, lon, **scoring_kwargs).get_undesirable_deduction() for lat, lon in zip(*sites)] == expected
+
+
+def test_food_desert_deduction(scoring_kwargs, sites):
+    expected = [scan_food_desert_deduction(lat, lon, scoring_kwargs["grocery_csv"], scoring_kwargs["tract_shapefile"], scoring_kwargs["usda_csv"])
+                for lat, lon in zip(*sites)]
+    assert len(set(expected)) > 1
+    for kwargs in (scoring_kwargs, dict(scoring_kwargs, tract_table=None)):
+        criterion = DUA(*[s[0] for s in sites], **kwargs)
+        deductions = DUA.food_desert_deductions_many(*sites, criterion.get_grocery_index(), criterion.get_tract_index(), criterion.get_food_desert_flags())
+        np.testing.assert_array_equal(deductions, expected)
+        assert [DUA(lat, lon, **kwargs).compute_food_desert_deduction() for lat, lon in zip(*sites)] == expected
+
+
+def test_wetland_acres(scoring_kwargs, sites):
+    wetlands_gdf = scoring_kwargs["wetlands_gdf"]
+    wetlands = wetlands_gdf.to_crs(EQUAL_AREA_CRS)
+    buffers = gpd.GeoSeries(gpd.points_from_xy(sites[1], sites[0]), crs="EPSG:4326").to_crs(EQUAL_AREA_CRS).buffer(WetlandsIndex.BUFFER_METERS)
+    expected = np.array([wetlands.geometry.intersection(buffer).area.sum() for buffer in buffers]) / 4046.8564224
+    acres = WetlandsIndex(wetlands_gdf).acres_many(*sites)
+    np.testing.assert_allclose(acres, expected, rtol=1e-9, atol=1e-9)
+    assert (acres >= WetlandsIndex.THRESHOLD_ACRES).any() and (acres < WetlandsIndex.THRESHOLD_ACRES).any()
+
+
+def test_cleaned_wetlands_keep_only_areas(scoring_kwargs):
+    bowtie = shapely.Polygon([(WEST, SOUTH), (WEST + 0.01, SOUTH + 0.01), (WEST + 0.01, SOUTH), (WEST, SOUTH + 0.01)])
+    sliver = shapely.Polygon([(WEST, NORTH), (EAST, NORTH), (WEST, NORTH)])
+    raw = gpd.GeoDataFrame(geometry=[*scoring_kwargs["wetlands_gdf"].geometry, bowtie, sliver, None], crs="EPSG:4326")
+    cleaned = clean_wetlands(raw)
+    assert len(cleaned) == len(raw) - 2 and cleaned.is_valid.all() and cleaned.crs == EQUAL_AREA_CRS
+    np.testing.assert_allclose(cleaned["acres"], cleaned.area / 4046.8564224)
+
+
+def test_wetlands_layer_loads_by_default(scoring_kwargs, sites, tmp_path, monkeypatch):
+    path = tmp_path / "wetlands.gpkg"
+    clean_wetlands(scoring_kwargs["wetlands_gdf"]).to_file(path, driver="GPKG")
+    without_layer = {key: value for key, value in scoring_kwargs.items() if key != "wetlands_gdf"}
+    expected = DUA.calculate_score_many(*sites, **scoring_kwargs)
+
+    np.testing.assert_array_equal(DUA.calculate_score_many(*sites, **without_layer, wetlands_index=str(path)), expected)
+    monkeypatch.setattr(aggregate_scoring, "DEFAULT_WETLANDS_PATH", str(path))
+    np.testing.assert_array_equal(DUA.calculate_score_many(*sites, **without_layer), expected)
+    assert [DUA(lat, lon, **without_layer).calculate_score() for lat, lon in zip(*sites)] == expected.tolist()
+
+    skipped = DUA.calculate_score_many(*sites, **dict(scoring_kwargs, wetlands_index=False))
+    assert (skipped >= expected).all() and (skipped > expected).any()
+    monkeypatch.setattr(aggregate_scoring, "DEFAULT_WETLANDS_PATH", str(tmp_path / "missing.gpkg"))
+    with pytest.raises(FileNotFoundError):
+        DUA.calculate_score_many(*sites, **without_layer)
+
+
+def test_total_score(scoring_kwargs, sites):
+    kwargs = scoring_kwargs
+    acres = WetlandsIndex(kwargs["wetlands_gdf"]).acres_many(*sites)
+    expected = []
+    for lat, lon, wetland_acres in zip(*sites, acres):
+        desirable = scan_desirable_score(lat, lon, kwargs["desirable_csv"], scan_is_rural(lat, lon, kwargs["rural_gdf_unary_union"]))
+        deductions = (scan_food_desert_deduction(lat, lon, kwargs["grocery_csv"], kwargs["tract_shapefile"], kwargs["usda_csv"]) +
+                      scan_undesirable_deduction(lat, lon, kwargs["undesirable_csv"]) +
+                      (2 if wetland_acres >= 1.0 else 0))
+        expected.append(min(max(0, desirable - deductions), 20))
+    np.testing.assert_array_equal(DUA.calculate_score_many(*sites, **kwargs), expected)
+    assert [DUA(lat, lon, **kwargs).calculate_score() for lat, lon in zip(*sites)] == expected
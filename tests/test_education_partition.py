@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from aggregate_scoring.aggregate_scoring import QualityEducation
+from aggregate_scoring.education_partition import build_education_partition, load_education_partition, partition_hash, save_education_partition
+
+from conftest import random_sites
+
+
+@pytest.fixture(scope="module")
+def partition(scoring_kwargs):
+    return build_education_partition(**scoring_kwargs)
+
+
+def test_partition_matches_per_site_scoring(scoring_kwargs, partition):
+    assert partition["score"].nunique() > 1
+    lats, lons = random_sites(300, seed=30)
+    expected = [QualityEducation(lat, lon, **scoring_kwargs).calculate_score() for lat, lon in zip(lats, lons)]
+    with_partition = dict(scoring_kwargs, education_partition=partition)
+    by_site = [QualityEducation(lat, lon, **with_partition).calculate_score() for lat, lon in zip(lats, lons)]
+    assert by_site == expected
+    np.testing.assert_array_equal(QualityEducation.calculate_score_many(lats, lons, **with_partition), expected)
+
+
+def test_saved_partition_is_checked_against_its_inputs(scoring_kwargs, partition, tmp_path):
+    path = str(tmp_path / "partition.parquet")
+    save_education_partition(partition, path)
+    input_hash = partition_hash(scoring_kwargs["school_df"], scoring_kwargs["school_boundary_gdfs"], scoring_kwargs["state_avg_by_year"])
+    assert len(load_education_partition(path, input_hash)) == len(partition)
+
+    other_averages = dict(scoring_kwargs["state_avg_by_year"], high={2018: 70.0, 2019: 70.0})
+    assert partition_hash(scoring_kwargs["school_df"], scoring_kwargs["school_boundary_gdfs"], other_averages) != input_hash
+    assert load_education_partition(path, "stale") is None
+
+
+def test_saved_partition_is_ignored_for_other_state_averages(scoring_kwargs, tmp_path):
+    # test scores on every school, so the state averages decide which schools qualify
+    school_df = scoring_kwargs["school_df"].assign(**{"2018": 78.0, "2019": 78.0}).rename(columns={"2018": 2018, "2019": 2019})
+    kwargs = dict(scoring_kwargs, school_df=school_df)
+    path = str(tmp_path / "partition.parquet")
+    save_education_partition(build_education_partition(**kwargs), path)
+
+    lats, lons = random_sites(100, seed=31)
+    lower = {key: {2018: 70.0, 2019: 70.0} for key in ("elementary", "middle", "high")}
+    results = []
+    for averages in (kwargs["state_avg_by_year"], lower):
+        exact = dict(kwargs, state_avg_by_year=averages)
+        expected = [QualityEducation(lat, lon, **exact).calculate_score() for lat, lon in zip(lats, lons)]
+        np.testing.assert_array_equal(QualityEducation.calculate_score_many(lats, lons, **dict(exact, education_partition=path)), expected)
+        results.append(expected)
+    assert results[0] != results[1]
@@ -0,0 +1,45 @@
+"""
+PolygonIndex against the gpd.sjoin / shapely membership tests it replaced.
+"""
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from aggregate_scoring.spatial_index import PolygonIndex
+
+from conftest import EAST, NORTH, SOUTH, WEST, rural_union
+
+
+def sample_points(gdf, n=2000, seed=40):
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(SOUTH - 0.01, NORTH + 0.01, n)
+    lons = rng.uniform(WEST - 0.01, EAST + 0.01, n)
+    vertices = shapely.get_coordinates(gdf.to_crs("EPSG:4326").geometry.values)
+    return np.r_[lats, vertices[:, 1]], np.r_[lons, vertices[:, 0]]
+
+
+def sjoin_pairs(gdf, lats, lons):
+    points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(lons, lats), crs="EPSG:4326").to_crs(gdf.crs)
+    joined = gpd.sjoin(points, gdf.reset_index(drop=True), how="inner", predicate="within")
+    pairs = np.array(sorted(zip(joined.index, joined["index_right"])), dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+@pytest.mark.parametrize("layer", ["tracts", "tracts_3857", "zones"])
+def test_query_many_matches_sjoin_within(layer, tracts_gdf, zones):
+    gdf = {"tracts": tracts_gdf, "tracts_3857": tracts_gdf.to_crs("EPSG:3857"), "zones": zones[0]}[layer]
+    lats, lons = sample_points(gdf)
+    expected = sjoin_pairs(gdf, lats, lons)
+    assert len(expected[0])
+    for want, got in zip(expected, PolygonIndex(gdf).query_many(lats, lons)):
+        np.testing.assert_array_equal(got, want)
+
+
+def test_from_geometry_matches_union_contains():
+    union = rural_union()
+    index = PolygonIndex.from_geometry(union)
+    lats, lons = sample_points(gpd.GeoDataFrame(geometry=[union], crs="EPSG:4326"))
+    expected = shapely.contains_xy(union, lons, lats)
+    assert expected.any() and not expected.all()
+    np.testing.assert_array_equal(index.locate_many(lats, lons) >= 0, expected)
@@ -0,0 +1,56 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from aggregate_scoring.polygon_raster import PolygonRaster, load_polygon_raster
+from aggregate_scoring.spatial_index import PolygonIndex
+
+from conftest import EAST, NORTH, SOUTH, WEST
+
+
+def probe_points(gdf, n=3000, seed=20):
+    """Random points over and around the layer, plus every vertex of it (all on an edge)."""
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(SOUTH - 0.01, NORTH + 0.01, n)
+    lons = rng.uniform(WEST - 0.01, EAST + 0.01, n)
+    vertices = shapely.get_coordinates(gdf.to_crs("EPSG:4326").geometry.values)
+    return np.r_[lats, vertices[:, 1]], np.r_[lons, vertices[:, 0]]
+
+
+def overlapping_layer():
+    circles = [shapely.Point(WEST + 0.02, SOUTH + 0.02).buffer(0.015), shapely.Point(WEST + 0.03, SOUTH + 0.025).buffer(0.012)]
+    return gpd.GeoDataFrame({"name": ["a", "b"]}, geometry=circles, crs="EPSG:4326")
+
+
+@pytest.mark.parametrize("layer", ["tracts", "tracts_3857", "zones", "overlapping"])
+def test_raster_matches_polygon_index(layer, tracts_gdf, zones):
+    gdf = {"tracts": tracts_gdf, "tracts_3857": tracts_gdf.to_crs("EPSG:3857"),
+           "zones": zones[0], "overlapping": overlapping_layer()}[layer]
+    raster = PolygonRaster.build(gdf, cells_across=64)
+    assert (raster.cells >= 0).any() and (raster.cells == PolygonRaster.BOUNDARY).any()
+
+    index = PolygonIndex(gdf)
+    lats, lons = probe_points(gdf)
+    for expected, got in zip(index.query_many(lats, lons), raster.query_many(lats, lons)):
+        np.testing.assert_array_equal(got, expected)
+    np.testing.assert_array_equal(raster.locate_many(lats, lons), index.locate_many(lats, lons))
+
+
+def test_saved_raster_matches_built_one(tracts_gdf, tmp_path):
+    raster = PolygonRaster.build(tracts_gdf, cells_across=64)
+    path = str(tmp_path / "tracts")
+    raster.save(path)
+    loaded = load_polygon_raster(path, tracts_gdf)
+    assert loaded is load_polygon_raster(path, tracts_gdf)
+
+    lats, lons = probe_points(tracts_gdf)
+    np.testing.assert_array_equal(loaded.locate_many(lats, lons), raster.locate_many(lats, lons))
+
+
+def test_raster_refuses_a_different_layer(tracts_gdf, tmp_path):
+    path = str(tmp_path / "tracts")
+    PolygonRaster.build(tracts_gdf, cells_across=64).save(path)
+    moved = tracts_gdf.set_geometry(tracts_gdf.geometry.translate(xoff=0.001))
+    with pytest.raises(ValueError):
+        PolygonRaster.load(path, moved)
@@ -0,0 +1,56 @@
+"""
+QualityEducation's choice between the precomputed education score layer and
+school matching.
+"""
+import geopandas as gpd
+import pytest
+import shapely
+
+from aggregate_scoring.aggregate_scoring import QualityEducation
+from aggregate_scoring.polygon_raster import load_education_score_layer
+
+from conftest import EAST, NORTH, SOUTH, WEST, random_sites
+
+MIDDLE_LAT, MIDDLE_LON = (SOUTH + NORTH) / 2, (WEST + EAST) / 2
+
+
+@pytest.fixture(scope="module")
+def layer_path(tmp_path_factory):
+    """Scores over the west half of the box only."""
+    layer = gpd.GeoDataFrame({"score": [1.5, 3.0]}, geometry=[shapely.box(WEST, SOUTH, MIDDLE_LON, MIDDLE_LAT),
+                                                               shapely.box(WEST, MIDDLE_LAT, MIDDLE_LON, NORTH)], crs="EPSG:4326")
+    path = str(tmp_path_factory.mktemp("education") / "education_scores.geojson")
+    layer.to_file(path, driver="GeoJSON")
+    return path
+
+
+def test_modes_pick_layer_or_school_matching(scoring_kwargs, layer_path):
+    assert load_education_score_layer(layer_path) is load_education_score_layer(layer_path)
+    kwargs = dict(scoring_kwargs, education_layer=layer_path)
+    lats, lons = random_sites(60, seed=120)
+    for lat, lon in zip(lats, lons):
+        schools = QualityEducation(lat, lon, **kwargs).calculate_score()
+        auto = QualityEducation(lat, lon, **dict(kwargs, education_mode="auto")).calculate_score()
+        layer_only = QualityEducation(lat, lon, **dict(kwargs, education_mode="layer")).calculate_score()
+        if lon < MIDDLE_LON:
+            assert auto == layer_only == (1.5 if lat < MIDDLE_LAT else 3.0)
+        else:
+            assert auto == schools
+            assert layer_only == 0
+
+
+def test_missing_layer(scoring_kwargs, tmp_path, capsys):
+    kwargs = dict(scoring_kwargs, education_layer=str(tmp_path / "missing.geojson"))
+    lats, lons = random_sites(20, seed=121)
+    with pytest.raises(FileNotFoundError):
+        QualityEducation(lats[0], lons[0], **dict(kwargs, education_mode="layer")).calculate_score()
+    for lat, lon in zip(lats, lons):
+        auto = QualityEducation(lat, lon, **dict(kwargs, education_mode="auto")).calculate_score()
+        assert auto == QualityEducation(lat, lon, **kwargs).calculate_score()
+    # reported once, not once per site
+    assert capsys.readouterr().out.count("missing.geojson") == 1
+
+
+def test_unknown_mode_raises(scoring_kwargs):
+    with pytest.raises(ValueError):
+        QualityEducation(SOUTH, WEST, **dict(scoring_kwargs, education_mode="fast")).calculate_score()
@@ -0,0 +1,31 @@
+import os
+
+from thefuzz import fuzz, process
+
+from aggregate_scoring import school_matching
+from aggregate_scoring.school_matching import GRADE_CLUSTERS, SchoolNameResolver, load_school_resolver, preprocess_school_name, zone_school_names
+
+
+def test_resolver_matches_fuzzy_search(scoring_kwargs):
+    school_df = scoring_kwargs["school_df"]
+    resolver = SchoolNameResolver.build(school_df, scoring_kwargs["school_boundary_gdfs"])
+    for school_type, names in zone_school_names(scoring_kwargs["school_boundary_gdfs"]).items():
+        group = school_df[school_df["Grade Cluster"] == GRADE_CLUSTERS[school_type]]
+        cleaned = group["School Name"].apply(preprocess_school_name)
+        for name in names + ["Oak Elem"]:
+            match, score = process.extractOne(preprocess_school_name(name), cleaned.tolist(), scorer=fuzz.token_set_ratio)
+            assert resolver.resolve(name, GRADE_CLUSTERS[school_type]) == (cleaned[cleaned == match].index[0], score)
+
+
+def test_resolver_table_is_written_only_when_asked(scoring_kwargs, tmp_path, monkeypatch):
+    default_path = str(tmp_path / "default.json")
+    monkeypatch.setattr(school_matching, "DEFAULT_RESOLUTION_PATH", default_path)
+    school_df, zones = scoring_kwargs["school_df"], scoring_kwargs["school_boundary_gdfs"]
+
+    in_memory = load_school_resolver(school_df, zones)
+    assert not os.path.exists(default_path)
+
+    path = str(tmp_path / "names.json")
+    saved = load_school_resolver(school_df, zones, path)
+    assert os.path.exists(path)
+    assert load_school_resolver(school_df, zones, path).entries == saved.entries == in_memory.entries
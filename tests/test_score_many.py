@@ -0,0 +1,42 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+
+from aggregate_scoring.aggregate_scoring import AggregateScoringSystem, score_many
+
+from conftest import random_sites
+
+CRITERION_COLUMNS = [
+    "community_transportation_options_score",
+    "desirable_undesirable_activities_score",
+    "quality_education_areas_score",
+    "stable_communities_score",
+    "housing_needs_characteristics_score",
+]
+
+
+@pytest.mark.parametrize("in_qct", [None, False])
+def test_score_many_matches_per_site_scoring(scoring_kwargs, in_qct):
+    kwargs = scoring_kwargs if in_qct is None else dict(scoring_kwargs, in_qct=in_qct)
+    lats, lons = random_sites(150, seed=50)
+    scores = score_many(lats, lons, **kwargs)
+
+    expected = []
+    for lat, lon in zip(lats, lons):
+        system = AggregateScoringSystem(lat, lon, **kwargs)
+        expected.append([criterion.calculate_score() for criterion in system.criteria] + [system.calculate_total_score()])
+    expected = np.array(expected, dtype=np.float64)
+
+    np.testing.assert_array_equal(scores[CRITERION_COLUMNS].to_numpy(dtype=np.float64), expected[:, :-1])
+    np.testing.assert_array_equal(scores["total_score"].to_numpy(), expected[:, -1])
+    for column in CRITERION_COLUMNS:
+        assert scores[column].nunique() > 1
+
+
+def test_score_many_takes_projected_points(scoring_kwargs):
+    lats, lons = random_sites(20, seed=51)
+    sites = gpd.GeoDataFrame(geometry=gpd.points_from_xy(lons, lats), crs="EPSG:4326", index=np.arange(100, 120)).to_crs("EPSG:3857")
+    scores = score_many(sites, **scoring_kwargs)
+    assert scores.index.tolist() == sites.index.tolist()
+    np.testing.assert_array_equal(scores["total_score"].to_numpy(), score_many(lats, lons, **scoring_kwargs)["total_score"].to_numpy())
+    assert len(score_many([], [], **scoring_kwargs)) == 0
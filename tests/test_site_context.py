@@ -0,0 +1,47 @@
+"""
+Criteria sharing one SiteContext against the same criteria scored alone.
+"""
+from aggregate_scoring.aggregate_scoring import AggregateScoringSystem
+from aggregate_scoring.site_context import SiteContext
+from aggregate_scoring.spatial_index import PolygonIndex
+
+from conftest import random_sites
+
+
+class CountingIndex:
+    """A PolygonIndex that counts the lookups reaching it."""
+
+    def __init__(self, index):
+        self.index = index
+        self.lookups = 0
+
+    def query_many(self, lats, lons):
+        self.lookups += 1
+        return self.index.query_many(lats, lons)
+
+    def locate(self, lat, lon):
+        self.lookups += 1
+        return self.index.locate(lat, lon)
+
+
+def test_shared_context_scores_like_separate_criteria(scoring_kwargs):
+    # a margin past the tracts, so sites outside every tract are covered too
+    lats, lons = random_sites(40, seed=110, margin=-0.005)
+    for lat, lon in zip(lats, lons):
+        system = AggregateScoringSystem(lat, lon, **scoring_kwargs)
+        assert len({id(criterion.context) for criterion in system.criteria}) == 1
+        shared = [criterion.calculate_score() for criterion in system.criteria]
+        assert shared == [type(criterion)(lat, lon, **scoring_kwargs).calculate_score() for criterion in system.criteria]
+
+
+def test_context_resolves_each_lookup_once(tracts_gdf):
+    index = CountingIndex(PolygonIndex(tracts_gdf))
+    lats, lons = random_sites(50, seed=111, margin=-0.005)
+    for lat, lon in zip(lats, lons):
+        context = SiteContext(lat, lon)
+        rows = context.polygon_rows(index)
+        assert context.locate(index) == (rows[0] if len(rows) else -1) == index.index.locate(lat, lon)
+        assert context.polygon_rows(index) is rows
+        assert SiteContext.for_site(lat, lon, context) is context
+        assert SiteContext.for_site(lat + 0.001, lon, context) is not context
+    assert index.lookups == len(lats)
@@ -0,0 +1,76 @@
+"""
+StableCommunities against the per-site GeoDataFrame filters and indicator
+row lookups it replaced.
+"""
+import geopandas as gpd
+import pandas as pd
+import pytest
+
+from aggregate_scoring.aggregate_scoring import StableCommunities
+
+from conftest import random_sites
+
+
+def scan_tract_dict(point, point_meters, tracts_shp):
+    actual_tract = tracts_shp[tracts_shp.contains(point)]
+    point_buffer = point_meters.buffer(StableCommunities.NEARBY_METERS)
+    gdf_meters = tracts_shp.to_crs(epsg=3857)
+    tract_dict = {}
+    if not actual_tract.empty:
+        tract_dict["actual"] = actual_tract.iloc[0]["GEOID"]
+    for idx, row in gdf_meters[gdf_meters.intersects(point_buffer)].iterrows():
+        if row["GEOID"] != tract_dict.get("actual"):
+            tract_dict[f"tract{idx}"] = row["GEOID"]
+    return tract_dict
+
+
+def scan_tract_dicts(lats, lons, tracts_shp):
+    points = gpd.GeoSeries(gpd.points_from_xy(lons, lats), crs=4326)
+    return [scan_tract_dict(*pair, tracts_shp) for pair in zip(points, points.to_crs(epsg=3857))]
+
+
+def scan_score(tract_dict, indicators_df):
+    indicators = StableCommunities.INDICATORS
+    rows = indicators_df.assign(**{"2020 Census Tract": indicators_df["2020 Census Tract"].astype(str)})
+
+    def flags(tract):
+        row = rows[rows["2020 Census Tract"] == tract]
+        return pd.Series([0] * len(indicators), index=indicators) if row.empty else row[indicators].iloc[0]
+
+    actual_flags = flags(tract_dict.get("actual"))
+    nearby_flags = pd.Series([0] * len(indicators), index=indicators)
+    for key, tract in tract_dict.items():
+        if key != "actual":
+            nearby_flags = nearby_flags.combine(flags(tract), func=max)
+    actual_count = int(actual_flags.sum())
+    nearby_count = int(nearby_flags.sum())
+    combined_count = int(actual_flags.combine(nearby_flags, func=max).sum())
+
+    actual_only_score = 10 if actual_count >= 4 else 8 if actual_count == 3 else 6 if actual_count == 2 else 0
+    nearby_score = 0
+    if nearby_count > 0:
+        nearby_score = 9 if combined_count >= 4 else 7 if combined_count == 3 else 5 if combined_count == 2 else 0
+    return max(actual_only_score, nearby_score)
+
+
+@pytest.fixture(scope="module")
+def sites():
+    # a margin past the tracts, so sites with no tract but one within 402 m are covered too
+    return random_sites(80, seed=100, margin=-0.01)
+
+
+def test_tract_lookups_match_the_geodataframe_filters(scoring_kwargs, sites):
+    tracts_shp = scoring_kwargs["tracts_shp"]
+    expected = scan_tract_dicts(*sites, tracts_shp)
+    assert any("actual" not in tract_dict for tract_dict in expected)
+    criterion = StableCommunities(*[s[0] for s in sites], **scoring_kwargs)
+    assert StableCommunities.find_census_tracts_many(*sites, *criterion.get_tract_indexes()) == expected
+    assert [StableCommunities(lat, lon, **scoring_kwargs).find_census_tracts() for lat, lon in zip(*sites)] == expected
+
+
+def test_scores_match_the_indicator_row_lookups(scoring_kwargs, sites):
+    tracts_shp, indicators_df = scoring_kwargs["tracts_shp"], scoring_kwargs["indicators_df"]
+    expected = [scan_score(tract_dict, indicators_df) for tract_dict in scan_tract_dicts(*sites, tracts_shp)]
+    assert len(set(expected)) > 2
+    assert StableCommunities.calculate_score_many(*sites, **scoring_kwargs).tolist() == expected
+    assert [StableCommunities(lat, lon, **scoring_kwargs).calculate_score() for lat, lon in zip(*sites)] == expected
@@ -0,0 +1,39 @@
+import numpy as np
+
+from aggregate_scoring.aggregate_scoring import StableCommunities
+from aggregate_scoring.stable_surface import StableSurface, build_stable_surface, load_stable_surface, save_stable_surface, surface_hash
+
+from conftest import random_sites
+
+
+def test_surface_matches_exact_scoring(scoring_kwargs, tmp_path):
+    indicators_df, tracts_shp = scoring_kwargs["indicators_df"], scoring_kwargs["tracts_shp"]
+    surface = build_stable_surface(indicators_df, tracts_shp)
+    path = str(tmp_path / "surface.parquet")
+    save_stable_surface(surface, path)
+    loaded = load_stable_surface(path, surface_hash(indicators_df, tracts_shp))
+    assert isinstance(loaded, StableSurface) and len(loaded) == len(surface)
+
+    # a margin past the tracts, so sites with no tract but one within 402 m are covered too
+    lats, lons = random_sites(2000, seed=40, margin=-0.01)
+    criterion = StableCommunities(0, 0, **scoring_kwargs)
+    exact = StableCommunities.scores_many(lats, lons, *criterion.get_tract_indexes(), criterion.get_indicator_masks())
+    assert len(np.unique(exact)) > 2
+
+    from_surface = loaded.scores_many(lats, lons)
+    decided = ~np.isnan(from_surface)
+    assert decided.mean() > 0.95
+    np.testing.assert_array_equal(from_surface[decided], exact[decided])
+
+    with_surface = dict(scoring_kwargs, stable_surface=path)
+    np.testing.assert_array_equal(StableCommunities.calculate_score_many(lats, lons, **with_surface), exact)
+    per_site = [StableCommunities(lat, lon, **with_surface).calculate_score() for lat, lon in zip(lats[:200], lons[:200])]
+    np.testing.assert_array_equal(per_site, exact[:200])
+
+
+def test_saved_surface_is_dropped_when_indicators_change(scoring_kwargs, tmp_path):
+    indicators_df, tracts_shp = scoring_kwargs["indicators_df"], scoring_kwargs["tracts_shp"]
+    path = str(tmp_path / "surface.parquet")
+    save_stable_surface(build_stable_surface(indicators_df, tracts_shp), path)
+    changed = indicators_df.assign(**{StableCommunities.INDICATORS[0]: 1 - indicators_df[StableCommunities.INDICATORS[0]]})
+    assert load_stable_surface(path, surface_hash(changed, tracts_shp)) is None
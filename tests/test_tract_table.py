@@ -0,0 +1,23 @@
+import numpy as np
+
+from aggregate_scoring.aggregate_scoring import score_many
+from aggregate_scoring.tract_table import TractTable
+
+from conftest import random_sites
+
+
+def test_tract_table_scores_like_the_source_tables(scoring_kwargs):
+    lats, lons = random_sites(200, seed=60)
+    with_table = score_many(lats, lons, **scoring_kwargs)
+    without_table = score_many(lats, lons, **dict(scoring_kwargs, tract_table=None))
+    np.testing.assert_array_equal(with_table.to_numpy(), without_table.to_numpy())
+
+
+def test_tract_table_round_trip(scoring_kwargs, tmp_path):
+    table = scoring_kwargs["tract_table"]
+    path = str(tmp_path / "tract_table.parquet")
+    table.save(path)
+    loaded = TractTable.load(path)
+    assert loaded.housing == table.housing
+    assert loaded.food_desert_flags == table.food_desert_flags
+    assert loaded.indicator_masks.sort_index().equals(table.indicator_masks.sort_index())
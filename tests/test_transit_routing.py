@@ -0,0 +1,66 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from aggregate_scoring.aggregate_scoring import CommunityTransportationOptions
+from aggregate_scoring.spatial_index import scalar_haversine_miles
+
+from conftest import grid_streets, random_sites
+
+
+@pytest.fixture(scope="module")
+def osm_graph():
+    """The synthetic street grid as the osmnx walk graph a bbox download would return."""
+    node_ids, lats, lons, edge_u, edge_v, lengths = grid_streets()
+    G = nx.MultiDiGraph(crs="EPSG:4326")
+    for node, lat, lon in zip(node_ids.tolist(), lats.tolist(), lons.tolist()):
+        G.add_node(node, y=lat, x=lon)
+    for u, v, length in zip(node_ids[edge_u].tolist(), node_ids[edge_v].tolist(), lengths.tolist()):
+        G.add_edge(u, v, length=length)
+        G.add_edge(v, u, length=length)
+    return G
+
+
+def test_site_graph_matches_per_stop_routing(osm_graph, transit_df, walk_network, monkeypatch):
+    monkeypatch.setattr(CommunityTransportationOptions, "walk_graph_from_bbox", lambda self, north, south, east, west: osm_graph)
+    lats, lons = random_sites(10, seed=80)
+    for lat, lon in zip(lats, lons):
+        per_stop = CommunityTransportationOptions(lat, lon, transit_df=transit_df, walking_mode="per_stop")
+        site_graph = CommunityTransportationOptions(lat, lon, transit_df=transit_df, walking_mode="site_graph")
+        store = CommunityTransportationOptions(lat, lon, transit_df=transit_df, walk_network=walk_network)
+        expected = per_stop.calculate_score()
+        assert site_graph.calculate_score() == expected
+        assert site_graph.fallback_count == per_stop.fallback_count
+        if store.calculate_score() != expected:
+            # the store only differs where it refuses to snap a stop and falls back
+            assert store.fallback_count > 0
+
+
+def test_candidates_match_per_stop_haversine(transit_df):
+    stops = transit_df.copy()
+    stops.loc[3, "latitude"] = np.nan
+    lats, lons = random_sites(50, seed=81)
+    for lat, lon in zip(lats, lons):
+        site = CommunityTransportationOptions(lat, lon, transit_df=stops)
+        positions, miles = site.candidate_stop_arrays()
+        expected = [i for i, (stop_lat, stop_lon) in enumerate(zip(stops["latitude"], stops["longitude"]))
+                    if scalar_haversine_miles(lat, lon, stop_lat, stop_lon) <= site.SEARCH_RADIUS_MILES]
+        assert sorted(positions.tolist()) == expected
+        np.testing.assert_allclose(miles, [scalar_haversine_miles(lat, lon, *stops.iloc[i][["latitude", "longitude"]]) for i in positions])
+
+
+def test_time_budget(transit_df, walk_network):
+    lats, lons = random_sites(20, seed=82)
+    for lat, lon in zip(lats, lons):
+        kwargs = dict(transit_df=transit_df, walk_network=walk_network)
+        unbounded = CommunityTransportationOptions(lat, lon, **kwargs).calculate_score()
+        assert CommunityTransportationOptions(lat, lon, time_budget_s=60, **kwargs).calculate_score() == unbounded
+
+        before = CommunityTransportationOptions.fallback_counts["deadline"]
+        expired = CommunityTransportationOptions(lat, lon, time_budget_s=0, walking_fallback="raise", **kwargs)
+        candidates = expired.filter_candidate_stops()
+        straight_line = expired.apply_qap_scoring([dict(stop, walking_distance_miles=stop["straight_line_dist"]) for stop in candidates])
+        assert expired.calculate_score() == straight_line
+        assert expired.fallback_count == len(candidates)
+        assert CommunityTransportationOptions.fallback_counts["deadline"] - before == len(candidates)
+        assert len(expired.routing_report["estimated"]) == len(candidates)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from aggregate_scoring.transit_stops import DEDUP_RADIUS_M, deduplicate_stops
+
+METERS_PER_DEG_LAT = 111195.0
+
+
+def test_chain_of_close_stops_is_not_merged_end_to_end():
+    # eleven stops 4 m apart: every neighbour pair is within the radius, the ends are 40 m apart
+    lats = 33.0 + np.arange(11) * 4 / METERS_PER_DEG_LAT
+    df = pd.DataFrame({"latitude": lats, "longitude": -84.0, "is_potential_hub": [False] * 10 + [True]})
+    deduped = deduplicate_stops(df)
+
+    assert deduped["merged_count"].tolist() == [2, 2, 2, 2, 2, 1]
+    assert deduped["is_potential_hub"].tolist() == [False] * 5 + [True]
+    np.testing.assert_allclose(deduped["latitude"].to_numpy(), lats[::2])
+    assert np.diff(deduped["latitude"].to_numpy()).min() * METERS_PER_DEG_LAT > DEDUP_RADIUS_M
+
+
+def test_duplicates_merge_and_keep_hub_flag():
+    df = pd.DataFrame({
+        "latitude": [33.0, 33.0, 33.00001, 34.0, np.nan],
+        "longitude": [-84.0, -84.0, -84.0, -84.0, -84.0],
+        "is_potential_hub": [0, 1, 0, 0, 1],
+    })
+    deduped = deduplicate_stops(df)
+
+    assert len(deduped) == 2
+    assert deduped["merged_count"].tolist() == [3, 1]
+    assert deduped["is_potential_hub"].tolist() == [True, False]
@@ -0,0 +1,79 @@
+import numpy as np
+
+from aggregate_scoring.aggregate_scoring import CommunityTransportationOptions
+from aggregate_scoring.spatial_index import haversine_miles
+from aggregate_scoring.walk_network import TiledWalkNetwork, TransitDistanceField, WalkNetwork, build_tiles, validate_csr_engine
+
+from conftest import SOUTH, WEST, grid_network, random_sites
+
+LIMIT_METERS = CommunityTransportationOptions.WALK_LIMIT_MILES / CommunityTransportationOptions.MILES_PER_METER
+
+
+def test_csr_engine_matches_networkx():
+    report = validate_csr_engine(grid_network(), sample_size=50, limit_meters=LIMIT_METERS)
+    assert report["sites"] == 50
+    assert report["max_abs_diff_m"] < 0.01
+    assert report["reach_mismatches"] == 0
+
+
+def test_walking_distances_agree_across_engines(walk_network):
+    lats, lons = random_sites(30, seed=10)
+    dest_lats, dest_lons = random_sites(60, seed=11)
+    for lat, lon in zip(lats, lons):
+        by_nx = walk_network.walking_distances(lat, lon, dest_lats, dest_lons, LIMIT_METERS, engine="networkx")
+        by_csr = walk_network.walking_distances(lat, lon, dest_lats, dest_lons, LIMIT_METERS, engine="csr")
+        np.testing.assert_array_equal(np.isnan(by_nx), np.isnan(by_csr))
+        np.testing.assert_array_equal(np.isinf(by_nx), np.isinf(by_csr))
+        finite = np.isfinite(by_nx)
+        np.testing.assert_allclose(by_csr[finite], by_nx[finite], atol=0.01)
+
+
+def test_save_load_round_trip(walk_network, tmp_path):
+    path = str(tmp_path / "network.npz")
+    walk_network.save(path)
+    loaded = WalkNetwork.load(path)
+    for name in ("node_ids", "lats", "lons", "edge_u", "edge_v", "edge_length"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(walk_network, name))
+
+
+def test_transit_field_matches_per_site_routing(walk_network, transit_df):
+    field = TransitDistanceField.build(walk_network, transit_df, limit_meters=LIMIT_METERS)
+    lats, lons = random_sites(200, seed=14)
+    by_field = CommunityTransportationOptions.score_with_field(lats, lons, walk_network, field)
+    compared = 0
+    for lat, lon, expected in zip(lats, lons, by_field):
+        site = CommunityTransportationOptions(lat, lon, transit_df=transit_df, walk_network=walk_network, walk_engine="csr")
+        score = site.calculate_score()
+        if site.fallback_count == 0:  # the field has no haversine estimate for stops it cannot route to
+            assert score == expected
+            compared += 1
+    assert compared > 150
+
+
+def test_tiled_network_matches_untiled(walk_network, tmp_path):
+    build_tiles(walk_network, str(tmp_path), tile_deg=0.02, origin_lat=SOUTH, origin_lon=WEST)
+    tiled = TiledWalkNetwork(str(tmp_path))
+    lats, lons = random_sites(40, seed=12)
+    dest_lats, dest_lons = random_sites(60, seed=13)
+    for lat, lon in zip(lats, lons):
+        # the destinations a site routes to: candidate stops within the search radius
+        near = haversine_miles(lat, lon, dest_lats, dest_lons) <= CommunityTransportationOptions.SEARCH_RADIUS_MILES
+        expected = walk_network.walking_distances(lat, lon, dest_lats[near], dest_lons[near], LIMIT_METERS, engine="csr")
+        np.testing.assert_array_equal(tiled.walking_distances(lat, lon, dest_lats[near], dest_lons[near], LIMIT_METERS), expected)
+    assert tiled.loads > 1
+
+
+def test_tiles_keep_components_of_the_full_network(tmp_path):
+    # a U-shaped street: the two feet are connected only around the top, far outside any halo
+    lats = np.r_[np.linspace(33.0, 33.1, 21), 33.1, np.linspace(33.1, 33.0, 21)]
+    lons = np.r_[np.full(21, -84.0), -83.995, np.full(21, -83.99)]
+    edge_u = np.arange(len(lats) - 1)
+    edge_v = edge_u + 1
+    lengths = np.hypot((lats[edge_u] - lats[edge_v]) * 111000, (lons[edge_u] - lons[edge_v]) * 93000)
+    network = WalkNetwork(np.arange(len(lats)), lats, lons, edge_u, edge_v, lengths)
+    build_tiles(network, str(tmp_path), tile_deg=0.05, origin_lat=32.99, origin_lon=-84.01)
+
+    untiled = network.walking_distances(33.0, -84.0, [33.0], [-83.99], LIMIT_METERS, engine="csr")
+    tiled = TiledWalkNetwork(str(tmp_path)).walking_distances(33.0, -84.0, [33.0], [-83.99], LIMIT_METERS)
+    assert np.isinf(untiled[0])
+    assert np.isinf(tiled[0])